@@ -0,0 +1,44 @@
+"""ChunkAggregator on a 100k-record synthetic stream, in memory and spilling."""
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chunk_aggregator import aggregate  # noqa: E402
+
+RECORDS = 100_000
+CHUNK = 500
+
+
+async def stream():
+    # every 5th record repeats an earlier device with an updated field
+    for start in range(0, RECORDS, CHUNK):
+        data = []
+        for i in range(start, start + CHUNK):
+            device = i - 1000 if i % 5 == 0 and i >= 1000 else i
+            data.append({"deviceId": f"dev-{device}", "status": "online", "seq": i,
+                         "info": {"model": "x", "fw": i % 7}})
+        yield {"status": "processing", "data": data}
+        await asyncio.sleep(0)
+    yield {"status": "completed", "data": []}
+
+
+def main():
+    for max_records in (1_000_000, 10_000):
+        start = time.perf_counter()
+        out = asyncio.run(aggregate(stream(), key="deviceId", max_records=max_records))
+        elapsed = time.perf_counter() - start
+        # tracemalloc slows things down a lot, so peak memory gets its own run
+        tracemalloc.start()
+        asyncio.run(aggregate(stream(), key="deviceId", max_records=max_records))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"max_records={max_records:>9,}  {RECORDS / elapsed:10,.0f} records/s  "
+              f"peak {peak / 2**20:6.1f} MiB  output {len(out) / 2**20:5.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
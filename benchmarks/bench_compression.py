@@ -0,0 +1,108 @@
+"""Per-codec cost of CompressionMiddleware on a ~20 MB /count-style JSON
+body: compression ratio, then wall-clock throughput and CPU time for
+compressing a response and decompressing a request, both sent as 64 KiB
+ASGI messages. zstd is included when ``zstandard`` is installed."""
+import asyncio
+import gzip
+import json
+import random
+import sys
+import time
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from compression import CODECS, CompressionMiddleware  # noqa: E402
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK = 64 * 1024
+WORDS = ["robot", "the", "and", "robotics", "café", "naïve", "ramen", "lorem", "ipsum", "dolor"]
+
+
+def payload() -> bytes:
+    rng = random.Random(0)
+    text = " ".join(rng.choice(WORDS) for _ in range(3_000_000))
+    return json.dumps({"text": text, "word": "robot"}).encode()
+
+
+def compress(codec, data, level):
+    if codec == "gzip":
+        return gzip.compress(data, level)
+    if codec == "deflate":
+        return zlib.compress(data, level)
+    return zstandard.ZstdCompressor(level=3).compress(data)
+
+
+def pieces(data):
+    return [data[i:i + CHUNK] for i in range(0, len(data), CHUNK)]
+
+
+async def respond(codec, data, level):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        for part in pieces(data):
+            await send({"type": "http.response.body", "body": part, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    size = 0
+
+    async def send(message):
+        nonlocal size
+        size += len(message.get("body", b""))
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", codec.encode())]}
+    await CompressionMiddleware(app, level=level)(scope, None, send)
+    return size
+
+
+async def upload(codec, packed):
+    messages = [{"type": "http.request", "body": p, "more_body": True} for p in pieces(packed)]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+    size = 0
+
+    async def app(scope, receive, send):
+        nonlocal size
+        while True:
+            message = await receive()
+            size += len(message["body"])
+            if not message["more_body"]:
+                return
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {"type": "http", "method": "POST", "path": "/",
+             "headers": [(b"content-encoding", codec.encode())]}
+    await CompressionMiddleware(app, max_body=1 << 30)(scope, receive, None)
+    return size
+
+
+def timed(fn, *args):
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = asyncio.run(fn(*args))
+    return result, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def main():
+    data = payload()
+    mb = len(data) / 1e6
+    print(f"payload {mb:.1f} MB, {CHUNK // 1024} KiB messages")
+    print(f"{'codec':14s} {'ratio':>6s} {'compress MB/s':>14s} {'cpu s':>6s} {'decompress MB/s':>16s} {'cpu s':>6s}")
+    for codec in CODECS:
+        for level in ([1, 6, 9] if codec != "zstd" else [3]):
+            size, wall, cpu = timed(respond, codec, data, level)
+            packed = compress(codec, data, level)
+            out, dwall, dcpu = timed(upload, codec, packed)
+            assert out == len(data)
+            print(f"{codec + ' ' + str(level):14s} {len(data) / size:6.1f} {mb / wall:14.1f} {cpu:6.2f} "
+                  f"{mb / dwall:16.1f} {dcpu:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""count_word modes vs plain str.count on a ~50 MB text, one mode at a time
+and all modes through count_word_modes (one transform per kind)."""
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from py_utils import COUNT_MODES, count_word, count_word_modes  # noqa: E402
+
+WORDS = ["robot", "Robot", "ROBOT", "robotics", "café", "Café", "the", "and", "ramen", "naïve"]
+
+
+def timed(label, size, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:22s} {elapsed * 1000:8.1f} ms  {size / elapsed / 1e6:8.1f} MB/s  {result}")
+
+
+def main():
+    rng = random.Random(0)
+    text = " ".join(rng.choice(WORDS) for _ in range(7_000_000))
+    size = len(text.encode())
+    timed("str.count", size, text.count, "robot")
+    for mode in COUNT_MODES:
+        timed(mode, size, count_word, text, "robot", mode)
+    timed("all modes (shared)", size, count_word_modes, text, "robot", list(COUNT_MODES))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Dice-game Monte Carlo: randint loop vs simulate_dice_game (1 and N workers)."""
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dice_sim import simulate_dice_game  # noqa: E402
+
+ROUNDS = 5
+
+
+def randint_loop(games):
+    wins = 0
+    for _ in range(games):
+        me = sum(random.randint(1, 6) for _ in range(ROUNDS))
+        com = sum(random.randint(1, 6) for _ in range(ROUNDS))
+        wins += me > com
+    return wins
+
+
+def timed(label, games, fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:26s} {games:>11,} games {elapsed * 1000:9.1f} ms  {games / elapsed:14,.0f} games/s")
+
+
+def main():
+    timed("randint loop", 100_000, randint_loop, 100_000)
+    timed("vectorized", 10_000_000, simulate_dice_game, 10_000_000, ROUNDS)
+    workers = os.cpu_count() or 1
+    if workers > 1:
+        timed(f"vectorized, {workers} workers", 10_000_000, lambda: simulate_dice_game(
+            10_000_000, ROUNDS, workers=workers))
+
+
+if __name__ == "__main__":
+    main()
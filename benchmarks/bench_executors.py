@@ -0,0 +1,68 @@
+"""Executor backend matrix: throughput and per-task latency of
+count_word_batch on each available backend (see executors) across payload
+sizes, plus the inline baseline. Under the GIL threads cannot beat inline;
+on a free-threaded build they should scale without the process pool's
+pickling and IPC. Pass a worker count (default: CPU count)."""
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from executors import available_backends, choose_backend, gil_enabled, make_executor  # noqa: E402
+from py_utils import count_word_batch  # noqa: E402
+
+TEXT = "the robot saw another robot near the robots' door. "
+# (texts per task, characters per text)
+PAYLOADS = ((16, 64), (256, 256), (256, 4096), (64, 65536))
+TASKS = 64
+
+
+def measure(pool, payload):
+    texts = [(TEXT * (payload[1] // len(TEXT) + 1))[:payload[1]]] * payload[0]
+    # latency: one task at a time, round trip included
+    latencies = []
+    for _ in range(8):
+        start = time.perf_counter()
+        pool.submit(count_word_batch, texts, "robot").result()
+        latencies.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    futures = [pool.submit(count_word_batch, texts, "robot") for _ in range(TASKS)]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - start
+    return TASKS / elapsed, TASKS * payload[0] * payload[1] / elapsed / 1e6, statistics.median(latencies)
+
+
+class Inline:
+    """Runs each task in the caller: the no-executor baseline."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    print(f"Python {sys.version.split()[0]}, GIL {'on' if gil_enabled() else 'off'}, "
+          f"{workers} workers, auto -> {choose_backend('auto')}")
+    backends = [("inline", None)] + [(name, name) for name in available_backends()]
+    for name, backend in backends:
+        pool = Inline() if backend is None else make_executor(backend, workers)
+        try:
+            measure(pool, PAYLOADS[0])  # warm up workers
+            for payload in PAYLOADS:
+                tasks, mb, latency = measure(pool, payload)
+                print(f"{name:15s} {payload[0]:4d} x {payload[1]:6d} chars  {tasks:9,.0f} tasks/s  "
+                      f"{mb:8.1f} MB/s  p50 {latency * 1e3:7.3f} ms")
+        finally:
+            if backend is not None:
+                pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
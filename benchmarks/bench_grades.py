@@ -0,0 +1,58 @@
+"""Grading 1M scores: if/elif chain vs grade_scores (bisect and NumPy) and
+the CSV batch path used by POST /grades."""
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi_app import _grade_csv_batch  # noqa: E402
+from py_utils import grade_scores  # noqa: E402
+
+N = 1_000_000
+
+
+def if_chain(scores):
+    out = []
+    for score in scores:
+        if score > 95:
+            out.append("A+")
+        elif score > 90:
+            out.append("A")
+        elif score > 85:
+            out.append("B+")
+        elif score > 80:
+            out.append("B")
+        elif score > 75:
+            out.append("C+")
+        elif score > 70:
+            out.append("C")
+        elif score >= 0:
+            out.append("D")
+        else:
+            out.append(None)
+    return out
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:22s} {elapsed * 1000:8.1f} ms  {N / elapsed:12,.0f} rows/s")
+
+
+def main():
+    scores = [random.randint(0, 100) for _ in range(N)]
+    array = np.array(scores)
+    lines = [f"s{i},{s}".encode() for i, s in enumerate(scores)]
+    timed("if/elif chain", if_chain, scores)
+    timed("grade_scores (list)", grade_scores, scores)
+    timed("grade_scores (numpy)", grade_scores, array)
+    timed("CSV batches", lambda: [_grade_csv_batch(lines[i:i + 10_000], 1) for i in range(0, N, 10_000)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Match a draw against 10M stored tickets: memory-mapped masks with AND +
+popcount (TicketStore.match) versus np.isin over the raw (n, 6) numbers.
+The store file goes to a temporary directory; pass a count to change N."""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from lotto_tickets import TicketStore  # noqa: E402
+from py_utils import generate_lotto_array  # noqa: E402
+
+DRAW = [3, 11, 19, 27, 38, 42]
+
+
+def timed(label, fn, *args, **kwargs):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:28s} {best * 1000:9.1f} ms")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    tickets = generate_lotto_array(n, seed=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tickets.u64")
+        store = TicketStore(path)
+        start = time.perf_counter()
+        store.append(tickets)
+        print(f"{n:,} tickets, {os.path.getsize(path) / 1e6:.0f} MB, "
+              f"stored in {time.perf_counter() - start:.2f} s")
+        result = timed("match (cold open)", TicketStore(path).match, DRAW, bonus=7)
+        timed("match (mapped)", store.match, DRAW, bonus=7)
+        timed("np.isin over numbers", lambda: np.bincount(np.isin(tickets, DRAW).sum(axis=1), minlength=7))
+        print(result["tiers"])
+
+
+if __name__ == "__main__":
+    main()
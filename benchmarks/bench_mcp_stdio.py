@@ -0,0 +1,60 @@
+"""Stdio harness for mcp_server: time to first byte and sustained throughput.
+
+Starts ``python -m mcp_server`` as a subprocess, calls each batch tool with
+a progress token and reports when the first message arrived, how many
+progress/partial/heartbeat messages were seen and items per second.
+"""
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CALLS = [
+    ("generate_lotto_batch", {"n": 200_000}),
+    ("generate_password_batch", {"websites": ["http://www.google.com"] * 200_000}),
+    ("count_word_batch", {"texts": ["robot robot robot"] * 200_000, "word": "robot"}),
+]
+
+
+def main():
+    proc = subprocess.Popen([sys.executable, "-m", "mcp_server", "--heartbeat", "0.5"], cwd=ROOT,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+
+    def send(message):
+        proc.stdin.write(json.dumps(message) + "\n")
+        proc.stdin.flush()
+
+    send({"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {}})
+    json.loads(proc.stdout.readline())
+    send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    for i, (name, args) in enumerate(CALLS, start=1):
+        start = time.perf_counter()
+        send({"jsonrpc": "2.0", "id": i, "method": "tools/call",
+              "params": {"name": name, "arguments": args, "_meta": {"progressToken": i}}})
+        first = None
+        kinds = {"progress": 0, "partial_result": 0, "heartbeat": 0}
+        while True:
+            msg = json.loads(proc.stdout.readline())
+            if first is None:
+                first = time.perf_counter() - start
+            if msg.get("id") == i:
+                break
+            if msg["method"] == "notifications/progress":
+                kinds["progress"] += 1
+            else:
+                kinds[msg["params"]["logger"]] += 1
+        elapsed = time.perf_counter() - start
+        items = len(json.loads(msg["result"]["content"][0]["text"]))
+        print(f"{name:24s} ttfb {first * 1000:7.1f} ms  total {elapsed:6.2f} s  "
+              f"{items / elapsed:10,.0f} items/s  {kinds}")
+
+    proc.stdin.close()
+    proc.wait()
+
+
+if __name__ == "__main__":
+    main()
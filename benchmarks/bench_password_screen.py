@@ -0,0 +1,40 @@
+"""Build a Bloom filter from 1M synthetic wordlist entries, then time
+single lookups on the memory-mapped file and report the false-positive
+rate. Pass an entry count to change N."""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from password_screen import PasswordFilter, build  # noqa: E402
+from py_utils import generate_password  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    words = (f"{i:x}pass{i % 977}".encode() for i in range(n))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "words.bloom")
+        start = time.perf_counter()
+        build(words, path, n)
+        print(f"built {n:,} entries in {time.perf_counter() - start:.2f} s, "
+              f"{os.path.getsize(path) / 1e6:.1f} MB")
+        screen = PasswordFilter(path)
+        candidates = [generate_password(f"site{i}.com") for i in range(100_000)]
+        start = time.perf_counter()
+        for pw in candidates:
+            pw in screen
+        print(f"lookup (generated passwords)   {(time.perf_counter() - start) / len(candidates) * 1e6:6.2f} us")
+        start = time.perf_counter()
+        screen.contains_many(candidates)
+        print(f"contains_many, per password    {(time.perf_counter() - start) / len(candidates) * 1e6:6.2f} us")
+        info = screen.report()
+        print(f"fp rate: expected {info['expected_fp_rate']:.4%}, measured {info['measured_fp_rate']:.4%}")
+        screen.close()
+
+
+if __name__ == "__main__":
+    main()
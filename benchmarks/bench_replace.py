@@ -0,0 +1,48 @@
+"""replace_words against chained str.replace with 10, 100 and 1000 terms.
+
+Chained replace can rewrite the output of an earlier replacement; the
+single-pass version cannot, so the outputs are compared only for speed.
+"""
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from py_utils import replace_words  # noqa: E402
+
+
+def chained(text, mapping):
+    for old, new in mapping.items():
+        text = text.replace(old, new)
+    return text
+
+
+def best_of(fn, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    rng = random.Random(0)
+    vocab = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+             for _ in range(5000)]
+    text = " ".join(rng.choice(vocab) for _ in range(200_000))
+    print(f"text: {len(text) / 2**20:.1f} MiB")
+    for terms in (10, 100, 1000):
+        mapping = {w: w.upper() for w in rng.sample(vocab, terms)}
+        replace_words("warm up", mapping)
+        t_chain = best_of(chained, text, mapping)
+        t_single = best_of(replace_words, text, mapping)
+        print(f"{terms:5d} terms  chained {t_chain * 1000:8.1f} ms  single pass {t_single * 1000:8.1f} ms  "
+              f"x{t_chain / t_single:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
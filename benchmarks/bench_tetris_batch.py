@@ -0,0 +1,31 @@
+"""Throughput of BatchTetris (total placements per second) by batch size."""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tetris_batch import BatchTetris  # noqa: E402
+
+
+def run(batch_size: int, steps: int = 200) -> float:
+    sim = BatchTetris(batch_size, seed=0)
+    rng = np.random.default_rng(0)
+    rotations = rng.integers(0, 4, size=(steps, batch_size))
+    columns = rng.integers(0, 8, size=(steps, batch_size))
+    start = time.perf_counter()
+    for i in range(steps):
+        sim.step(rotations[i], columns[i])
+        sim.reset(sim.game_over)
+    return batch_size * steps / (time.perf_counter() - start)
+
+
+def main():
+    for batch_size in (1, 16, 256, 4096):
+        print(f"B={batch_size:5d}  {run(batch_size):12,.0f} steps/s")
+
+
+if __name__ == "__main__":
+    main()
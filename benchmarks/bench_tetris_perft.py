@@ -0,0 +1,36 @@
+"""Perft nodes per second on the canonical boards: plain search per node
+versus the memoised final_placements, plus the transposition-merging
+perft_levels (from a cold cache). Pass a depth to change it (default 2)."""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tetris_bot import final_placements  # noqa: E402
+from tetris_perft import BOARDS, perft, perft_levels  # noqa: E402
+
+PIECES = "TIOLJSZ"
+
+
+def rate(fn, *args, **kwargs):
+    start = time.perf_counter()
+    nodes = fn(*args, **kwargs)
+    return nodes, nodes / (time.perf_counter() - start)
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    for name, rows in BOARDS.items():
+        final_placements.cache_clear()
+        nodes, search_rate = rate(perft, rows, PIECES, depth)
+        _, cold_rate = rate(perft, rows, PIECES, depth, cached=True)
+        _, warm_rate = rate(perft, rows, PIECES, depth, cached=True)
+        final_placements.cache_clear()
+        _, levels_rate = rate(lambda: perft_levels(rows, PIECES, depth)[-1].nodes)
+        print(f"{name:8s} perft({depth}) = {nodes:8,}  search {search_rate:10,.0f}  "
+              f"cached cold {cold_rate:10,.0f}  warm {warm_rate:12,.0f}  levels {levels_rate:10,.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Tracing overhead on a small /count endpoint: no tracer, then sampling at
+0 %, 1 % and 100 %, with in-memory and JSON lines exporters. Requests are
+driven straight through ASGI so the numbers exclude any HTTP client; each
+line is the best of ``REPEAT`` runs."""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from py_utils import count_word  # noqa: E402
+from tracing import JsonlExporter, TracedJSONResponse, TracedRoute, Tracer, install, span  # noqa: E402
+
+REQUESTS = 2_000
+REPEAT = 5
+BODY = json.dumps({"text": "the robot and the robotics robot " * 20, "word": "robot"}).encode()
+
+
+class CountReq(BaseModel):
+    text: str
+    word: str
+
+
+def build(tracer=None, traced=True):
+    app = FastAPI(default_response_class=TracedJSONResponse) if traced else FastAPI()
+    if traced:
+        app.router.route_class = TracedRoute
+
+    @app.post("/count")
+    def count(req: CountReq):
+        with span("py_utils.count_word"):
+            return {"count": count_word(req.text, req.word)}
+
+    if tracer is not None:
+        install(app, tracer)
+    return app
+
+
+async def drive(app, n):
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+             "method": "POST", "scheme": "http", "path": "/count", "raw_path": b"/count",
+             "query_string": b"", "root_path": "", "client": ("127.0.0.1", 1), "server": ("bench", 80),
+             "headers": [(b"content-type", b"application/json"),
+                         (b"content-length", str(len(BODY)).encode())]}
+
+    async def send(message):
+        pass
+
+    for _ in range(n):
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": BODY, "more_body": False}
+
+        await app(scope, receive, send)
+
+
+def timed(label, app, baseline=None):
+    asyncio.run(drive(app, 200))  # warm up
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        asyncio.run(drive(app, REQUESTS))
+        best = min(best, time.perf_counter() - start)
+    per = best / REQUESTS * 1e6
+    ratio = f"  {per / baseline:5.2f}x" if baseline else ""
+    print(f"{label:28s} {per:8.1f} us/request{ratio}")
+    return per
+
+
+def main():
+    base = timed("plain FastAPI", build(traced=False))
+    timed("traced routes, no tracer", build(), base)
+    for rate in (0.0, 0.01, 1.0):
+        timed(f"ring buffer {rate:4.0%}", build(Tracer(rate)), base)
+    with tempfile.TemporaryDirectory() as tmp:
+        exporter = JsonlExporter(os.path.join(tmp, "traces.jsonl"))
+        timed("jsonl 100%", build(Tracer(1.0, exporter)), base)
+        exporter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Payload size and encode/decode time of JSON, MessagePack and Arrow IPC for
+the batch responses: 1M lotto draws (uint8, 1M x 6) and 1M per-text counts
+(int64, and the uint8 /count/batch sends when counts are small). JSON is
+shown twice: from Python lists (what the endpoints used to return) and from
+the NumPy arrays. Formats whose package is missing are skipped."""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from py_utils import generate_lotto_array  # noqa: E402
+from wire_formats import ARROW, JSON, MSGPACK, available, decode, encode  # noqa: E402
+
+N = 1_000_000
+
+
+def best(fn, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def row(label, content, media_type):
+    body, enc = best(encode, content, media_type)
+    _, dec = best(decode, body, media_type)
+    print(f"{label:22s} {len(body) / 1e6:9.2f} MB {enc * 1000:9.1f} ms {dec * 1000:9.1f} ms")
+
+
+def main():
+    payloads = {
+        "lotto 1M x 6": {"count": 6, "numbers": generate_lotto_array(N, seed=0)},
+        "counts 1M": {"counts": np.random.default_rng(0).integers(0, 50, N, dtype=np.int64)},
+        "counts 1M (uint8)": {"counts": np.random.default_rng(0).integers(0, 50, N, dtype=np.uint8)},
+    }
+    print(f"{'payload / format':22s} {'size':>12s} {'encode':>12s} {'decode':>12s}")
+    for name, content in payloads.items():
+        print(name)
+        as_lists = {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in content.items()}
+        row("  json (lists)", as_lists, JSON)
+        row("  json (arrays)", content, JSON)
+        for media_type, label in ((MSGPACK, "msgpack"), (ARROW, "arrow")):
+            if media_type in available():
+                row(f"  {label}", content, media_type)
+            else:
+                print(f"  {label:20s} not installed")
+
+
+if __name__ == "__main__":
+    main()
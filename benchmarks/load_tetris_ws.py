@@ -0,0 +1,89 @@
+"""Load generator for the Tetris WebSocket endpoint.
+
+Opens many simulated clients that press a random key every tick and checks
+how many concurrent games one uvicorn worker keeps at full tick rate. A
+session keeps up when the server tick counter it observes advances at
+least 95% as fast as ``TICK_RATE``; the server skips ticks when it falls
+behind.
+
+    python benchmarks/load_tetris_ws.py                  # starts its own worker
+    python benchmarks/load_tetris_ws.py --url ws://host:8000/tetris/ws
+"""
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import websockets
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from tetris_engine import ACTIONS  # noqa: E402
+from tetris_server import FRAME_HEADER, TICK_RATE  # noqa: E402
+
+# no hard drops, so a game does not end during the measurement
+MOVES = bytes(ACTIONS.index(a) for a in ("left", "right", "rotate_cw", "rotate_ccw"))
+
+
+async def client(url: str, seed: int, duration: float, stats: list) -> None:
+    rng = random.Random(seed)
+    async with websockets.connect(f"{url}?seed={seed}") as ws:
+        first = FRAME_HEADER.unpack_from(await ws.recv())[0]
+        start = time.perf_counter()
+        last = first
+        frames = 0
+        while time.perf_counter() - start < duration:
+            await ws.send(bytes([rng.choice(MOVES)]))
+            try:
+                data = await asyncio.wait_for(ws.recv(), 1.0 / TICK_RATE)
+            except asyncio.TimeoutError:
+                continue
+            last = FRAME_HEADER.unpack_from(data)[0]
+            frames += 1
+        stats.append(((last - first) / (time.perf_counter() - start), frames))
+
+
+async def run(url: str, sessions: int, duration: float):
+    stats: list = []
+    await asyncio.gather(*(client(url, i, duration, stats) for i in range(sessions)),
+                         return_exceptions=True)
+    if not stats:
+        return 0.0, 0
+    return sum(s[0] for s in stats) / len(stats), len(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50, 100, 200, 400, 800])
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "fastapi_app:app",
+                                   "--port", "8765", "--log-level", "warning"], cwd=ROOT)
+        time.sleep(2.0)
+        url = "ws://127.0.0.1:8765/tetris/ws"
+    try:
+        best = 0
+        for n in args.sessions:
+            ticks, connected = asyncio.run(run(url, n, args.duration))
+            ok = connected == n and ticks >= 0.95 * TICK_RATE
+            print(f"{n:5d} sessions  {connected:5d} connected  {ticks:6.1f} ticks/s  {'ok' if ok else 'behind'}")
+            if not ok:
+                break
+            best = n
+        print(f"sustained: {best} concurrent games at {TICK_RATE} ticks/s")
+    finally:
+        if server is not None:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Aggregate chunked tool responses into one final result with bounded memory.
+
+Long-running tools (see ``getUnifiedDevices`` in
+``docs/ai_long_running_gpt.md``) answer with many sequential chunks marked
+``status: processing`` and a last one with a completion status; the final
+``full_output`` has to combine all of them. ``ChunkAggregator`` does that
+accumulation in code instead of in the prompt:
+
+* records are merged by key (later values win, nested objects are merged
+  like JSON merge patch) so repeated records collapse into one;
+* past ``max_records`` in memory, records are spilled to a temporary
+  SQLite file and merged there;
+* the consolidated result, in first-seen order, is only produced after
+  the completion chunk arrives.
+
+    result = await aggregate(stream, key="deviceId", fmt="markdown")
+"""
+import json
+import sqlite3
+import tempfile
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Sequence, Union
+
+DONE_STATUSES = ("completed", "complete", "done", "success")
+MAX_RECORDS = 50_000
+
+Key = Union[str, Sequence[str], Callable[[Dict[str, Any]], Any]]
+
+
+def merge_patch(target: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply ``patch`` onto ``target`` in place (RFC 7396, same as SQLite json_patch)."""
+    for k, v in patch.items():
+        if v is None:
+            target.pop(k, None)
+        elif isinstance(v, dict):
+            if not isinstance(target.get(k), dict):
+                target[k] = {}
+            merge_patch(target[k], v)
+        else:
+            target[k] = v
+    return target
+
+
+def _composable(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+    """Whether one merge patch can do ``first`` then ``second``.
+
+    It cannot when ``second`` patches an object into a member that
+    ``first`` set to a non-object: applied on their own, ``second`` would
+    merge into the stored object instead of starting from an empty one.
+    """
+    for k, v in second.items():
+        if isinstance(v, dict) and k in first:
+            if not isinstance(first[k], dict) or not _composable(first[k], v):
+                return False
+    return True
+
+
+def _compose(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold patch ``second`` into patch ``first`` in place, keeping its nulls."""
+    for k, v in second.items():
+        if isinstance(v, dict) and isinstance(first.get(k), dict):
+            _compose(first[k], v)
+        elif isinstance(v, dict):
+            first[k] = _compose({}, v)
+        else:
+            first[k] = v
+    return first
+
+
+def _key_func(key: Key) -> Callable[[Dict[str, Any]], str]:
+    if callable(key):
+        return lambda r: json.dumps(key(r))
+    if isinstance(key, str):
+        return lambda r: json.dumps(r.get(key))
+    return lambda r: json.dumps([r.get(k) for k in key])
+
+
+class ChunkAggregator:
+    """Accumulates the records of a chunk stream; see the module docstring."""
+
+    def __init__(self, key: Key, records_field: str = "data", status_field: str = "status",
+                 done_statuses: Sequence[str] = DONE_STATUSES, max_records: int = MAX_RECORDS):
+        self._key = _key_func(key)
+        self.records_field = records_field
+        self.status_field = status_field
+        self.done_statuses = set(done_statuses)
+        self.max_records = max_records
+        self.completed = False
+        self.chunks = 0
+        self.seen = 0
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._tmp = None
+
+    def add_chunk(self, chunk: Dict[str, Any]) -> bool:
+        """Take one chunk; returns True once the completion chunk was seen."""
+        if self.completed:
+            raise ValueError("chunk received after completion")
+        self.chunks += 1
+        records = chunk.get(self.records_field) or []
+        if isinstance(records, dict):
+            records = [records]
+        for record in records:
+            self.add(record)
+        if chunk.get(self.status_field) in self.done_statuses:
+            self.completed = True
+        return self.completed
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.seen += 1
+        key = self._key(record)
+        current = self._memory.get(key)
+        if self._db is None:
+            if current is None:
+                self._memory[key] = merge_patch({}, record)
+                if len(self._memory) > self.max_records:
+                    self._spill()
+            else:
+                merge_patch(current, record)
+            return
+        # once spilled, a key may already be on disk: pending patches keep
+        # their nulls so deletions still reach the stored record
+        if current is not None and not _composable(current, record):
+            # everything pending goes to disk, which keeps first-seen order
+            self._spill()
+            current = None
+        if current is None:
+            self._memory[key] = _compose({}, record)
+            if len(self._memory) > self.max_records:
+                self._spill()
+        else:
+            _compose(current, record)
+
+    def _spill(self) -> None:
+        if self._db is None:
+            self._tmp = tempfile.NamedTemporaryFile(suffix=".sqlite3")
+            self._db = sqlite3.connect(self._tmp.name)
+            self._db.execute("PRAGMA journal_mode=OFF")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute("CREATE TABLE records (key TEXT PRIMARY KEY, record TEXT NOT NULL)")
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO records (key, record) VALUES (?1, json_patch('{}', ?2)) "
+                "ON CONFLICT(key) DO UPDATE SET record = json_patch(record, ?2)",
+                ((k, json.dumps(v)) for k, v in self._memory.items()))
+        self._memory.clear()
+
+    @property
+    def spilled(self) -> bool:
+        return self._db is not None
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Merged records in first-seen order."""
+        if self._db is None:
+            yield from self._memory.values()
+            return
+        self._spill()
+        for (record,) in self._db.execute("SELECT record FROM records ORDER BY rowid"):
+            yield json.loads(record)
+
+    def result(self, fmt: str = "json") -> str:
+        """The consolidated output; only available after completion."""
+        return "".join(self.iter_result(fmt))
+
+    def iter_result(self, fmt: str = "json") -> Iterator[str]:
+        """Like ``result`` but in pieces, for writing large outputs to a file."""
+        if not self.completed:
+            raise ValueError("stream has not completed")
+        if fmt == "json":
+            return self._json()
+        if fmt == "markdown":
+            return self._markdown()
+        raise ValueError("fmt must be json or markdown")
+
+    def _json(self) -> Iterator[str]:
+        sep = "["
+        for record in self.records():
+            yield sep + json.dumps(record, ensure_ascii=False)
+            sep = ","
+        yield "[]" if sep == "[" else "]"
+
+    def _markdown(self) -> Iterator[str]:
+        columns: Dict[str, None] = {}
+        for record in self.records():
+            columns.update(dict.fromkeys(record))
+        header = list(columns)
+
+        def cell(value: Any) -> str:
+            text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+            return text.replace("|", "\\|").replace("\n", " ")
+
+        yield "| " + " | ".join(header) + " |\n|" + "---|" * len(header)
+        for record in self.records():
+            yield "\n| " + " | ".join(cell(record.get(c, "")) for c in header) + " |"
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._tmp.close()
+            self._db = self._tmp = None
+
+
+async def aggregate(chunks: AsyncIterator[Dict[str, Any]], key: Key, fmt: str = "json",
+                    **options: Any) -> str:
+    """Consume ``chunks`` until the completion chunk and return the final output."""
+    aggregator = ChunkAggregator(key, **options)
+    try:
+        async for chunk in chunks:
+            if aggregator.add_chunk(chunk):
+                return aggregator.result(fmt)
+        raise ValueError("stream ended before completion")
+    finally:
+        aggregator.close()
+
@@ -0,0 +1,263 @@
+"""Offline batch runner for the ``py_utils`` functions::
+
+    python -m cli password sites.txt > passwords.txt
+    python -m cli count --word error --jobs 8 logs.jsonl > counts.jsonl
+    python -m cli lotto --n 1000000 --count 6 > draws.txt
+    python -m cli topk --k 100 --ngram 2 --jobs 8 app.log > top.jsonl
+
+Input is read from a file (or stdin when omitted) one record per line,
+in chunks of ``--batch`` lines, so memory stays flat for multi-GB files.
+A record is either a plain line or a JSON object:
+
+* ``password``: the website, or ``{"website": ...}``;
+* ``count``: the text, or ``{"text": ..., "word": ...}`` (``word`` falls
+  back to ``--word``);
+* ``lotto``: empty, a count, or ``{"count": ...}``; ``--n`` generates
+  records instead of reading them;
+* ``topk``: the text, or ``{"text": ...}``; the output is the ``--k``
+  most frequent terms (see ``topk.TopK``) once the input ends.
+
+Plain lines produce plain output lines; JSON records come back as the
+same object with the result added. Records that fail produce an empty
+line (or an ``error`` field) and are reported on stderr with their line
+number. With ``--jobs N`` chunks are processed by N workers (processes, or
+threads/subinterpreters where those run in parallel; see ``executors`` and
+``--backend``) and written back in input order. Throughput goes to stderr once a second.
+"""
+import argparse
+import itertools
+import json
+import sys
+import time
+from collections import Counter, deque
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from executors import AUTO, PROCESS, SUBINTERPRETER, THREAD, make_executor
+from py_utils import COUNT_MODES, count_word, generate_lotto, generate_password
+from topk import DELTA, EPSILON, TopK, terms
+
+BATCH = 10_000
+BUFFER = 1 << 20
+
+# task -> (JSON field of the input, JSON field of the result)
+FIELDS = {
+    "password": ("website", "password"),
+    "count": ("text", "count"),
+    "lotto": ("count", "numbers"),
+}
+
+
+def _apply(task: str, value: Any, record: Optional[Dict[str, Any]], options: Dict[str, Any]) -> Any:
+    if task == "password":
+        return generate_password(value)
+    if task == "count":
+        word = (record or {}).get("word", options.get("word"))
+        if not word:
+            raise ValueError("word required (record field or --word)")
+        return count_word(value, word, options.get("mode", "exact"))
+    count = int(value) if value not in (None, "") else options.get("count", 6)
+    return generate_lotto(count)
+
+
+def process_chunk(task: str, lines: List[bytes], options: Dict[str, Any],
+                  first_line: int = 1) -> Tuple[bytes, List[str]]:
+    """Run ``task`` over one chunk of raw input lines.
+
+    Returns the encoded output for the chunk and the error messages.
+    """
+    in_field, out_field = FIELDS[task]
+    out: List[str] = []
+    errors: List[str] = []
+    for lineno, raw in enumerate(lines, first_line):
+        line = raw.decode("utf-8", "replace").rstrip("\r\n")
+        record: Optional[Dict[str, Any]] = None
+        try:
+            if line.lstrip().startswith("{"):
+                record = json.loads(line)
+                value = record.get(in_field)
+            else:
+                value = line
+            result = _apply(task, value, record, options)
+        except Exception as e:
+            errors.append(f"line {lineno}: {e}")
+            if record is None:
+                out.append("")
+            else:
+                record["error"] = str(e)
+                out.append(json.dumps(record, ensure_ascii=False))
+            continue
+        if record is not None:
+            record[out_field] = result
+            out.append(json.dumps(record, ensure_ascii=False))
+        elif isinstance(result, list):
+            out.append(" ".join(map(str, result)))
+        else:
+            out.append(str(result))
+    return ("\n".join(out) + "\n").encode() if out else b"", errors
+
+
+def _chunks(lines: Iterable[bytes], size: int) -> Iterator[List[bytes]]:
+    it = iter(lines)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _Meter:
+    """Records/sec on stderr, at most once per ``interval`` seconds."""
+
+    def __init__(self, enabled: bool, interval: float = 1.0):
+        self.enabled = enabled
+        self.interval = interval
+        self.start = self.last = time.perf_counter()
+        self.records = 0
+        self.bytes = 0
+        self.errors = 0
+
+    def update(self, records: int, size: int, errors: int) -> None:
+        self.records += records
+        self.bytes += size
+        self.errors += errors
+        now = time.perf_counter()
+        if self.enabled and now - self.last >= self.interval:
+            self.last = now
+            self._report(now, "\r")
+
+    def _report(self, now: float, end: str) -> None:
+        elapsed = max(now - self.start, 1e-9)
+        sys.stderr.write(f"{end}{self.records:,} records  {self.records / elapsed:,.0f} rec/s  "
+                         f"{self.bytes / elapsed / 1e6:,.1f} MB/s  {self.errors:,} errors")
+        sys.stderr.flush()
+
+    def done(self) -> None:
+        if self.enabled:
+            self._report(time.perf_counter(), "\r")
+            sys.stderr.write("\n")
+
+
+def _map_chunks(fn, chunks: Iterable[List[bytes]], jobs: int, *args: Any, backend: Optional[str] = None
+                ) -> Iterator[Tuple[List[bytes], Any]]:
+    """``(chunk, fn(chunk, first_line, *args))`` in input order, in ``jobs`` workers if > 1."""
+    first_line = 1
+    if jobs <= 1:
+        for chunk in chunks:
+            yield chunk, fn(chunk, first_line, *args)
+            first_line += len(chunk)
+        return
+    with make_executor(backend, jobs, needs=("cli",)) as pool:
+        # bounded window of chunks in flight, drained in input order
+        pending: deque = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(fn, chunk, first_line, *args)))
+            first_line += len(chunk)
+            if len(pending) >= 2 * jobs:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+
+def _process(chunk: List[bytes], first_line: int, task: str, options: Dict[str, Any]):
+    return process_chunk(task, chunk, options, first_line)
+
+
+def run(task: str, lines: Iterable[bytes], out: BinaryIO, options: Dict[str, Any],
+        jobs: int = 1, batch: int = BATCH, progress: bool = True, backend: Optional[str] = None
+        ) -> Dict[str, int]:
+    """Stream ``lines`` through ``task`` into ``out``; returns record/error counts."""
+    meter = _Meter(progress)
+    for chunk, (data, errors) in _map_chunks(_process, _chunks(lines, batch), jobs, task, options,
+                                                 backend=backend):
+        out.write(data)
+        for message in errors:
+            sys.stderr.write(f"{message}\n")
+        meter.update(len(chunk), sum(map(len, chunk)), len(errors))
+    out.flush()
+    meter.done()
+    return {"records": meter.records, "errors": meter.errors}
+
+
+def topk_chunk(chunk: List[bytes], first_line: int, options: Dict[str, Any]) -> Counter:
+    """Term counts of one chunk; JSON records contribute their ``text`` field."""
+    counts: Counter = Counter()
+    for raw in chunk:
+        line = raw.decode("utf-8", "replace")
+        if line.lstrip().startswith("{"):
+            try:
+                line = str(json.loads(line).get("text", ""))
+            except ValueError:
+                pass
+        counts.update(terms(line, options["ngram"], options["lower"]))
+    return counts
+
+
+def run_topk(lines: Iterable[bytes], out: BinaryIO, options: Dict[str, Any],
+             jobs: int = 1, batch: int = BATCH, progress: bool = True, backend: Optional[str] = None
+             ) -> Dict[str, int]:
+    """Top terms of ``lines`` as JSON lines; chunks are counted in parallel and merged."""
+    top = TopK(options["k"], options["ngram"], options["lower"], options["epsilon"],
+               options["delta"], method=options["method"])
+    meter = _Meter(progress)
+    for chunk, counts in _map_chunks(topk_chunk, _chunks(lines, batch), jobs, options, backend=backend):
+        top.add_counts(counts)
+        meter.update(len(chunk), sum(map(len, chunk)), 0)
+    for term, count, error in top.top():
+        out.write(json.dumps({"term": term, "count": count, "error": error},
+                             ensure_ascii=False).encode() + b"\n")
+    out.flush()
+    meter.done()
+    return {"records": meter.records, "errors": 0}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="cli", description="Batch-apply py_utils functions.")
+    parser.add_argument("task", choices=sorted(FIELDS) + ["topk"])
+    parser.add_argument("input", nargs="?", help="input file (default: stdin)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--word", help="word to count when records do not carry one")
+    parser.add_argument("--mode", choices=list(COUNT_MODES), default="exact", help="count mode")
+    parser.add_argument("--count", type=int, default=6, help="numbers per lotto draw")
+    parser.add_argument("--n", type=int, help="lotto: generate N draws instead of reading input")
+    parser.add_argument("--k", type=int, default=10, help="topk: number of terms")
+    parser.add_argument("--ngram", type=int, default=1, help="topk: words per term")
+    parser.add_argument("--case-sensitive", action="store_true", help="topk: keep case")
+    parser.add_argument("--epsilon", type=float, default=EPSILON, help="topk: sketch error bound")
+    parser.add_argument("--delta", type=float, default=DELTA, help="topk: sketch failure probability")
+    parser.add_argument("--method", choices=["auto", "exact", "sketch"], default="auto")
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--backend", choices=[AUTO, THREAD, SUBINTERPRETER, PROCESS], default=None,
+                        help="worker type for --jobs (default: $EXECUTOR_BACKEND, then auto)")
+    parser.add_argument("--batch", type=int, default=BATCH, help="lines per chunk")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no throughput report")
+    args = parser.parse_args(argv)
+    if args.n is not None and args.task != "lotto":
+        parser.error("--n only applies to lotto")
+
+    options = {"word": args.word, "mode": args.mode, "count": args.count, "k": args.k,
+               "ngram": args.ngram, "lower": not args.case_sensitive, "epsilon": args.epsilon,
+               "delta": args.delta, "method": args.method}
+    source = open(args.input, "rb", buffering=BUFFER) if args.input else None
+    out = open(args.output, "wb", buffering=BUFFER) if args.output else sys.stdout.buffer
+    try:
+        if args.n is not None:
+            lines: Iterable[bytes] = itertools.repeat(b"", args.n)
+        else:
+            lines = source if source is not None else sys.stdin.buffer
+        if args.task == "topk":
+            stats = run_topk(lines, out, options, args.jobs, args.batch, not args.quiet, args.backend)
+        else:
+            stats = run(args.task, lines, out, options, args.jobs, args.batch, not args.quiet,
+                        args.backend)
+    finally:
+        if source is not None:
+            source.close()
+        if out is not sys.stdout.buffer:
+            out.close()
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,13 @@
+import os
+import sys
 import pygame
 import random
 import numpy as np
 
+# the replay recorder lives next to this folder (tetris_replay.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tetris_replay import Recorder
+
 width = 780
 height = 610
 fps = 1000
@@ -56,6 +62,8 @@ class inputs:
 class field:
     matrix = np.zeros((40, 10), int)
     testMatrix = np.zeros((40, 10), int)
+    # row of the highest locked cell per column (40 = empty), refreshed on lock
+    heights = np.full(10, 40)
     def __init__(self):
         self.clearCnt = 0
         self.tspin = False
@@ -68,6 +76,9 @@ class field:
                 self.testMatrix[:20+i+1] = np.roll(self.testMatrix[:20+i+1], 1, axis=0)
                 self.clearCnt+=1
                 nowMino.drawMino()
+    def updateHeights(self):
+        filled = field.testMatrix != 0
+        field.heights = np.where(filled.any(axis=0), filled.argmax(axis=0), 40)
 class mino:
     I = np.array([[0, 1], [1, 1], [2, 1], [3, 1], [1, 0], [3, 19]])
     O = np.array([[0, 0], [0, 1], [1, 0], [1, 1], [2, 0], [4, 19]])
@@ -97,6 +108,7 @@ class mino:
         self.data = newMino.copy()
         self.testdata = self.data.copy()
         self.ghost = self.data.copy()
+        self.ghostKey = None
     def __del__(self):
         if self.data[4, 1] != 0:
             for i in range(self.data[4, 1]):
@@ -150,24 +162,45 @@ class mino:
         else:
             hold, self.data = self.data.copy(), hold.copy()
     def drawGhost(self):
-        self.testdata = self.data.copy()
-        while(self.isBlockedByMovement(0, 1)):
-            self.moveMino(0, 1)
+        # only recompute after the piece moved, rotated or was swapped by hold
+        key = (self.data[4, 0], self.data[4, 1], self.data[5, 0], self.data[5, 1])
+        if key == self.ghostKey:
+            return
+        self.ghostKey = key
+        xs = self.data[:4, 0] + self.data[5, 0]
+        ys = self.data[:4, 1] + self.data[5, 1]
+        tops = field.heights[xs]
         self.ghost = self.data.copy()
-        self.data = self.testdata.copy()
+        if np.all(ys < tops):
+            self.ghost[5, 1] += np.min(tops - ys) - 1
+        else:
+            # tucked under an overhang: step down like before
+            self.testdata = self.data.copy()
+            while(self.isBlockedByMovement(0, 1)):
+                self.moveMino(0, 1)
+            self.ghost = self.data.copy()
+            self.data = self.testdata.copy()
     def hardDrop(self):
+        self.drawGhost()
         self.eraseMino()
         self.data = self.ghost.copy()
         self.drawMino()
 
 class bag:
-    def __init__(self):
-        self.nowQueue = random.sample(mino.minoData, 7) + random.sample(mino.minoData, 7)
+    # same seed -> same pieces as tetris_engine.Bag, so games can be replayed
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.nowQueue = self.rng.sample(mino.minoData, 7) + self.rng.sample(mino.minoData, 7)
     def generateBag(self):
         if len(self.nowQueue) < 10:
-            self.nowQueue += random.sample(mino.minoData, 7)
+            self.nowQueue += self.rng.sample(mino.minoData, 7)
 f = field()
-nowBag = bag()
+seed = random.randrange(2**32)
+nowBag = bag(seed)
+# every input that changes the game is logged; the replay is saved on quit
+recorder = Recorder(seed)
+def record(action):
+    recorder.apply(action, pygame.time.get_ticks())
 nowMino = mino(nowBag.nowQueue.pop(0))
 nowMino.drawMino()
 while run:
@@ -180,34 +213,42 @@ while run:
             else:
                 GameStart = True
             if event.key == pygame.K_SPACE:
+                record("hard_drop")
                 nowMino.hardDrop()
                 nowMino = mino(nowBag.nowQueue.pop(0))
                 nowBag.generateBag()
                 field.testMatrix = field.matrix.copy()
                 nowMino.drawMino()
                 f.clearLines()
+                f.updateHeights()
                 inputs.hardDrop = True
                 inputs.hold = False
             if event.key == pygame.K_UP and nowMino.isSRS(1):
+                record("rotate_cw")
                 nowMino.rotateMino(1)
                 nowMino.drawMino()
             if event.key == pygame.K_z and nowMino.isSRS(-1):
+                record("rotate_ccw")
                 nowMino.rotateMino(-1)
                 nowMino.drawMino()
             if event.key == pygame.K_x and nowMino.isSRS(-2):
+                record("rotate_180")
                 nowMino.rotateMino(-2)
                 nowMino.drawMino()
             if event.key == pygame.K_LSHIFT and inputs.hold == False:
+                record("hold")
                 nowMino.eraseMino()
                 nowMino.holdMino()
                 nowMino.drawMino()
                 inputs.hold = True
             if event.key == pygame.K_LEFT and nowMino.isBlockedByMovement(-1, 0):
+                record("left")
                 nowMino.eraseMino()
                 nowMino.moveMino(-1, 0)
                 nowMino.drawMino()
                 inputs.moveLeft = True
             if event.key == pygame.K_RIGHT and nowMino.isBlockedByMovement(1, 0):
+                record("right")
                 nowMino.eraseMino()
                 nowMino.moveMino(1, 0)
                 nowMino.drawMino()
@@ -233,9 +274,11 @@ while run:
             if inputs.ARR_VALUE == 0:
                 nowMino.eraseMino()
                 while nowMino.isBlockedByMovement(-1, 0):
+                    record("left")
                     nowMino.moveMino(-1, 0)
                 nowMino.drawMino()
             elif inputs.L_ARR_CNT % inputs.ARR_VALUE == 0 and nowMino.isBlockedByMovement(-1, 0):
+                record("left")
                 nowMino.eraseMino()
                 nowMino.moveMino(-1, 0)
                 nowMino.drawMino()
@@ -246,9 +289,11 @@ while run:
             if inputs.ARR_VALUE == 0:
                 nowMino.eraseMino()
                 while nowMino.isBlockedByMovement(1, 0):
+                    record("right")
                     nowMino.moveMino(1, 0)
                 nowMino.drawMino()
             elif inputs.R_ARR_CNT % inputs.ARR_VALUE == 0 and nowMino.isBlockedByMovement(1, 0):
+                record("right")
                 nowMino.eraseMino()
                 nowMino.moveMino(1, 0)
                 nowMino.drawMino()
@@ -256,6 +301,7 @@ while run:
         inputs.R_DAS_CNT+=1
     if inputs.softDrop:
         if inputs.SD_ARR_CNT % inputs.SD_ARR_VALUE == 0 and nowMino.isBlockedByMovement(0, 1):
+            record("soft_drop")
             nowMino.eraseMino()
             nowMino.moveMino(0, 1)
             nowMino.drawMino()
@@ -285,3 +331,8 @@ while run:
     pygame.display.flip()
     clock.tick(fps)
 pygame.quit()
+if recorder.events:
+    replayPath = "tetris_%d.trp" % seed
+    with open(replayPath, "wb") as replayFile:
+        replayFile.write(recorder.dumps())
+    print("replay saved to " + replayPath + " (python -m tetris_replay verify " + replayPath + ")")
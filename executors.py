@@ -0,0 +1,105 @@
+"""Executor backends for the CPU-bound utilities, chosen for the running interpreter.
+
+Every backend is a ``concurrent.futures.Executor``, so callers only ever
+``submit``/``map``; what differs is the cost of handing work over:
+
+* ``thread``: no copies at all. On a free-threaded build (3.13t, where
+  ``sys._is_gil_enabled()`` is false) threads run Python code in
+  parallel; under the GIL they only help code that releases it.
+* ``subinterpreter``: one interpreter per worker, each with its own GIL
+  (``concurrent.futures.InterpreterPoolExecutor``, Python 3.14+).
+  Arguments are still pickled but stay in-process: no IPC, no fork.
+* ``process``: ``ProcessPoolExecutor``; works everywhere, pays pickling
+  and a pipe round trip per task.
+
+``choose_backend`` prefers them in that order when they actually run in
+parallel. Extension modules without per-interpreter GIL support (numpy,
+which ``py_utils`` imports) cannot load in a subinterpreter, so ``auto``
+only picks subinterpreters once the task modules (``needs``) import in
+one; otherwise it falls back to processes. ``$EXECUTOR_BACKEND`` overrides
+the choice. More backends can be added with ``register_backend``::
+
+    with make_executor(workers=8) as pool:
+        counts = list(pool.map(count_word_batch, chunks, repeat("error")))
+"""
+import importlib
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence
+
+try:
+    from concurrent.futures import InterpreterPoolExecutor
+except ImportError:  # before Python 3.14
+    InterpreterPoolExecutor = None
+
+THREAD, SUBINTERPRETER, PROCESS = "thread", "subinterpreter", "process"
+AUTO = "auto"
+# modules the utilities' tasks import in the worker
+NEEDS = ("py_utils",)
+
+# name -> (factory taking the worker count, availability check)
+_BACKENDS: Dict[str, tuple] = {
+    THREAD: (ThreadPoolExecutor, lambda: True),
+    SUBINTERPRETER: (lambda workers: InterpreterPoolExecutor(workers),
+                     lambda: InterpreterPoolExecutor is not None),
+    PROCESS: (ProcessPoolExecutor, lambda: True),
+}
+
+
+def register_backend(name: str, factory: Callable[[Optional[int]], Executor],
+                     available: Callable[[], bool] = lambda: True) -> None:
+    _BACKENDS[name] = (factory, available)
+
+
+def gil_enabled() -> bool:
+    is_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_enabled is None else is_enabled()
+
+
+def available_backends() -> List[str]:
+    return [name for name, (_, available) in _BACKENDS.items() if available()]
+
+
+def _import(name: str) -> bool:
+    importlib.import_module(name)
+    return True
+
+
+@lru_cache(maxsize=None)
+def imports_in_subinterpreter(name: str) -> bool:
+    """Whether module ``name`` loads in a subinterpreter with its own GIL."""
+    if not _BACKENDS[SUBINTERPRETER][1]():
+        return False
+    try:
+        with _BACKENDS[SUBINTERPRETER][0](1) as pool:
+            return pool.submit(_import, name).result()
+    except Exception:
+        return False
+
+
+def choose_backend(backend: Optional[str] = None, needs: Sequence[str] = NEEDS) -> str:
+    """Resolve ``backend`` (default ``$EXECUTOR_BACKEND``, then ``auto``) to a backend name.
+
+    ``auto`` only chooses subinterpreters when every module in ``needs``
+    imports in one.
+    """
+    backend = backend or os.environ.get("EXECUTOR_BACKEND") or AUTO
+    if backend != AUTO:
+        if backend not in _BACKENDS:
+            raise ValueError(f"unknown executor backend: {backend}")
+        if not _BACKENDS[backend][1]():
+            raise ValueError(f"executor backend not available here: {backend}")
+        return backend
+    if not gil_enabled():
+        return THREAD
+    if _BACKENDS[SUBINTERPRETER][1]() and all(imports_in_subinterpreter(name) for name in needs):
+        return SUBINTERPRETER
+    return PROCESS
+
+
+def make_executor(backend: Optional[str] = None, workers: Optional[int] = None,
+                  needs: Sequence[str] = NEEDS) -> Executor:
+    """A new executor with ``workers`` workers (default: CPU count) on the chosen backend."""
+    return _BACKENDS[choose_backend(backend, needs)][0](workers or os.cpu_count())
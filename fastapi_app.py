@@ -1,9 +1,63 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import csv
+import io
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request, WebSocket
 from pydantic import BaseModel
 
-from py_utils import generate_lotto, generate_password, count_word
+from compression import LEVEL, MAX_BODY, CompressionMiddleware
+from dice_sim import simulate_dice_game
+from jobs import DEFAULT_TTL, DONE, FAILED, JobQueue
+from lotto_history import DrawHistory
+from lotto_tickets import TicketStore
+from password_screen import PasswordFilter
+from profiling import install as install_profiling
+from py_utils import (
+    COUNT_MODES,
+    StreamReplacer,
+    count_word,
+    count_word_batch,
+    count_word_modes,
+    generate_lotto,
+    generate_lotto_array,
+    generate_lotto_batch,
+    generate_password,
+    generate_random_passwords,
+    grade_scores,
+    replace_words,
+)
+from streaming import UploadStreamingResponse, ndjson_response, sse_response
+from tetris_server import run_session
+from topk import DELTA, EPSILON, TopK
+from tracing import JsonlExporter, TracedJSONResponse, TracedRoute, Tracer, span
+from tracing import install as install_tracing
+from wire_formats import WireFormatMiddleware, WireResponse, WireRoute
+
+
+class ApiResponse(TracedJSONResponse, WireResponse):
+    """Negotiated JSON / MessagePack / Arrow, rendered inside a ``serialize`` span."""
+
+
+class ApiRoute(TracedRoute, WireRoute):
+    """Traced route accepting JSON, MessagePack and Arrow bodies."""
 
-app = FastAPI(title="WS_Python API", version="0.1")
+
+app = FastAPI(title="WS_Python API", version="0.1", default_response_class=ApiResponse)
+app.router.route_class = ApiRoute
+app.add_middleware(WireFormatMiddleware)
+app.add_middleware(CompressionMiddleware, max_body=int(os.environ.get("MAX_DECOMPRESSED_BODY", MAX_BODY)),
+                   level=int(os.environ.get("COMPRESSION_LEVEL", LEVEL)))
+# debug profiling routes exist only when a token is configured
+install_profiling(app, os.environ.get("PROFILING_TOKEN"))
+# spans are recorded only when a sample rate is configured; added last so
+# the server span also covers (de)compression
+if os.environ.get("TRACE_SAMPLE_RATE"):
+    install_tracing(app, Tracer(float(os.environ["TRACE_SAMPLE_RATE"]),
+                                JsonlExporter(os.environ["TRACE_FILE"]) if os.environ.get("TRACE_FILE") else None))
 
 
 @app.get("/")
@@ -16,31 +70,511 @@ def health():
     return {"status": "ok"}
 
 
+_history: Optional[DrawHistory] = None
+
+
+def get_history() -> DrawHistory:
+    """The draw history, opened on first use over ``$LOTTO_HISTORY``."""
+    global _history
+    if _history is None:
+        _history = DrawHistory(os.environ.get("LOTTO_HISTORY", "lotto_history.u64"))
+    return _history
+
+
 @app.get("/lotto")
-def lotto(count: int = 6):
+def lotto(count: int = 6, record: bool = True):
+    """A draw, appended to the draw history unless ``record=false``."""
     if count < 1 or count > 10:
         raise HTTPException(status_code=400, detail="count must be between 1 and 10")
-    return {"numbers": generate_lotto(count)}
+    numbers = generate_lotto(count)
+    if record:
+        return {"numbers": numbers, "draw": get_history().record(numbers)}
+    return {"numbers": numbers}
+
+
+class HistoryDrawReq(BaseModel):
+    numbers: List[int]
+
+
+@app.post("/lotto/history")
+def record_draw(req: HistoryDrawReq):
+    """Record a draw made elsewhere (e.g. an official result)."""
+    try:
+        return {"draw": get_history().record(req.numbers)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/lotto/history")
+def history_stats(pairs: int = 10):
+    """All-time counts, gaps and top pairs from the running aggregates."""
+    if not 0 <= pairs <= 1000:
+        raise HTTPException(status_code=400, detail="pairs must be between 0 and 1000")
+    history = get_history()
+    return {**history.stats(), "top_pairs": history.top_pairs(pairs)}
+
+
+@app.get("/lotto/history/window")
+def history_window(last: Optional[int] = None, pairs: int = 10):
+    """Counts and top pairs over the last ``last`` draws (at most the ring buffer size)."""
+    history = get_history()
+    if last is not None and not 1 <= last <= history.window:
+        raise HTTPException(status_code=400, detail=f"last must be between 1 and {history.window}")
+    if not 0 <= pairs <= 1000:
+        raise HTTPException(status_code=400, detail="pairs must be between 0 and 1000")
+    return {**history.window_stats(last), "top_pairs": history.top_pairs(pairs, last if last else history.window)}
+
+
+# draws per /lotto/batch request (6 MB as uint8, ~0.25 s)
+LOTTO_BATCH_MAX = 1_000_000
+
+
+@app.get("/lotto/batch")
+def lotto_batch(n: int = 1000, count: int = 6, seed: Optional[int] = None):
+    """``n`` draws as an ``(n, count)`` array; ask for MessagePack or Arrow to skip per-number JSON."""
+    if count < 1 or count > 10:
+        raise HTTPException(status_code=400, detail="count must be between 1 and 10")
+    if n < 0 or n > LOTTO_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"n must be between 0 and {LOTTO_BATCH_MAX}")
+    return ApiResponse({"count": count, "numbers": generate_lotto_array(n, count, seed=seed)})
+
+
+# tickets per POST /lotto/tickets; bulk loads go through TicketStore.append
+TICKETS_MAX = 1_000_000
+_tickets: Optional[TicketStore] = None
+
+
+def get_tickets() -> TicketStore:
+    """The ticket store, opened on first use over ``$LOTTO_TICKETS``."""
+    global _tickets
+    if _tickets is None:
+        _tickets = TicketStore(os.environ.get("LOTTO_TICKETS", "lotto_tickets.u64"))
+    return _tickets
+
+
+class TicketsReq(BaseModel):
+    tickets: List[List[int]]
+
+
+@app.post("/lotto/tickets")
+def add_tickets(req: TicketsReq):
+    if len(req.tickets) > TICKETS_MAX:
+        raise HTTPException(status_code=400, detail=f"at most {TICKETS_MAX} tickets per request")
+    if not req.tickets:
+        return {"first": len(get_tickets()), "count": 0}
+    try:
+        ids = get_tickets().append(req.tickets)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"first": ids.start, "count": len(ids)}
+
+
+class DrawReq(BaseModel):
+    numbers: List[int]
+    bonus: Optional[int] = None
+    winners: int = 100
+
+
+@app.post("/lotto/tickets/match")
+def match_tickets(req: DrawReq):
+    """How many numbers each stored ticket matches, grouped into prize tiers."""
+    if not 0 <= req.winners <= 10_000:
+        raise HTTPException(status_code=400, detail="winners must be between 0 and 10000")
+    try:
+        return get_tickets().match(req.numbers, req.bonus, req.winners)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 class PasswordReq(BaseModel):
     website: str
 
 
+# breached/dictionary passwords, memory-mapped once and shared by all requests
+_password_filter: Optional[PasswordFilter] = (
+    PasswordFilter(os.environ["PASSWORD_FILTER"]) if os.environ.get("PASSWORD_FILTER") else None)
+
+
 @app.post("/password")
 def password(req: PasswordReq):
+    """Generated password, rejected (409) when it is on the configured wordlist filter."""
     try:
-        pw = generate_password(req.website)
-        return {"password": pw}
+        with span("py_utils.generate_password"):
+            pw = generate_password(req.website)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if _password_filter is not None:
+        with span("password_screen.check"):
+            listed = pw in _password_filter
+        if listed:
+            raise HTTPException(status_code=409, detail="generated password is on a breached or dictionary list")
+    return {"password": pw}
+
+
+class RandomPasswordReq(BaseModel):
+    n: int = 1
+    length: int = 16
+    classes: List[str] = ["lower", "upper", "digits", "symbols"]
+    require_all: bool = True
+
+
+@app.post("/password/random")
+def random_passwords(req: RandomPasswordReq):
+    if req.n < 1 or req.n > 100_000:
+        raise HTTPException(status_code=400, detail="n must be between 1 and 100000")
+    if req.length > 1024:
+        raise HTTPException(status_code=400, detail="length must be <= 1024")
+    try:
+        return {"passwords": generate_random_passwords(req.n, req.length, req.classes, req.require_all)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 class CountReq(BaseModel):
     text: str
     word: str
+    mode: str = "exact"
+    modes: Optional[List[str]] = None
 
 
 @app.post("/count")
 def count(req: CountReq):
-    return {"count": count_word(req.text, req.word)}
+    """Count ``word`` in one ``mode``, or in each of ``modes`` (``{"counts": {...}}``)."""
+    try:
+        if req.modes is not None:
+            with span("py_utils.count_word_modes", modes=len(req.modes)):
+                return {"counts": count_word_modes(req.text, req.word, req.modes)}
+        with span("py_utils.count_word", mode=req.mode, text_length=len(req.text)):
+            return {"count": count_word(req.text, req.word, req.mode)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# one request rolls at most this many dice per player (under 2 s on one core)
+DICE_MAX_ROLLS = 100_000_000
+# bounds the highest total, which sizes the outcome histograms
+DICE_MAX_TOTAL = 1_000_000
+
+
+@app.get("/dice/simulate")
+def dice_simulate(games: int = 1_000_000, rounds: int = 1, dice: int = 1, sides: int = 6,
+                  seed: Optional[int] = None, workers: int = 0):
+    if games < 1 or rounds < 1 or dice < 1:
+        raise HTTPException(status_code=400, detail="games, rounds and dice must be >= 1")
+    if games * rounds * dice > DICE_MAX_ROLLS:
+        raise HTTPException(status_code=400, detail=f"games * rounds * dice must be <= {DICE_MAX_ROLLS}")
+    if rounds * dice * sides > DICE_MAX_TOTAL:
+        raise HTTPException(status_code=400, detail=f"rounds * dice * sides must be <= {DICE_MAX_TOTAL}")
+    workers = min(workers, os.cpu_count() or 1)
+    try:
+        return simulate_dice_game(games, rounds, dice, sides, seed, workers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.websocket("/tetris/ws")
+async def tetris_ws(websocket: WebSocket, seed: Optional[int] = None):
+    await run_session(websocket, seed)
+
+
+STREAM_CHUNK = 1000
+
+
+MIN_HEARTBEAT = 0.1
+
+
+def _check_heartbeat(heartbeat: float) -> None:
+    if not heartbeat >= MIN_HEARTBEAT:
+        raise HTTPException(status_code=400, detail=f"heartbeat must be >= {MIN_HEARTBEAT}")
+
+
+def _stream(source, request: Request, format: str, heartbeat: float):
+    _check_heartbeat(heartbeat)
+    if format == "sse":
+        return sse_response(source, request, heartbeat)
+    if format == "ndjson":
+        return ndjson_response(source, request, heartbeat)
+    raise HTTPException(status_code=400, detail="format must be sse or ndjson")
+
+
+@app.get("/lotto/stream")
+async def lotto_stream(request: Request, n: int = 1000, count: int = 6,
+                       format: str = "sse", heartbeat: float = 15.0):
+    if count < 1 or count > 10:
+        raise HTTPException(status_code=400, detail="count must be between 1 and 10")
+
+    async def draws():
+        for offset in range(0, n, STREAM_CHUNK):
+            yield {"offset": offset, "numbers": generate_lotto_batch(min(STREAM_CHUNK, n - offset), count)}
+            await asyncio.sleep(0)
+
+    return _stream(draws(), request, format, heartbeat)
+
+
+class CountBatchReq(BaseModel):
+    texts: List[str]
+    word: str
+    mode: str = "exact"
+
+
+@app.post("/count/batch")
+def count_batch(req: CountBatchReq):
+    """Counts of ``word`` in each text, as one integer array."""
+    if req.mode not in COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"unknown count mode: {req.mode}")
+    try:
+        with span("py_utils.count_word_batch", texts=len(req.texts)):
+            counts = count_word_batch(req.texts, req.word, req.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    counts = np.array(counts, dtype=np.int64)
+    # the smallest unsigned dtype that fits; binary formats carry the dtype
+    return ApiResponse({"counts": counts.astype(np.min_scalar_type(counts.max(initial=0)))})
+
+
+@app.post("/count/stream")
+async def count_stream(req: CountBatchReq, request: Request,
+                       format: str = "ndjson", heartbeat: float = 15.0):
+    if req.mode not in COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"unknown count mode: {req.mode}")
+
+    async def counts():
+        for offset in range(0, len(req.texts), STREAM_CHUNK):
+            part = req.texts[offset:offset + STREAM_CHUNK]
+            yield {"offset": offset, "counts": count_word_batch(part, req.word, req.mode)}
+            await asyncio.sleep(0)
+
+    return _stream(counts(), request, format, heartbeat)
+
+
+_jobs: Optional[JobQueue] = None
+
+
+def get_jobs() -> JobQueue:
+    """The job queue, created on first use over ``$JOBS_DB``."""
+    global _jobs
+    if _jobs is None:
+        _jobs = JobQueue(os.environ.get("JOBS_DB", "jobs.sqlite3"))
+    return _jobs
+
+
+class JobReq(BaseModel):
+    kind: str
+    params: Dict[str, Any]
+    ttl: float = DEFAULT_TTL
+
+
+@app.post("/jobs")
+def submit_job(req: JobReq):
+    try:
+        return {"id": get_jobs().submit(req.kind, req.params, req.ttl)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str, result: bool = True):
+    job = get_jobs().store.get(job_id, with_result=result)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}/stream")
+async def job_stream(job_id: str, request: Request, poll: float = 0.2, heartbeat: float = 15.0):
+    _check_heartbeat(heartbeat)
+    if not poll > 0:
+        raise HTTPException(status_code=400, detail="poll must be > 0")
+    store = get_jobs().store
+    if store.get(job_id, with_result=False) is None:
+        raise HTTPException(status_code=404, detail="job not found")
+
+    async def events():
+        seq = -1
+        sent = 0
+        while True:
+            job = store.get(job_id, with_result=False)
+            for seq, items in store.chunks(job_id, seq):
+                sent += len(items)
+                yield {"seq": seq, "progress": job["progress"], "total": job["total"], "items": items}
+            if job["status"] in (DONE, FAILED):
+                if job["status"] == DONE and sent < job["progress"]:
+                    # chunks were compacted before we read them: send the rest of the result
+                    result = store.get(job_id)["result"]
+                    yield {"seq": seq + 1, "progress": job["progress"], "total": job["total"],
+                           "items": result[sent:]}
+                yield {"status": job["status"], "progress": job["progress"], "error": job["error"]}
+                return
+            await asyncio.sleep(poll)
+
+    return sse_response(events(), request, heartbeat)
+
+
+class ReplaceReq(BaseModel):
+    text: str
+    mapping: Dict[str, str]
+
+
+@app.post("/replace")
+def replace(req: ReplaceReq):
+    try:
+        with span("py_utils.replace_words", terms=len(req.mapping)):
+            return {"text": replace_words(req.text, req.mapping)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _body_lines(request: Request):
+    """Non-empty lines of the request body, yielded while it is uploaded."""
+    buf = b""
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buf.strip():
+        yield buf
+
+
+async def _ndjson_lines(request: Request):
+    async for line in _body_lines(request):
+        yield json.loads(line)
+
+
+@app.post("/replace/stream")
+async def replace_stream(request: Request):
+    """NDJSON body: ``{"mapping": {...}}`` then ``{"text": "..."}`` lines.
+
+    The rewritten text streams back as ``text/plain`` while the body is
+    still being uploaded. A malformed text line ends the output with an
+    ``[error: ...]`` line, since the 200 status has already been sent.
+    """
+    lines = _ndjson_lines(request)
+    try:
+        mapping = (await lines.__anext__())["mapping"]
+        if not isinstance(mapping, dict) or not all(
+                isinstance(k, str) and isinstance(v, str) for k, v in mapping.items()):
+            raise ValueError("mapping must map strings to strings")
+        replacer = StreamReplacer(mapping)
+    except (StopAsyncIteration, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail='first line must be {"mapping": {"old": "new", ...}}')
+
+    async def output():
+        lineno = 1
+        try:
+            async for line in lines:
+                lineno += 1
+                text = line.get("text", "") if isinstance(line, dict) else None
+                if not isinstance(text, str):
+                    raise ValueError('expected {"text": "..."}')
+                out = replacer.feed(text)
+                if out:
+                    yield out
+        except ValueError as e:
+            yield replacer.close() + f"\n[error: line {lineno}: {e}]\n"
+            return
+        yield replacer.close()
+
+    return UploadStreamingResponse(output(), media_type="text/plain; charset=utf-8")
+
+
+GRADE_BATCH = 10_000
+
+
+def _grade_csv_batch(lines: List[bytes], col: int) -> str:
+    rows = list(csv.reader(line.decode("utf-8", "replace").rstrip("\r") for line in lines))
+    scores = []
+    for row in rows:
+        try:
+            scores.append(float(row[col]))
+        except (IndexError, ValueError):
+            scores.append(float("-inf"))
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for row, grade in zip(rows, grade_scores(scores)):
+        writer.writerow(row + [grade or ""])
+    return out.getvalue()
+
+
+@app.post("/grades")
+async def grades(request: Request, column: str = "score"):
+    """Grade scores from a JSON array or a CSV upload.
+
+    JSON (``[90, 85]`` or ``{"scores": [...]}``) returns ``{"grades": [...]}``.
+    A ``text/csv`` body needs a header row with ``column``; graded rows
+    stream back with an extra ``grade`` column while the upload continues.
+    Records must not contain quoted newlines.
+    """
+    if request.headers.get("content-type", "").startswith("application/json"):
+        body = await request.json()
+        scores = body.get("scores") if isinstance(body, dict) else body
+        if not isinstance(scores, list) or not all(isinstance(x, (int, float)) for x in scores):
+            raise HTTPException(status_code=400, detail="scores must be a list of numbers")
+        return {"grades": grade_scores(scores)}
+
+    lines = _body_lines(request)
+    try:
+        header_line = await lines.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=400, detail="empty CSV")
+    header = next(csv.reader([header_line.decode("utf-8", "replace").rstrip("\r")]))
+    if column not in header:
+        raise HTTPException(status_code=400, detail=f"column {column!r} not in CSV header")
+    col = header.index(column)
+
+    async def graded():
+        out = io.StringIO()
+        csv.writer(out, lineterminator="\n").writerow(header + ["grade"])
+        yield out.getvalue()
+        batch = []
+        async for line in lines:
+            batch.append(line)
+            if len(batch) >= GRADE_BATCH:
+                yield _grade_csv_batch(batch, col)
+                batch = []
+        if batch:
+            yield _grade_csv_batch(batch, col)
+
+    return UploadStreamingResponse(graded(), media_type="text/csv")
+
+
+TOPK_BATCH = 10_000
+
+
+@app.post("/topk")
+async def topk(request: Request, k: int = 10, ngram: int = 1, lower: bool = True,
+               epsilon: float = EPSILON, delta: float = DELTA, method: str = "auto",
+               snapshot: int = 0, heartbeat: float = 15.0):
+    """Most frequent terms of a text body, counted while it is uploaded.
+
+    The body is plain text (one record per line) or NDJSON with a ``text``
+    field per line. The response is NDJSON: a running top-k every
+    ``snapshot`` lines when set, then the final result with ``done: true``.
+    """
+    if not 1 <= k <= 10_000:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 10000")
+    _check_heartbeat(heartbeat)
+    try:
+        top = TopK(k, ngram, lower, epsilon, delta, method=method)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    ndjson = request.headers.get("content-type", "").startswith("application/x-ndjson")
+
+    async def results():
+        batch: List[str] = []
+        seen = 0
+        async for line in _body_lines(request):
+            text = line.decode("utf-8", "replace")
+            batch.append(str(json.loads(text).get("text", "")) if ndjson else text)
+            if len(batch) >= TOPK_BATCH or (snapshot and (seen + len(batch)) % snapshot == 0):
+                top.update_many(batch)
+                seen += len(batch)
+                batch = []
+                if snapshot and seen % snapshot == 0:
+                    yield {"lines": seen, **top.result()}
+                await asyncio.sleep(0)
+        top.update_many(batch)
+        yield {"lines": seen + len(batch), "done": True, **top.result()}
+
+    return ndjson_response(results(), request, heartbeat, upload=True)
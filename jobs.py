@@ -0,0 +1,273 @@
+"""Background jobs for work that outlasts a single HTTP request.
+
+``JobQueue.submit`` stores the job and returns its id at once; a local
+worker pool (see ``executors``) runs it. Jobs are generators that yield
+results chunk by chunk. Every chunk is appended to a SQLite store as soon
+as it exists, so clients can poll or stream progress, and when the job
+ends the chunks are compacted, in order, into one final result. Because
+the progress lives on disk, a queue started over the same file resumes
+interrupted jobs from their last stored chunk. A worker claims a job
+atomically with a lease that every stored chunk renews, so with several
+servers on one file a running job is only taken over once its lease has
+expired, and a worker that lost its lease stops writing. Finished jobs expire after
+their TTL.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from executors import make_executor
+from py_utils import count_word_batch, generate_lotto_batch, generate_password_batch
+
+CHUNK_SIZE = 1000
+DEFAULT_TTL = 24 * 3600.0
+# seconds a running job stays claimed without storing a chunk
+LEASE = 120.0
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    ttl REAL NOT NULL,
+    owner TEXT,
+    lease REAL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+
+def _lotto_batch(params: Dict[str, Any], start: int) -> Iterator[Tuple[int, int, list]]:
+    total = int(params["n"])
+    for offset in range(start, total, CHUNK_SIZE):
+        n = min(CHUNK_SIZE, total - offset)
+        yield offset + n, total, generate_lotto_batch(n, int(params.get("count", 6)))
+
+
+def _password_batch(params: Dict[str, Any], start: int) -> Iterator[Tuple[int, int, list]]:
+    websites = params["websites"]
+    for offset in range(start, len(websites), CHUNK_SIZE):
+        part = websites[offset:offset + CHUNK_SIZE]
+        yield offset + len(part), len(websites), generate_password_batch(part)
+
+
+def _count_batch(params: Dict[str, Any], start: int) -> Iterator[Tuple[int, int, list]]:
+    texts = params["texts"]
+    for offset in range(start, len(texts), CHUNK_SIZE):
+        part = texts[offset:offset + CHUNK_SIZE]
+        yield offset + len(part), len(texts), count_word_batch(part, params["word"])
+
+
+# kind -> generator(params, start) yielding (progress, total, items)
+KINDS = {
+    "lotto_batch": _lotto_batch,
+    "password_batch": _password_batch,
+    "count_batch": _count_batch,
+}
+
+
+class JobStore:
+    """SQLite-backed job records and result chunks; safe to open per process.
+
+    One store may be shared by threads (the API's request handlers); a lock
+    keeps their statements and transactions on the connection apart.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(_SCHEMA)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease", "REAL")):
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def create(self, kind: str, params: Dict[str, Any], ttl: float = DEFAULT_TTL) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self.db.execute("INSERT INTO jobs (id, kind, params, status, created, updated, ttl) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (job_id, kind, json.dumps(params), QUEUED, now, now, ttl))
+        return job_id
+
+    def get(self, job_id: str, with_result: bool = True) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.db.execute("SELECT id, kind, params, status, progress, total, result, error, "
+                                  "created, updated FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = {"id": row[0], "kind": row[1], "params": json.loads(row[2]), "status": row[3],
+                   "progress": row[4], "total": row[5], "error": row[7], "created": row[8], "updated": row[9]}
+            if with_result and row[6] is not None:
+                job["result"] = json.loads(row[6])
+            return job
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.db.execute("UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                            (status, error, time.time(), job_id))
+
+    def claim(self, job_id: str, owner: str, lease: float = LEASE) -> bool:
+        """Mark the job running for ``owner`` unless someone else holds a live lease."""
+        now = time.time()
+        with self._lock:
+            cur = self.db.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease = ?, updated = ? WHERE id = ? AND "
+                "(status = ? OR (status = ? AND (lease IS NULL OR lease < ? OR owner = ?)))",
+                (RUNNING, owner, now + lease, now, job_id, QUEUED, RUNNING, now, owner))
+            return cur.rowcount == 1
+
+    def append_chunk(self, job_id: str, seq: int, items: list, progress: int, total: int,
+                     owner: Optional[str] = None, lease: float = LEASE) -> bool:
+        """Store one chunk and renew ``owner``'s lease; False (nothing stored) if it was lost."""
+        now = time.time()
+        with self._lock:
+            with self.db:
+                self.db.execute("BEGIN")
+                # writes without an owner (tools, tests) leave the lease alone
+                cur = self.db.execute("UPDATE jobs SET progress = ?, total = ?, updated = ?, "
+                                      "lease = COALESCE(?, lease) WHERE id = ? AND (? IS NULL OR owner = ?)",
+                                      (progress, total, now, None if owner is None else now + lease, job_id, owner,
+                                       owner))
+                if cur.rowcount != 1:
+                    self.db.execute("ROLLBACK")
+                    return False
+                self.db.execute("INSERT OR REPLACE INTO chunks (job_id, seq, data) VALUES (?, ?, ?)",
+                                (job_id, seq, json.dumps(items)))
+            return True
+
+    def chunks(self, job_id: str, after: int = -1) -> List[Tuple[int, list]]:
+        with self._lock:
+            rows = self.db.execute("SELECT seq, data FROM chunks WHERE job_id = ? AND seq > ? ORDER BY seq",
+                                   (job_id, after)).fetchall()
+            return [(seq, json.loads(data)) for seq, data in rows]
+
+    def next_seq(self, job_id: str) -> int:
+        with self._lock:
+            row = self.db.execute("SELECT MAX(seq) FROM chunks WHERE job_id = ?", (job_id,)).fetchone()
+            return 0 if row[0] is None else row[0] + 1
+
+    def compact(self, job_id: str, owner: Optional[str] = None) -> bool:
+        """Join the chunks in order into the final result and drop them (if ``owner`` holds the job)."""
+        with self._lock:
+            result = []
+            for _, items in self.chunks(job_id):
+                result += items
+            with self.db:
+                self.db.execute("BEGIN")
+                cur = self.db.execute("UPDATE jobs SET result = ?, status = ?, updated = ?, lease = NULL "
+                                      "WHERE id = ? AND (? IS NULL OR owner = ?)",
+                                      (json.dumps(result), DONE, time.time(), job_id, owner, owner))
+                if cur.rowcount != 1:
+                    self.db.execute("ROLLBACK")
+                    return False
+                self.db.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+            return True
+
+    def unfinished(self, now: Optional[float] = None) -> List[str]:
+        """Queued jobs and running jobs whose lease has expired."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self.db.execute("SELECT id FROM jobs WHERE status = ? OR (status = ? AND "
+                                   "(lease IS NULL OR lease < ?)) ORDER BY created",
+                                   (QUEUED, RUNNING, now)).fetchall()
+            return [r[0] for r in rows]
+
+    def cleanup(self, now: Optional[float] = None) -> int:
+        """Delete finished jobs whose TTL has passed; returns how many."""
+        now = time.time() if now is None else now
+        with self._lock:
+            with self.db:
+                self.db.execute("BEGIN")
+                expired = [r[0] for r in self.db.execute(
+                    "SELECT id FROM jobs WHERE status IN (?, ?) AND updated + ttl < ?", (DONE, FAILED, now))]
+                for job_id in expired:
+                    self.db.execute("DELETE FROM chunks WHERE job_id = ?", (job_id,))
+                    self.db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            return len(expired)
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+
+def run_job(path: str, job_id: str, lease: float = LEASE) -> str:
+    """Worker entry point: claim, then run (or resume) one job against the store at ``path``.
+
+    Jobs that are finished, or running under another worker's live lease,
+    are left alone.
+    """
+    store = JobStore(path)
+    owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+    try:
+        if not store.claim(job_id, owner, lease):
+            return job_id
+        job = store.get(job_id, with_result=False)
+        seq = store.next_seq(job_id)
+        try:
+            for progress, total, items in KINDS[job["kind"]](job["params"], job["progress"]):
+                if not store.append_chunk(job_id, seq, items, progress, total, owner, lease):
+                    return job_id
+                seq += 1
+            store.compact(job_id, owner)
+        except Exception as e:
+            store.set_status(job_id, FAILED, str(e))
+        return job_id
+    finally:
+        store.close()
+
+
+class JobQueue:
+    """Submits stored jobs to a worker pool and resumes unfinished ones.
+
+    ``backend`` picks the pool (see ``executors.choose_backend``); each job
+    opens its own store connection, so any backend can run it.
+    """
+
+    def __init__(self, path: str, workers: Optional[int] = None, backend: Optional[str] = None):
+        self.path = path
+        self.store = JobStore(path)
+        self.pool = make_executor(backend, workers, needs=("jobs",))
+        for job_id in self.store.unfinished():
+            self.pool.submit(run_job, path, job_id)
+
+    def submit(self, kind: str, params: Dict[str, Any], ttl: float = DEFAULT_TTL) -> str:
+        if kind not in KINDS:
+            raise ValueError(f"unknown job kind: {kind}")
+        self.store.cleanup()
+        job_id = self.store.create(kind, params, ttl)
+        self.pool.submit(run_job, self.path, job_id)
+        return job_id
+
+    def wait(self, job_id: str, timeout: float = 60.0, poll: float = 0.05) -> Dict[str, Any]:
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            if job is None or job["status"] in (DONE, FAILED) or time.monotonic() > deadline:
+                return job
+            time.sleep(poll)
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True)
+        self.store.close()
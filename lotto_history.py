@@ -0,0 +1,155 @@
+"""Persistent lotto draw history with running statistics.
+
+Draws are appended to a flat log of little-endian ``uint64`` masks (bit
+``n`` set for number ``n``, as in ``lotto_tickets``), 8 bytes per draw.
+Opening a history replays the log once with vectorised NumPy; after that
+every ``record`` updates the aggregates in place, so queries never rescan:
+
+* ``counts[n]``: how often ``n`` was drawn;
+* ``pairs[a, b]``: how often ``a`` and ``b`` were drawn together (the
+  diagonal is ``counts``);
+* first/last draw index and longest gap per number, from which current
+  and mean gaps follow;
+* the last ``window`` draws in a ring buffer with their own counts and
+  pairs, kept up to date as old draws fall out. Shorter windows are
+  computed from the buffer.
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from lotto_tickets import MAX_NUMBER, MIN_NUMBER, draw_mask
+
+WINDOW = 10_000
+_BITS = np.arange(MAX_NUMBER + 1, dtype=np.uint64)
+
+
+def _unpack(masks: np.ndarray) -> np.ndarray:
+    """``(n,)`` masks -> ``(n, MAX_NUMBER + 1)`` 0/1 matrix (column 0 unused)."""
+    return ((masks[:, None] >> _BITS) & np.uint64(1)).astype(np.uint8)
+
+
+def _pairs(bits: np.ndarray) -> np.ndarray:
+    # float matmul goes through BLAS and is exact far beyond any draw count
+    as_float = bits.astype(np.float64)
+    return (as_float.T @ as_float).astype(np.int64)
+
+
+class DrawHistory:
+    """Append-only draw log at ``path`` with incrementally maintained statistics."""
+
+    def __init__(self, path: str, window: int = WINDOW):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        self.path = path
+        self.window = window
+        self._lock = threading.Lock()
+        if os.path.exists(path) and os.path.getsize(path) % 8:
+            raise ValueError(f"{path} is not a draw log (size is not a multiple of 8)")
+        masks = np.fromfile(path, dtype="<u8") if os.path.exists(path) else np.zeros(0, "<u8")
+        self._load(masks)
+        self._log = open(path, "ab")
+
+    def _load(self, masks: np.ndarray) -> None:
+        size = MAX_NUMBER + 1
+        bits = _unpack(masks)
+        self.draws = len(masks)
+        self.counts = bits.sum(axis=0, dtype=np.int64)
+        self.pairs = _pairs(bits)
+        self.first = np.full(size, -1, np.int64)
+        self.last = np.full(size, -1, np.int64)
+        self.max_gap = np.zeros(size, np.int64)
+        for n in range(MIN_NUMBER, size):
+            seen = np.flatnonzero(bits[:, n])
+            if seen.size:
+                self.first[n], self.last[n] = seen[0], seen[-1]
+                self.max_gap[n] = max(seen[0], int((np.diff(seen) - 1).max(initial=0)))
+            else:
+                self.max_gap[n] = self.draws
+        tail = masks[-self.window:]
+        self._ring = np.zeros(self.window, np.uint64)
+        self._ring[:len(tail)] = tail
+        self._head = len(tail) % self.window
+        self._filled = len(tail)
+        tail_bits = bits[-self.window:] if len(masks) else bits
+        self.window_counts = tail_bits.sum(axis=0, dtype=np.int64)
+        self.window_pairs = _pairs(tail_bits)
+
+    def close(self) -> None:
+        self._log.close()
+
+    def record(self, numbers: Sequence[int]) -> int:
+        """Append one draw; returns its index. O(k^2) for a draw of k numbers."""
+        if not len(numbers):
+            raise ValueError("draw must have at least one number")
+        mask = draw_mask(numbers)
+        idx = np.asarray(numbers, dtype=np.intp)
+        with self._lock:
+            self._log.write(np.array([mask], "<u8").tobytes())
+            self._log.flush()
+            index = self.draws
+            self.counts[idx] += 1
+            self.pairs[idx[:, None], idx] += 1
+            gaps = np.where(self.last[idx] >= 0, index - self.last[idx] - 1, index)
+            self.max_gap[idx] = np.maximum(self.max_gap[idx], gaps)
+            self.first[idx] = np.where(self.first[idx] < 0, index, self.first[idx])
+            self.last[idx] = index
+            if self._filled == self.window:
+                old = np.flatnonzero(_unpack(self._ring[self._head:self._head + 1])[0])
+                self.window_counts[old] -= 1
+                self.window_pairs[old[:, None], old] -= 1
+            else:
+                self._filled += 1
+            self._ring[self._head] = mask
+            self._head = (self._head + 1) % self.window
+            self.window_counts[idx] += 1
+            self.window_pairs[idx[:, None], idx] += 1
+            self.draws = index + 1
+        return index
+
+    def recent(self, n: Optional[int] = None) -> np.ndarray:
+        """Masks of the last ``n`` draws (at most ``window``), oldest first."""
+        n = self._filled if n is None else min(n, self._filled)
+        order = (self._head - n + np.arange(n)) % self.window
+        return self._ring[order]
+
+    def _gaps(self) -> Dict[str, List[Optional[float]]]:
+        numbers = slice(MIN_NUMBER, MAX_NUMBER + 1)
+        seen = self.last >= 0
+        current = np.where(seen, self.draws - 1 - self.last, self.draws)
+        max_gap = np.maximum(self.max_gap, current)
+        completed = self.counts - 1
+        span = self.last - self.first - completed
+        mean = [float(s / c) if c > 0 else None for s, c in zip(span[numbers], completed[numbers])]
+        return {"current": current[numbers].tolist(), "max": max_gap[numbers].tolist(), "mean": mean}
+
+    def stats(self) -> Dict[str, object]:
+        """All-time counts and gap statistics, per number from ``MIN_NUMBER``."""
+        with self._lock:
+            return {"draws": self.draws, "counts": self.counts[MIN_NUMBER:].tolist(), "gaps": self._gaps()}
+
+    def _window(self, last: Optional[int]):
+        with self._lock:
+            if last is None or last >= self._filled:
+                return self._filled, self.window_counts.copy(), self.window_pairs.copy()
+            bits = _unpack(self.recent(last))
+            return last, bits.sum(axis=0, dtype=np.int64), _pairs(bits)
+
+    def window_stats(self, last: Optional[int] = None) -> Dict[str, object]:
+        """Counts over the last ``last`` draws (default: the whole window)."""
+        n, counts, _ = self._window(last)
+        return {"draws": n, "counts": counts[MIN_NUMBER:].tolist()}
+
+    def top_pairs(self, k: int = 10, last: Optional[int] = None) -> List[Dict[str, int]]:
+        """The ``k`` most frequent pairs, all-time or over the last ``last`` draws."""
+        if last is None:
+            with self._lock:
+                pairs = self.pairs.copy()
+        else:
+            pairs = self._window(last)[2]
+        upper = np.triu(pairs, 1)
+        flat = np.argsort(upper, axis=None, kind="stable")[::-1][:k]
+        a, b = np.unravel_index(flat, upper.shape)
+        return [{"a": int(x), "b": int(y), "count": int(upper[x, y])} for x, y in zip(a, b) if upper[x, y]]
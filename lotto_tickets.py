@@ -0,0 +1,142 @@
+"""Purchased lotto tickets, matched against a draw in one vectorised pass.
+
+A ticket of numbers from ``1..45`` (``generate_lotto``'s range) is stored
+as a 64-bit mask with bit ``n`` set for each number ``n``, so ten million
+tickets take 80 MB. The store is a flat file of little-endian ``uint64``
+masks, appended to and read back as a read-only ``np.memmap``: opening it
+costs nothing and the OS page cache is shared by every process serving it.
+
+Matching a draw is ``popcount(ticket & draw)`` over all masks, done in
+cache-sized chunks with ``np.bitwise_count``; the bonus number is one more
+AND. Results are grouped with ``bincount`` into match histograms and the
+6/45 prize tiers::
+
+    store = TicketStore("tickets.u64")
+    store.append(generate_lotto_array(1_000_000))
+    store.match([3, 11, 19, 27, 38, 42], bonus=7)["tiers"]
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+MIN_NUMBER = 1
+MAX_NUMBER = 45
+# numbers per ticket and per draw; the prize tiers assume 6/45
+TICKET_SIZE = 6
+CHUNK = 1 << 20
+
+# (numbers matched, bonus matched) -> prize tier; 0 means no prize
+_TIERS = np.zeros((MAX_NUMBER + 1, 2), np.uint8)
+_TIERS[6] = 1
+_TIERS[5] = (3, 2)
+_TIERS[4] = 4
+_TIERS[3] = 5
+TIER_NAMES = {1: "6", 2: "5+bonus", 3: "5", 4: "4", 5: "3"}
+
+
+def _check_numbers(numbers: np.ndarray) -> None:
+    if numbers.size and (numbers.min() < MIN_NUMBER or numbers.max() > MAX_NUMBER):
+        raise ValueError(f"numbers must be between {MIN_NUMBER} and {MAX_NUMBER}")
+
+
+def encode_tickets(tickets) -> np.ndarray:
+    """``(n, k)`` numbers -> ``n`` ``uint64`` masks; rows must not repeat a number."""
+    numbers = np.asarray(tickets)
+    if numbers.ndim != 2 or numbers.shape[1] < 1:
+        raise ValueError("tickets must be a non-empty list of number lists")
+    if not np.issubdtype(numbers.dtype, np.integer):
+        raise ValueError("ticket numbers must be integers")
+    _check_numbers(numbers)
+    masks = np.bitwise_or.reduce(np.left_shift(np.uint64(1), numbers.astype(np.uint64)), axis=1)
+    if (np.bitwise_count(masks) != numbers.shape[1]).any():
+        raise ValueError("a ticket repeats a number")
+    return masks.astype("<u8", copy=False)
+
+
+def decode_tickets(masks: np.ndarray) -> List[List[int]]:
+    bits = np.arange(MIN_NUMBER, MAX_NUMBER + 1, dtype=np.uint64)
+    present = (masks[:, None] >> bits) & np.uint64(1)
+    return [bits[row.astype(bool)].astype(int).tolist() for row in present]
+
+
+def draw_mask(numbers: Sequence[int]) -> np.uint64:
+    numbers = np.asarray(numbers, dtype=np.int64)
+    if numbers.ndim != 1:
+        raise ValueError("draw must be a list of numbers")
+    _check_numbers(numbers)
+    if len(set(numbers.tolist())) != len(numbers):
+        raise ValueError("draw repeats a number")
+    return np.bitwise_or.reduce(np.left_shift(np.uint64(1), numbers.astype(np.uint64)), initial=np.uint64(0))
+
+
+class TicketStore:
+    """Append-only file of ticket masks, memory-mapped for matching."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._map: Optional[np.memmap] = None
+        if not os.path.exists(path):
+            open(path, "wb").close()
+        elif os.path.getsize(path) % 8:
+            raise ValueError(f"{path} is not a ticket file (size is not a multiple of 8)")
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.path) // 8
+
+    def tickets(self) -> np.ndarray:
+        """All masks, as a read-only memory map (remapped after appends)."""
+        with self._lock:
+            n = len(self)
+            if self._map is None or len(self._map) != n:
+                self._map = np.memmap(self.path, dtype="<u8", mode="r", shape=(n,)) if n \
+                    else np.zeros(0, "<u8")
+            return self._map
+
+    def append(self, tickets) -> range:
+        """Store ``tickets`` (``(n, TICKET_SIZE)`` numbers); returns their ids."""
+        masks = encode_tickets(tickets)
+        if np.shape(tickets)[1] != TICKET_SIZE:
+            raise ValueError(f"tickets must have {TICKET_SIZE} numbers")
+        with self._lock:
+            start = len(self)
+            with open(self.path, "ab") as f:
+                f.write(masks.tobytes())
+        return range(start, start + len(masks))
+
+    def match(self, numbers: Sequence[int], bonus: Optional[int] = None,
+              winners: int = 100) -> Dict[str, object]:
+        """Match histogram, prize tier counts and the first ``winners`` ids of the top tiers."""
+        if len(numbers) != TICKET_SIZE:
+            raise ValueError(f"draw must have {TICKET_SIZE} numbers")
+        main = draw_mask(numbers)
+        if bonus is not None:
+            if main & draw_mask([bonus]):
+                raise ValueError("bonus must not be one of the drawn numbers")
+            bonus_mask = draw_mask([bonus])
+        else:
+            bonus_mask = np.uint64(0)
+        masks = self.tickets()
+        histogram = np.zeros((MAX_NUMBER + 1) * 2, np.int64)
+        top: List[int] = []
+        for start in range(0, len(masks), CHUNK):
+            part = masks[start:start + CHUNK]
+            matched = np.bitwise_count(part & main)
+            key = matched.astype(np.intp) * 2
+            if bonus_mask:
+                key += (part & bonus_mask) != 0
+            histogram += np.bincount(key, minlength=histogram.size)
+            if len(top) < winners:
+                # tiers 1-3 need five matches
+                ids = np.flatnonzero(matched >= 5)[:winners - len(top)]
+                top.extend((ids + start).tolist())
+        by_key = histogram.reshape(-1, 2)
+        tiers = {name: 0 for name in TIER_NAMES.values()}
+        for m, b in zip(*np.nonzero(by_key)):
+            tier = int(_TIERS[m, b])
+            if tier:
+                tiers[TIER_NAMES[tier]] += int(by_key[m, b])
+        return {"tickets": len(masks), "matches": by_key.sum(axis=1)[:len(numbers) + 1].tolist(),
+                "tiers": tiers, "winners": top}
@@ -0,0 +1,217 @@
+"""MCP tool server exposing the ``py_utils`` functions over stdio.
+
+Speaks newline-delimited JSON-RPC 2.0 (the MCP stdio transport) without
+extra dependencies::
+
+    python -m mcp_server
+
+Long calls never go quiet, which is what produces the "No response
+returned" failures described in ``docs/ai_long_running*.md``:
+
+* batch tools work through their input in chunks and, when the request
+  carries ``_meta.progressToken``, send ``notifications/progress`` after
+  every chunk;
+* each finished chunk is also sent as a ``notifications/message`` with
+  ``logger: "partial_result"`` so a client can use results early;
+* while any call is running a ``notifications/message`` heartbeat goes out
+  every ``heartbeat`` seconds, keeping idle timeouts from firing even when
+  a single chunk is slow.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from py_utils import (
+    count_word,
+    count_word_batch,
+    generate_lotto,
+    generate_lotto_batch,
+    generate_password,
+    generate_password_batch,
+)
+
+PROTOCOL_VERSION = "2025-06-18"
+CHUNK_SIZE = 1000
+HEARTBEAT = 5.0
+
+
+def _schema(properties: Dict[str, Any], required: List[str]) -> Dict[str, Any]:
+    return {"type": "object", "properties": properties, "required": required}
+
+
+TOOLS = [
+    {"name": "generate_lotto", "description": "Draw unique lotto numbers.",
+     "inputSchema": _schema({"count": {"type": "integer", "default": 6}}, [])},
+    {"name": "generate_password", "description": "Password derived from a website.",
+     "inputSchema": _schema({"website": {"type": "string"}}, ["website"])},
+    {"name": "count_word", "description": "Count occurrences of a word in a text.",
+     "inputSchema": _schema({"text": {"type": "string"}, "word": {"type": "string"}}, ["text", "word"])},
+    {"name": "generate_lotto_batch", "description": "Many lotto draws, streamed in chunks.",
+     "inputSchema": _schema({"n": {"type": "integer"}, "count": {"type": "integer", "default": 6}}, ["n"])},
+    {"name": "generate_password_batch", "description": "Passwords for many websites, streamed in chunks.",
+     "inputSchema": _schema({"websites": {"type": "array", "items": {"type": "string"}}}, ["websites"])},
+    {"name": "count_word_batch", "description": "Count a word in many texts, streamed in chunks.",
+     "inputSchema": _schema({"texts": {"type": "array", "items": {"type": "string"}},
+                             "word": {"type": "string"}}, ["texts", "word"])},
+]
+
+
+def _chunks(args: Dict[str, Any], name: str, size: int):
+    """Yield ``(done, total, results)`` for a batch tool, one chunk at a time."""
+    if name == "generate_lotto_batch":
+        total = int(args["n"])
+        for start in range(0, total, size):
+            n = min(size, total - start)
+            yield start + n, total, generate_lotto_batch(n, int(args.get("count", 6)))
+    elif name == "generate_password_batch":
+        websites = args["websites"]
+        for start in range(0, len(websites), size):
+            part = websites[start:start + size]
+            yield start + len(part), len(websites), generate_password_batch(part)
+    else:
+        texts = args["texts"]
+        for start in range(0, len(texts), size):
+            part = texts[start:start + size]
+            yield start + len(part), len(texts), count_word_batch(part, args["word"])
+
+
+class Server:
+    """Dispatches JSON-RPC messages; ``write`` receives every outgoing message."""
+
+    def __init__(self, write: Callable[[Dict[str, Any]], None], chunk_size: int = CHUNK_SIZE,
+                 heartbeat: float = HEARTBEAT, workers: int = 4):
+        self._write = write
+        self._lock = threading.Lock()
+        self.chunk_size = chunk_size
+        self.heartbeat = heartbeat
+        self.pool = ThreadPoolExecutor(workers)
+        self._running = 0
+        self._wake = threading.Condition(self._lock)
+        self._beats = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        self._beats.start()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            self._write(message)
+
+    def notify(self, method: str, params: Dict[str, Any]) -> None:
+        self.send({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def _heartbeat_loop(self) -> None:
+        started = time.monotonic()
+        while True:
+            with self._wake:
+                while not self._running:
+                    self._wake.wait()
+                self._wake.wait(self.heartbeat)
+                if not self._running:
+                    continue
+                self._write({"jsonrpc": "2.0", "method": "notifications/message",
+                             "params": {"level": "debug", "logger": "heartbeat",
+                                        "data": {"running": self._running,
+                                                 "uptime": round(time.monotonic() - started, 3)}}})
+
+    def handle(self, message: Any) -> None:
+        """Handle one incoming message; tool calls finish asynchronously."""
+        if not isinstance(message, dict):
+            self.send({"jsonrpc": "2.0", "id": None,
+                       "error": {"code": -32600, "message": "invalid request: expected an object"}})
+            return
+        method = message.get("method")
+        msg_id = message.get("id")
+        if msg_id is None:
+            return  # notifications such as notifications/initialized
+        if method == "initialize":
+            self._reply(msg_id, {"protocolVersion": PROTOCOL_VERSION,
+                                 "capabilities": {"tools": {}, "logging": {}},
+                                 "serverInfo": {"name": "py_utils", "version": "0.1"}})
+        elif method == "ping":
+            self._reply(msg_id, {})
+        elif method == "tools/list":
+            self._reply(msg_id, {"tools": TOOLS})
+        elif method == "tools/call":
+            if not isinstance(message.get("params") or {}, dict):
+                self.send({"jsonrpc": "2.0", "id": msg_id,
+                           "error": {"code": -32602, "message": "invalid params: expected an object"}})
+                return
+            with self._wake:
+                self._running += 1
+                if self._running == 1:
+                    self._wake.notify()
+            self.pool.submit(self._call, msg_id, message.get("params") or {})
+        else:
+            self.send({"jsonrpc": "2.0", "id": msg_id,
+                       "error": {"code": -32601, "message": f"method not found: {method}"}})
+
+    def _reply(self, msg_id: Any, result: Dict[str, Any]) -> None:
+        self.send({"jsonrpc": "2.0", "id": msg_id, "result": result})
+
+    def _call(self, msg_id: Any, params: Dict[str, Any]) -> None:
+        name = params.get("name")
+        args = params.get("arguments") or {}
+        token = (params.get("_meta") or {}).get("progressToken")
+        try:
+            if name == "generate_lotto":
+                result: Any = generate_lotto(int(args.get("count", 6)))
+            elif name == "generate_password":
+                result = generate_password(args["website"])
+            elif name == "count_word":
+                result = count_word(args["text"], args["word"])
+            elif name in ("generate_lotto_batch", "generate_password_batch", "count_word_batch"):
+                result = []
+                for done, total, part in _chunks(args, name, self.chunk_size):
+                    result += part
+                    if token is not None:
+                        self.notify("notifications/progress",
+                                    {"progressToken": token, "progress": done, "total": total})
+                        self.notify("notifications/message",
+                                    {"level": "info", "logger": "partial_result",
+                                     "data": {"progressToken": token, "offset": done - len(part),
+                                              "items": part}})
+            else:
+                raise ValueError(f"unknown tool: {name}")
+            self._reply(msg_id, {"content": [{"type": "text", "text": json.dumps(result)}],
+                                 "isError": False})
+        except Exception as e:
+            self._reply(msg_id, {"content": [{"type": "text", "text": str(e)}], "isError": True})
+        finally:
+            with self._wake:
+                self._running -= 1
+
+
+def serve_stdio(chunk_size: int = CHUNK_SIZE, heartbeat: float = HEARTBEAT) -> None:
+    out = sys.stdout
+
+    def write(message: Dict[str, Any]) -> None:
+        out.write(json.dumps(message, separators=(",", ":")) + "\n")
+        out.flush()
+
+    server = Server(write, chunk_size=chunk_size, heartbeat=heartbeat)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            server.send({"jsonrpc": "2.0", "id": None,
+                         "error": {"code": -32700, "message": "parse error"}})
+            continue
+        server.handle(message)
+    server.pool.shutdown(wait=True)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="mcp_server")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--heartbeat", type=float, default=HEARTBEAT)
+    args = parser.parse_args(argv)
+    serve_stdio(args.chunk_size, args.heartbeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""On-demand CPU and memory profiling for the running service.
+
+Nothing here is active unless ``install(app, token)`` is called with a
+token; ``fastapi_app`` does that only when ``$PROFILING_TOKEN`` is set, so
+by default there are no extra routes, no middleware and no overhead.
+Once installed, requests carrying ``X-Debug-Token: <token>`` can use:
+
+* ``GET /debug/profile/cpu?seconds=5`` samples every thread's stack with
+  ``sys._current_frames()`` from a background thread and returns collapsed
+  stacks (``a;b;c 42`` per line), ready for ``flamegraph.pl`` or
+  speedscope. The profiled code is never instrumented; the cost is one
+  stack walk per interval while the profile runs.
+* ``GET /debug/profile/memory?seconds=5`` traces allocations with
+  ``tracemalloc`` for the window and returns the top allocation sites and
+  the peak memory of each route hit meanwhile. Peaks are measured with
+  ``tracemalloc.reset_peak()``, so concurrent requests share them.
+
+Only one profile runs at a time.
+"""
+import asyncio
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+INTERVAL = 0.005
+MAX_SECONDS = 60.0
+
+
+def _frame_name(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Samples the stacks of all other threads every ``interval`` seconds."""
+
+    def __init__(self, interval: float = INTERVAL):
+        if not interval > 0:
+            raise ValueError("interval must be > 0")
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            threads = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    name = names.get(code)
+                    if name is None:
+                        name = names[code] = _frame_name(code)
+                    stack.append(name)
+                    frame = frame.f_back
+                stack.append(threads.get(ident, "thread"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """One ``root;...;leaf count`` line per distinct stack, most frequent first."""
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def profile_cpu(seconds: float, interval: float = INTERVAL) -> str:
+    """Sample all threads for ``seconds`` and return collapsed stacks."""
+    with SamplingProfiler(interval) as profiler:
+        time.sleep(seconds)
+    return profiler.collapsed()
+
+
+class RouteMemory:
+    """Peak traced memory per route, filled in while ``enabled``."""
+
+    def __init__(self):
+        self.enabled = False
+        self.peaks: Dict[str, int] = {}
+
+
+class RouteMemoryMiddleware:
+    """ASGI middleware feeding ``RouteMemory``; one attribute check when disabled."""
+
+    def __init__(self, app: ASGIApp, tracker: RouteMemory):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        tracker = self.tracker
+        if not tracker.enabled or scope["type"] != "http" or not tracemalloc.is_tracing():
+            await self.app(scope, receive, send)
+            return
+        start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if tracemalloc.is_tracing():
+                route = scope.get("route")
+                key = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+                peak = tracemalloc.get_traced_memory()[1] - start
+                tracker.peaks[key] = max(tracker.peaks.get(key, 0), peak)
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, limit: int = 20) -> List[Dict[str, Any]]:
+    stats = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics("lineno")
+    return [{"site": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "size": s.size, "count": s.count}
+            for s in stats[:limit]]
+
+
+def install(app: FastAPI, token: Optional[str]) -> Optional[RouteMemory]:
+    """Add the debug routes and route-memory middleware when ``token`` is set."""
+    if not token:
+        return None
+    lock = asyncio.Lock()
+    tracker = RouteMemory()
+    app.add_middleware(RouteMemoryMiddleware, tracker=tracker)
+
+    def check(request: Request, seconds: float) -> None:
+        if not hmac.compare_digest(request.headers.get("x-debug-token", ""), token):
+            raise HTTPException(status_code=403, detail="invalid debug token")
+        if not 0 < seconds <= MAX_SECONDS:
+            raise HTTPException(status_code=400, detail=f"seconds must be in (0, {MAX_SECONDS}]")
+        if lock.locked():
+            raise HTTPException(status_code=409, detail="a profile is already running")
+
+    @app.get("/debug/profile/cpu", include_in_schema=False)
+    async def cpu_profile(request: Request, seconds: float = 5.0, interval: float = INTERVAL):
+        check(request, seconds)
+        if not 0.0005 <= interval <= 1:
+            raise HTTPException(status_code=400, detail="interval must be in [0.0005, 1]")
+        async with lock:
+            # the sampler has its own thread; the loop keeps serving and gets sampled
+            profiler = SamplingProfiler(interval).start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profiler.stop()
+        return PlainTextResponse(profiler.collapsed(), headers={"X-Samples": str(profiler.samples)})
+
+    @app.get("/debug/profile/memory", include_in_schema=False)
+    async def memory_profile(request: Request, seconds: float = 5.0, limit: int = 20, frames: int = 1):
+        check(request, seconds)
+        async with lock:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start(max(1, min(frames, 32)))
+            tracker.peaks = {}
+            tracker.enabled = True
+            try:
+                await asyncio.sleep(seconds)
+                snapshot = tracemalloc.take_snapshot()
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracker.enabled = False
+                if started:
+                    tracemalloc.stop()
+        return {"current": current, "peak": peak, "top": top_allocations(snapshot, limit),
+                "routes": dict(tracker.peaks)}
+
+    return tracker
@@ -0,0 +1,145 @@
+"""Streaming responses (SSE and NDJSON) for long-running endpoints.
+
+Handlers that collect all output before returning are what middleware
+timeouts hit first, ending in ``RuntimeError: No response returned`` (see
+``docs/ai_eval_schema.md``). These helpers start the response at once,
+send every item as soon as the producer yields it, fill quiet periods with
+heartbeats and stop the producer when the client goes away.
+
+    @app.get("/things")
+    async def things(request: Request):
+        return sse_response(produce_things(), request, heartbeat=10)
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, Union
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+
+HEARTBEAT = 15.0
+_DONE = object()
+
+Source = Union[AsyncIterator[Any], Iterable[Any]]
+
+
+async def _aiter(source: Source) -> AsyncIterator[Any]:
+    if hasattr(source, "__aiter__"):
+        async for item in source:
+            yield item
+    else:
+        # blocking generators run in the threadpool so the loop stays free
+        async for item in iterate_in_threadpool(iter(source)):
+            yield item
+
+
+async def stream_events(source: Source, heartbeat: float = HEARTBEAT,
+                        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+                        ) -> AsyncIterator[Any]:
+    """Yield items from ``source``, or None after ``heartbeat`` seconds of silence.
+
+    Errors from the producer are yielded as the exception object so the
+    caller can report them in-band instead of dropping the response.
+    """
+    if not heartbeat > 0:
+        raise ValueError("heartbeat must be > 0")
+    queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+
+    async def produce():
+        try:
+            async for item in _aiter(source):
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(e)
+        await queue.put(_DONE)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                item = None
+            if is_disconnected is not None and await is_disconnected():
+                return
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        producer.cancel()
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """``StreamingResponse`` for handlers that answer while still reading the upload.
+
+    Below ASGI spec 2.4 (uvicorn, TestClient) ``StreamingResponse`` listens
+    for ``http.disconnect`` on ``receive`` while streaming, and that
+    listener takes the request body messages the handler is waiting for.
+    Here the handler's ``request.stream()`` is the only receiver; a client
+    that goes away surfaces there as ``ClientDisconnect``.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+def _encode_sse(item: Any) -> str:
+    if item is None:
+        return ": heartbeat\n\n"
+    if isinstance(item, Exception):
+        return f"event: error\ndata: {json.dumps({'detail': str(item)})}\n\n"
+    return f"data: {json.dumps(item)}\n\n"
+
+
+def _encode_ndjson(item: Any) -> str:
+    if item is None:
+        return "\n"
+    if isinstance(item, Exception):
+        return json.dumps({"error": str(item)}) + "\n"
+    return json.dumps(item) + "\n"
+
+
+async def _encoded(source: Source, encode, heartbeat: float, request: Optional[Request]):
+    is_disconnected = request.is_disconnected if request is not None else None
+    async for item in stream_events(source, heartbeat, is_disconnected):
+        yield encode(item)
+
+
+def _response(source: Source, encode, media_type: str, request: Optional[Request],
+              heartbeat: float, upload: bool) -> StreamingResponse:
+    if not heartbeat > 0:
+        # checked here as well, before the response has started
+        raise ValueError("heartbeat must be > 0")
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if upload:
+        # polling is_disconnected would consume body messages; see UploadStreamingResponse
+        return UploadStreamingResponse(_encoded(source, encode, heartbeat, None),
+                                       media_type=media_type, headers=headers)
+    return StreamingResponse(_encoded(source, encode, heartbeat, request),
+                             media_type=media_type, headers=headers)
+
+
+def sse_response(source: Source, request: Optional[Request] = None,
+                 heartbeat: float = HEARTBEAT, upload: bool = False) -> StreamingResponse:
+    """``text/event-stream`` with one ``data:`` event per item and comment heartbeats.
+
+    Pass ``upload=True`` when ``source`` reads the request body.
+    """
+    return _response(source, _encode_sse, "text/event-stream", request, heartbeat, upload)
+
+
+def ndjson_response(source: Source, request: Optional[Request] = None,
+                    heartbeat: float = HEARTBEAT, upload: bool = False) -> StreamingResponse:
+    """``application/x-ndjson`` with one JSON line per item and blank-line heartbeats.
+
+    Pass ``upload=True`` when ``source`` reads the request body.
+    """
+    return _response(source, _encode_ndjson, "application/x-ndjson", request, heartbeat, upload)
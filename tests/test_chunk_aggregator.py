@@ -0,0 +1,65 @@
+import asyncio
+import json
+
+import pytest
+
+from chunk_aggregator import ChunkAggregator, aggregate
+
+
+async def _stream(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+CHUNKS = [
+    {"status": "processing", "data": [{"id": 1, "name": "a", "info": {"os": "x"}}, {"id": 2, "name": "b"}]},
+    {"status": "processing", "data": [{"id": 1, "info": {"ver": 2}}]},
+    {"status": "completed", "data": [{"id": 3, "name": "c|d"}]},
+]
+
+
+def test_merges_by_key_in_first_seen_order():
+    out = json.loads(asyncio.run(aggregate(_stream(CHUNKS), key="id")))
+    assert out == [{"id": 1, "name": "a", "info": {"os": "x", "ver": 2}},
+                   {"id": 2, "name": "b"}, {"id": 3, "name": "c|d"}]
+
+
+def test_markdown_output():
+    table = asyncio.run(aggregate(_stream(CHUNKS), key="id", fmt="markdown")).splitlines()
+    assert table[0] == "| id | name | info |"
+    assert table[-1] == "| 3 | c\\|d |  |"
+
+
+def test_spills_to_disk_with_same_result():
+    records = [{"id": i % 300, "v": i} for i in range(1000)]
+    chunks = [{"status": "processing", "data": records[i:i + 100]} for i in range(0, 1000, 100)]
+    chunks.append({"status": "completed"})
+    small = ChunkAggregator("id", max_records=50)
+    big = ChunkAggregator("id")
+    for chunk in chunks:
+        small.add_chunk(chunk)
+        big.add_chunk(chunk)
+    assert small.spilled and not big.spilled
+    assert small.result() == big.result()
+    assert json.loads(small.result())[0] == {"id": 0, "v": 900}
+    small.close()
+
+
+def test_requires_completion():
+    with pytest.raises(ValueError):
+        asyncio.run(aggregate(_stream(CHUNKS[:2]), key="id"))
+
+
+def test_spilled_deletions_match_in_memory():
+    patches = [{"id": 1, "a": 1, "b": 2, "n": {"x": 1, "y": 2}}, {"id": 2},
+               {"id": 1, "b": None, "n": {"x": None}}, {"id": 2, "z": None},
+               {"id": 1, "n": None}, {"id": 1, "n": {"k": None, "w": 3}}]
+    chunks = [{"status": "processing", "data": [p]} for p in patches] + [{"status": "done"}]
+    results = []
+    for limit in (1, 1000):
+        agg = ChunkAggregator("id", max_records=limit)
+        for chunk in chunks:
+            agg.add_chunk(chunk)
+        results.append(json.loads(agg.result()))
+        agg.close()
+    assert results[0] == results[1] == [{"id": 1, "a": 1, "n": {"w": 3}}, {"id": 2}]
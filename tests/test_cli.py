@@ -0,0 +1,27 @@
+import json
+
+import cli
+
+
+def test_password_and_count(tmp_path):
+    src = tmp_path / "in.txt"
+    src.write_bytes(b"www.google.com\n" + json.dumps({"website": "naver.com"}).encode() + b"\n\n")
+    dst = tmp_path / "out.txt"
+    assert cli.main(["password", str(src), "-o", str(dst), "-q", "--batch", "2"]) == 1
+    lines = dst.read_text().split("\n")
+    assert lines[0] == "goo62!"
+    assert json.loads(lines[1]) == {"website": "naver.com", "password": "nav50!"}
+    assert lines[2] == ""
+
+    src.write_text('{"text": "a b a", "word": "a"}\nfoo foo\n')
+    assert cli.main(["count", str(src), "-o", str(dst), "--word", "foo", "-q", "-j", "2", "--batch", "1"]) == 0
+    first, second = dst.read_text().splitlines()
+    assert json.loads(first)["count"] == 2
+    assert second == "2"
+
+
+def test_lotto_generated(tmp_path):
+    dst = tmp_path / "out.txt"
+    assert cli.main(["lotto", "--n", "25", "--count", "3", "-o", str(dst), "-q"]) == 0
+    draws = [list(map(int, line.split())) for line in dst.read_text().splitlines()]
+    assert len(draws) == 25 and all(len(set(d)) == 3 for d in draws)
@@ -0,0 +1,120 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from compression import CODECS, CompressionMiddleware, negotiate
+
+
+class Text(BaseModel):
+    text: str
+
+
+def _client(**options):
+    app = FastAPI()
+
+    @app.post("/len")
+    def length(req: Text):
+        return {"length": len(req.text)}
+
+    @app.post("/raw")
+    async def raw(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+
+    @app.get("/big")
+    def big():
+        return {"text": "abc " * 2000}
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    app.add_middleware(CompressionMiddleware, **options)
+    return TestClient(app)
+
+
+def test_negotiate():
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("deflate;q=1, gzip;q=0.5") == "deflate"
+    assert negotiate("gzip;q=0, *") == [c for c in CODECS if c != "gzip"][0]
+    assert negotiate("br") is None and negotiate("") is None
+    assert negotiate("x-gzip") == "gzip"
+
+
+@pytest.mark.parametrize("encoding, compress", [
+    ("gzip", gzip.compress),
+    ("deflate", zlib.compress),
+    ("deflate", lambda data: zlib.compress(data)[2:-4]),  # raw deflate
+])
+def test_request_decompression(encoding, compress):
+    client = _client()
+    body = compress(b'{"text": "' + b"x" * 100_000 + b'"}')
+    r = client.post("/len", content=body, headers={"content-encoding": encoding,
+                                                   "content-type": "application/json"})
+    assert r.json() == {"length": 100_000}
+    # streamed in pieces, through request.stream()
+    chunks = [body[i:i + 100] for i in range(0, len(body), 100)]
+    r = client.post("/raw", content=iter(chunks), headers={"content-encoding": encoding})
+    assert r.json() == {"size": 100_010 + 2}
+
+
+def test_zip_bomb_rejected():
+    client = _client(max_body=1_000_000)
+    bomb = gzip.compress(b"\0" * 50_000_000)
+    assert len(bomb) < 100_000
+    for path in ("/len", "/raw"):
+        r = client.post(path, content=bomb, headers={"content-encoding": "gzip",
+                                                     "content-type": "application/json"})
+        assert r.status_code == 413 and "exceeds" in r.json()["detail"]
+
+
+def test_bad_bodies():
+    client = _client()
+    r = client.post("/raw", content=b"not gzip at all", headers={"content-encoding": "gzip"})
+    assert r.status_code == 400
+    r = client.post("/raw", content=gzip.compress(b"abc" * 1000)[:-20], headers={"content-encoding": "gzip"})
+    assert r.status_code == 400 and "truncated" in r.json()["detail"]
+    r = client.post("/raw", content=b"abc", headers={"content-encoding": "br"})
+    assert r.status_code == 415
+
+
+def test_response_compression():
+    client = _client(minimum_size=500)
+    r = client.get("/big", headers={"accept-encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip" and "accept-encoding" in r.headers["vary"].lower()
+    assert int(r.headers["content-length"]) < 1000 and len(r.json()["text"]) == 8000
+    r = client.get("/small", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in r.headers and r.json() == {"ok": True}
+    r = client.get("/big", headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in r.headers
+
+
+def test_streamed_response_flushes_each_message():
+    async def lines(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for i in range(100):
+            await send({"type": "http.response.body", "body": f"line {i}\n".encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"deflate")]}
+    asyncio.run(CompressionMiddleware(lines)(scope, None, send))
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"deflate" and b"content-length" not in headers
+    # every message decodes on arrival, without waiting for the end
+    decoder = zlib.decompressobj()
+    bodies = [decoder.decompress(m["body"]) for m in sent[1:]]
+    assert bodies[:100] == [f"line {i}\n".encode() for i in range(100)]
+    assert decoder.eof
@@ -0,0 +1,23 @@
+import pytest
+
+from dice_sim import simulate_dice_game
+
+
+def test_single_roll_matches_exact_odds():
+    r = simulate_dice_game(600_000, seed=1)
+    assert r["win"] + r["tie"] + r["loss"] == 600_000
+    assert r["p_tie"] == pytest.approx(1 / 6, abs=0.005)
+    assert r["p_win"] == pytest.approx(15 / 36, abs=0.005)
+    assert sorted(r["player_totals"]) == [1, 2, 3, 4, 5, 6]
+    assert sum(r["differences"].values()) == 600_000
+    assert r["differences"][0] == r["tie"]
+
+
+def test_seeded_and_pooled():
+    a = simulate_dice_game(10_000, rounds=3, dice=2, seed=7)
+    assert a == simulate_dice_game(10_000, rounds=3, dice=2, seed=7)
+    assert min(a["player_totals"]) >= 6 and max(a["player_totals"]) <= 36
+    b = simulate_dice_game(10_001, rounds=3, seed=7, workers=2)
+    assert b["games"] == 10_001 == sum(b["computer_totals"].values())
+    with pytest.raises(ValueError):
+        simulate_dice_game(10, sides=1)
@@ -0,0 +1,51 @@
+from itertools import repeat
+
+import pytest
+
+import cli
+import executors
+from executors import PROCESS, SUBINTERPRETER, THREAD, available_backends, choose_backend, make_executor
+from jobs import JobQueue
+from py_utils import count_word_batch
+
+
+def test_choose_backend(monkeypatch):
+    monkeypatch.delenv("EXECUTOR_BACKEND", raising=False)
+    monkeypatch.setattr(executors, "gil_enabled", lambda: False)
+    assert choose_backend() == THREAD
+    monkeypatch.setattr(executors, "gil_enabled", lambda: True)
+    assert choose_backend() == (SUBINTERPRETER if executors.imports_in_subinterpreter("py_utils") else PROCESS)
+    # subinterpreters only when the task modules load in one (numpy does not)
+    monkeypatch.setitem(executors._BACKENDS, SUBINTERPRETER, (None, lambda: True))
+    loads = {"py_utils": False, "pure": True}
+    monkeypatch.setattr(executors, "imports_in_subinterpreter", loads.get)
+    assert choose_backend() == PROCESS
+    assert choose_backend(needs=("pure",)) == SUBINTERPRETER
+    monkeypatch.setitem(executors._BACKENDS, SUBINTERPRETER, (None, lambda: False))
+    assert choose_backend(needs=()) == PROCESS
+    monkeypatch.setenv("EXECUTOR_BACKEND", THREAD)
+    assert choose_backend() == THREAD and choose_backend(PROCESS) == PROCESS
+    with pytest.raises(ValueError):
+        choose_backend("fibers")
+    if executors.InterpreterPoolExecutor is None:
+        with pytest.raises(ValueError):
+            choose_backend(SUBINTERPRETER)
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_backends_run_utilities(backend):
+    chunks = [["a b a", "b"], ["a"] * 3, []]
+    with make_executor(backend, workers=2) as pool:
+        assert list(pool.map(count_word_batch, chunks, repeat("a"))) == [[2, 0], [1, 1, 1], []]
+
+
+def test_callers_take_a_backend(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=2, backend=THREAD)
+    job_id = queue.submit("count_batch", {"texts": ["a a", "b"], "word": "a"})
+    assert queue.wait(job_id)["result"] == [2, 0]
+    queue.close()
+    src, dst = tmp_path / "in.txt", tmp_path / "out.txt"
+    src.write_text("foo foo\nfoo\n")
+    assert cli.main(["count", str(src), "-o", str(dst), "--word", "foo", "-q", "-j", "2",
+                     "--batch", "1", "--backend", THREAD]) == 0
+    assert dst.read_text().splitlines() == ["2", "1"]
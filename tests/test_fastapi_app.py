@@ -0,0 +1,123 @@
+import asyncio
+import gzip
+import json
+
+from fastapi.testclient import TestClient
+
+from fastapi_app import app
+
+client = TestClient(app)
+
+
+def asgi_post(path, chunks, query=b"", content_type=b"text/plain", headers=()):
+    """POST ``chunks`` as separate body messages, the way uvicorn delivers uploads."""
+    messages = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1}
+                for i, c in enumerate(chunks)]
+    out = []
+
+    async def receive():
+        if messages:
+            await asyncio.sleep(0)
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        out.append(message)
+
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+             "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+             "query_string": query, "root_path": "", "headers": [(b"content-type", content_type), *headers],
+             "client": ("test", 1), "server": ("test", 80)}
+    asyncio.run(asyncio.wait_for(app(scope, receive, send), 10))
+    return b"".join(m.get("body", b"") for m in out if m["type"] == "http.response.body").decode()
+
+
+def test_replace_endpoints():
+    resp = client.post("/replace", json={"text": "robot and robot", "mapping": {"robot": "AI"}})
+    assert resp.json() == {"text": "AI and AI"}
+
+    body = "\n".join(json.dumps(x) for x in
+                     [{"mapping": {"robot": "AI"}}, {"text": "a rob"}, {"text": "ot b"}, {"text": " robot"}])
+    resp = client.post("/replace/stream", content=body)
+    assert resp.text == "a AI b AI"
+
+    assert client.post("/replace/stream", content='{"text": "x"}').status_code == 400
+    for mapping in ('{"a": 1}', "[1]", '"x"', "null"):
+        assert client.post("/replace/stream", content='{"mapping": %s}' % mapping).status_code == 400
+
+
+def test_random_password_endpoint():
+    resp = client.post("/password/random", json={"n": 3, "length": 10})
+    assert [len(p) for p in resp.json()["passwords"]] == [10, 10, 10]
+    assert client.post("/password/random", json={"classes": ["emoji"]}).status_code == 400
+
+
+def test_grades_endpoint():
+    assert client.post("/grades", json=[96, 72]).json() == {"grades": ["A+", "C"]}
+
+    body = "name,score\nann,97\nbob,80\ncid,oops\n"
+    resp = client.post("/grades", content=body, headers={"content-type": "text/csv"})
+    assert resp.text == "name,score,grade\nann,97,A+\nbob,80,C+\ncid,oops,\n"
+    assert client.post("/grades?column=x", content=body, headers={"content-type": "text/csv"}).status_code == 400
+
+
+def test_grades_csv_reads_every_upload_message():
+    chunks = [b"name,score\n", b"ann,97\nbo", b"b,80\ncid,\xff\n"]
+    body = asgi_post("/grades", chunks, content_type=b"text/csv")
+    assert body == "name,score,grade\nann,97,A+\nbob,80,C+\ncid,\ufffd,\n"
+
+
+def test_dice_endpoint():
+    r = client.get("/dice/simulate", params={"games": 1000, "rounds": 2, "seed": 3})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["win"] + body["tie"] + body["loss"] == 1000
+    assert client.get("/dice/simulate", params={"games": 0}).status_code == 400
+    too_many = {"games": 50_000_000, "rounds": 100, "dice": 100}
+    assert client.get("/dice/simulate", params=too_many).status_code == 400
+
+
+def test_count_modes_endpoint():
+    body = {"text": "Robot robot robotics", "word": "robot"}
+    assert client.post("/count", json=body).json() == {"count": 2}
+    assert client.post("/count", json={**body, "mode": "word"}).json() == {"count": 1}
+    r = client.post("/count", json={**body, "modes": ["ignorecase", "normalized"]})
+    assert r.json() == {"counts": {"ignorecase": 3, "normalized": 3}}
+    assert client.post("/count", json={**body, "mode": "nope"}).status_code == 400
+
+
+def test_topk_endpoint():
+    body = "\n".join(["error disk full", "error timeout", "ok", "Error disk"] * 5)
+    r = client.post("/topk", params={"k": 2, "snapshot": 8}, content=body)
+    lines = [json.loads(line) for line in r.text.splitlines() if line]
+    assert [line["lines"] for line in lines] == [8, 16, 20]
+    assert lines[-1]["done"] and lines[-1]["method"] == "exact"
+    assert [(t["term"], t["count"]) for t in lines[-1]["top"]] == [("error", 15), ("disk", 10)]
+    assert client.post("/topk", params={"method": "magic"}, content="x").status_code == 400
+
+
+def test_topk_reads_every_upload_message():
+    body = asgi_post("/topk", [b"a b\n", b"a c\nb", b" a\n"], b"k=1")
+    final = json.loads(body.splitlines()[-1])
+    assert final["lines"] == 3 and final["total"] == 6 and final["top"][0] == {"term": "a", "count": 3, "error": 0}
+
+
+def test_compressed_upload_and_response():
+    text = "\n".join(["a b", "a c", "b a"] * 10_000).encode()
+    packed = gzip.compress(text)
+    chunks = [packed[i:i + 1000] for i in range(0, len(packed), 1000)]
+    body = asgi_post("/topk", chunks, b"k=1", headers=[(b"content-encoding", b"gzip")])
+    assert json.loads(body.splitlines()[-1])["top"][0] == {"term": "a", "count": 30_000, "error": 0}
+
+    resp = client.post("/count", content=gzip.compress(json.dumps({"text": "robot " * 5000, "word": "robot"}).encode()),
+                       headers={"content-encoding": "gzip", "content-type": "application/json"})
+    assert resp.json() == {"count": 5000}
+    resp = client.post("/password/random", json={"n": 200}, headers={"accept-encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip" and len(resp.json()["passwords"]) == 200
+
+
+def test_replace_stream_reads_every_upload_message():
+    chunks = [b'{"mapping": {"robot": "AI"}}\n{"text": "robot x"}\n', b'{"text": " ro', b'bot"}\n']
+    assert asgi_post("/replace/stream", chunks) == "AI x AI"
+    bad = [b'{"mapping": {"a": "b"}}\n{"text": "a"}\n', b"[1]\n"]
+    assert asgi_post("/replace/stream", bad) == "b\n[error: line 3: expected {\"text\": \"...\"}]\n"
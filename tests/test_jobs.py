@@ -0,0 +1,83 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from jobs import DONE, JobQueue, JobStore, run_job
+
+
+def test_job_runs_and_compacts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=1)
+    try:
+        job_id = queue.submit("count_batch", {"texts": ["robot"] * 2500, "word": "robot"})
+        job = queue.wait(job_id)
+        assert job["status"] == DONE
+        assert job["result"] == [1] * 2500
+        assert job["progress"] == job["total"] == 2500
+        assert queue.store.chunks(job_id) == []
+    finally:
+        queue.close()
+
+
+def test_interrupted_job_resumes(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(path)
+    job_id = store.create("count_batch", {"texts": ["a b a"] * 1500, "word": "a"})
+    store.set_status(job_id, "running")
+    store.append_chunk(job_id, 0, [2] * 1000, 1000, 1500)
+    store.close()
+
+    queue = JobQueue(path, workers=1)
+    try:
+        job = queue.wait(job_id)
+        assert job["status"] == DONE
+        assert job["result"] == [2] * 1500
+    finally:
+        queue.close()
+
+
+def test_failed_job_and_ttl_cleanup(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(path)
+    job_id = store.create("password_batch", {"websites": [""]}, ttl=1)
+    run_job(path, job_id)
+    assert store.get(job_id)["status"] == "failed"
+    assert store.cleanup(now=time.time() + 10) == 1
+    assert store.get(job_id) is None
+
+
+def test_store_shared_by_threads(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+
+    def work(i):
+        job_id = store.create("count_batch", {"texts": [], "word": str(i)})
+        for seq in range(5):
+            store.append_chunk(job_id, seq, [i, seq], seq + 1, 5)
+        store.compact(job_id)
+        return store.get(job_id)
+
+    with ThreadPoolExecutor(8) as pool:
+        jobs = list(pool.map(work, range(64)))
+    for i, job in enumerate(jobs):
+        assert job["status"] == DONE and job["result"] == [x for seq in range(5) for x in (i, seq)]
+    store.close()
+
+
+def test_live_lease_is_not_taken_over(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(path)
+    job_id = store.create("count_batch", {"texts": ["a"] * 1500, "word": "a"})
+    assert store.claim(job_id, "worker-a")
+    assert store.append_chunk(job_id, 0, [1] * 1000, 1000, 1500, "worker-a")
+    # a second server starting on the same file leaves the claimed job alone
+    assert store.unfinished() == [] and not store.claim(job_id, "worker-b")
+    run_job(path, job_id)
+    assert store.get(job_id)["progress"] == 1000 and store.next_seq(job_id) == 1
+
+    # once the lease expires the job is resumed, and the old owner is shut out
+    store.db.execute("UPDATE jobs SET lease = 0 WHERE id = ?", (job_id,))
+    assert store.unfinished() == [job_id]
+    run_job(path, job_id)
+    job = store.get(job_id)
+    assert job["status"] == DONE and job["result"] == [1] * 1500
+    assert not store.append_chunk(job_id, 1, [1] * 500, 1500, 1500, "worker-a")
+    assert not store.compact(job_id, "worker-a")
+    store.close()
@@ -0,0 +1,84 @@
+import itertools
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import fastapi_app
+from lotto_history import DrawHistory
+from py_utils import generate_lotto_array
+
+
+def _expected(draws):
+    counts = np.zeros(46, int)
+    pairs = np.zeros((46, 46), int)
+    for draw in draws:
+        counts[draw] += 1
+        for a, b in itertools.permutations(draw, 2):
+            pairs[a, b] += 1
+    return counts, pairs
+
+
+def _gaps(draws, n):
+    seen = [i for i, d in enumerate(draws) if n in d]
+    if not seen:
+        return len(draws), len(draws), None
+    gaps = [seen[0]] + [b - a - 1 for a, b in zip(seen, seen[1:])] + [len(draws) - 1 - seen[-1]]
+    inner = [b - a - 1 for a, b in zip(seen, seen[1:])]
+    return gaps[-1], max(gaps), (sum(inner) / len(inner) if inner else None)
+
+
+def _check(history, draws):
+    counts, pairs = _expected(draws)
+    stats = history.stats()
+    assert stats["draws"] == len(draws) and stats["counts"] == counts[1:].tolist()
+    np.testing.assert_array_equal(np.triu(history.pairs, 1), np.triu(pairs, 1))
+    for n in range(1, 46):
+        current, longest, mean = _gaps(draws, n)
+        assert stats["gaps"]["current"][n - 1] == current
+        assert stats["gaps"]["max"][n - 1] == longest
+        assert stats["gaps"]["mean"][n - 1] == pytest.approx(mean)
+    window = draws[-history.window:]
+    wcounts, wpairs = _expected(window)
+    assert history.window_stats() == {"draws": len(window), "counts": wcounts[1:].tolist()}
+    np.testing.assert_array_equal(np.triu(history.window_pairs, 1), np.triu(wpairs, 1))
+    assert history.window_stats(7)["counts"] == _expected(draws[-7:])[0][1:].tolist()
+
+
+def test_incremental_matches_replay(tmp_path):
+    path = str(tmp_path / "h.u64")
+    draws = [row.tolist() for row in generate_lotto_array(300, seed=4)]
+    history = DrawHistory(path, window=50)
+    for i, draw in enumerate(draws[:200]):
+        assert history.record(draw) == i
+    _check(history, draws[:200])
+    history.close()
+    # reopened: aggregates rebuilt from the log, then updated again
+    history = DrawHistory(path, window=50)
+    _check(history, draws[:200])
+    for draw in draws[200:]:
+        history.record(draw)
+    _check(history, draws)
+    top = history.top_pairs(3)
+    counts, pairs = _expected(draws)
+    assert [p["count"] for p in top] == sorted(np.triu(pairs, 1).ravel(), reverse=True)[:3]
+    with pytest.raises(ValueError):
+        history.record([1, 1, 2])
+    with pytest.raises(ValueError):
+        history.record([])
+
+
+def test_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(fastapi_app, "_history", DrawHistory(str(tmp_path / "h.u64"), window=3))
+    client = TestClient(fastapi_app.app)
+    drawn = [client.get("/lotto").json() for _ in range(2)]
+    assert [d["draw"] for d in drawn] == [0, 1]
+    assert "draw" not in client.get("/lotto", params={"record": False}).json()
+    assert client.post("/lotto/history", json={"numbers": [1, 2, 3]}).json() == {"draw": 2}
+    assert client.post("/lotto/history", json={"numbers": [1, 99]}).status_code == 400
+    stats = client.get("/lotto/history").json()
+    assert stats["draws"] == 3 and sum(stats["counts"]) == 15 and len(stats["top_pairs"]) == 10
+    window = client.get("/lotto/history/window", params={"last": 1, "pairs": 3}).json()
+    assert window["draws"] == 1 and window["counts"][:4] == [1, 1, 1, 0]
+    assert [(p["a"], p["b"]) for p in window["top_pairs"]] == [(2, 3), (1, 3), (1, 2)]
+    assert client.get("/lotto/history/window", params={"last": 4}).status_code == 400
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import fastapi_app
+from lotto_tickets import TicketStore, decode_tickets, encode_tickets
+from py_utils import generate_lotto_array
+
+DRAW = [3, 11, 19, 27, 38, 42]
+
+
+def test_encode_decode():
+    tickets = [[1, 2, 3, 4, 5, 45], [45, 44, 10, 20, 30, 40]]
+    masks = encode_tickets(tickets)
+    assert masks.dtype == np.dtype("<u8")
+    assert decode_tickets(masks) == [sorted(t) for t in tickets]
+    for bad in ([[0, 1, 2]], [[1, 46, 2]], [[1, 1, 2]], [1, 2, 3], [[1.5, 2.0]]):
+        with pytest.raises(ValueError):
+            encode_tickets(bad)
+
+
+def test_match_against_brute_force(tmp_path):
+    store = TicketStore(str(tmp_path / "t.u64"))
+    tickets = generate_lotto_array(50_000, seed=1)
+    store.append(tickets[:20_000])
+    store.append(tickets[20_000:])
+    # a few sure winners
+    store.append([DRAW, DRAW[:5] + [7], DRAW[:5] + [8]])
+    result = TicketStore(store.path).match(DRAW, bonus=7, winners=1000)
+
+    matched = np.isin(tickets, DRAW).sum(axis=1)
+    has_bonus = (tickets == 7).any(axis=1)
+    expected = np.bincount(matched, minlength=7)
+    np.add.at(expected, [6, 5, 5], 1)
+    assert result["tickets"] == 50_003 and result["matches"] == expected.tolist()
+    assert result["tiers"]["6"] == 1
+    assert result["tiers"]["5+bonus"] == int(((matched == 5) & has_bonus).sum()) + 1
+    assert result["tiers"]["5"] == int(((matched == 5) & ~has_bonus).sum()) + 1
+    assert result["tiers"]["4"] == expected[4] and result["tiers"]["3"] == expected[3]
+    assert result["winners"] == np.flatnonzero(matched >= 5).tolist() + [50_000, 50_001, 50_002]
+
+    with pytest.raises(ValueError):
+        store.match(DRAW, bonus=3)
+    with pytest.raises(ValueError):
+        store.match([1, 1, 2, 3, 4, 5])
+    # the prize tiers are for 6/45 only
+    with pytest.raises(ValueError):
+        store.append([list(range(1, 46))])
+    with pytest.raises(ValueError):
+        store.match(DRAW[:5])
+    assert len(store) == 50_003
+
+
+def test_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(fastapi_app, "_tickets", TicketStore(str(tmp_path / "t.u64")))
+    client = TestClient(fastapi_app.app)
+    r = client.post("/lotto/tickets", json={"tickets": [DRAW, [1, 2, 3, 4, 5, 6]]})
+    assert r.json() == {"first": 0, "count": 2}
+    assert client.post("/lotto/tickets", json={"tickets": [[1, 2, 2, 3, 4, 5]]}).status_code == 400
+    assert client.post("/lotto/tickets", json={"tickets": [[1, 2], [3]]}).status_code == 400
+    assert client.post("/lotto/tickets", json={"tickets": [list(range(1, 46))]}).status_code == 400
+    r = client.post("/lotto/tickets/match", json={"numbers": DRAW, "bonus": 1})
+    assert r.json() == {"tickets": 2, "matches": [0, 1, 0, 0, 0, 0, 1],
+                        "tiers": {"6": 1, "5+bonus": 0, "5": 0, "4": 0, "3": 0}, "winners": [0]}
+    assert client.post("/lotto/tickets/match", json={"numbers": [0, 1]}).status_code == 400
+    assert client.post("/lotto/tickets/match", json={"numbers": list(range(1, 46))}).status_code == 400
@@ -0,0 +1,74 @@
+import io
+import json
+import sys
+import time
+
+from mcp_server import Server, serve_stdio
+
+
+def _wait_for(messages, msg_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for msg in messages:
+            if msg.get("id") == msg_id:
+                return msg
+        time.sleep(0.01)
+    raise AssertionError("no response")
+
+
+def test_tools_list_and_call():
+    messages = []
+    server = Server(messages.append)
+    server.handle({"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+    names = {t["name"] for t in _wait_for(messages, 1)["result"]["tools"]}
+    assert {"generate_lotto", "count_word_batch"} <= names
+
+    server.handle({"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+                   "params": {"name": "count_word", "arguments": {"text": "robot robot", "word": "robot"}}})
+    assert json.loads(_wait_for(messages, 2)["result"]["content"][0]["text"]) == 2
+
+
+def test_batch_streams_progress_and_partials():
+    messages = []
+    server = Server(messages.append, chunk_size=10)
+    server.handle({"jsonrpc": "2.0", "id": 7, "method": "tools/call",
+                   "params": {"name": "generate_lotto_batch", "arguments": {"n": 35},
+                              "_meta": {"progressToken": "t"}}})
+    result = json.loads(_wait_for(messages, 7)["result"]["content"][0]["text"])
+    assert len(result) == 35
+    progress = [m["params"]["progress"] for m in messages if m.get("method") == "notifications/progress"]
+    assert progress == [10, 20, 30, 35]
+    partial = [m for m in messages if m.get("params", {}).get("logger") == "partial_result"]
+    assert sum(len(m["params"]["data"]["items"]) for m in partial) == 35
+
+
+def test_heartbeat_while_running(monkeypatch):
+    import mcp_server
+
+    def slow(part, word):
+        time.sleep(0.3)
+        return [0] * len(part)
+
+    monkeypatch.setattr(mcp_server, "count_word_batch", slow)
+    messages = []
+    server = Server(messages.append, chunk_size=1, heartbeat=0.1)
+    server.handle({"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                   "params": {"name": "count_word_batch", "arguments": {"texts": ["a", "b"], "word": "a"}}})
+    _wait_for(messages, 1)
+    assert any(m.get("params", {}).get("logger") == "heartbeat" for m in messages)
+
+
+def test_unknown_method():
+    messages = []
+    Server(messages.append).handle({"jsonrpc": "2.0", "id": 3, "method": "nope"})
+    assert messages[0]["error"]["code"] == -32601
+
+
+def test_invalid_messages_on_stdio(monkeypatch, capsys):
+    lines = ["[1]", '"x"', "{", '{"jsonrpc": "2.0", "id": 4, "method": "tools/call", "params": [1]}',
+             '{"jsonrpc": "2.0", "id": 5, "method": "ping"}']
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+    serve_stdio(heartbeat=60)
+    replies = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r.get("error", {}).get("code") for r in replies] == [-32600, -32600, -32700, -32602, None]
+    assert replies[-1] == {"jsonrpc": "2.0", "id": 5, "result": {}}
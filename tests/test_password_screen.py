@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import fastapi_app
+from password_screen import PasswordFilter, build, build_from_file, main
+
+
+def test_build_and_lookup(tmp_path):
+    wordlist = tmp_path / "words.txt"
+    words = [f"word{i}" for i in range(20_000)] + ["goo63!", "pässwort"]
+    wordlist.write_text("\n".join(words) + "\n\n", encoding="utf-8")
+    path = str(tmp_path / "words.bloom")
+    info = build_from_file(str(wordlist), path, fp_rate=0.01)
+    assert info["entries"] == len(words) and info["hashes"] == 7
+
+    screen = PasswordFilter(path)
+    assert all(w in screen for w in words)
+    assert screen.contains_many(words).all()
+    others = [f"other{i}" for i in range(20_000)]
+    assert screen.contains_many(others).tolist() == [o in screen for o in others]
+    report = screen.report(probes=20_000, seed=0)
+    assert report["expected_fp_rate"] == pytest.approx(0.01, rel=0.1)
+    assert report["measured_fp_rate"] < 0.02 and 0.4 < report["fill"] < 0.6
+    screen.close()
+
+
+def test_invalid_files(tmp_path):
+    bad = tmp_path / "bad.bloom"
+    bad.write_bytes(b"PWBLOOM")
+    with pytest.raises(ValueError):
+        PasswordFilter(str(bad))
+    path = str(tmp_path / "ok.bloom")
+    build([b"a"], path, 1)
+    with open(path, "ab") as f:
+        f.write(b"\0")
+    with pytest.raises(ValueError):
+        PasswordFilter(path)
+    with pytest.raises(ValueError):
+        build([b"a"], path, 1, fp_rate=1.5)
+
+
+def test_cli(tmp_path, capsys):
+    wordlist = tmp_path / "words.txt"
+    wordlist.write_text("goo63!\nhunter2\n")
+    path = str(tmp_path / "w.bloom")
+    assert main(["build", str(wordlist), path]) == 0
+    assert main(["check", path, "hunter2", "correct horse"]) == 1
+    assert "hunter2\tlisted" in capsys.readouterr().out
+    assert main(["report", path, "--probes", "100"]) == 0
+
+
+def test_password_endpoint(tmp_path, monkeypatch):
+    path = str(tmp_path / "w.bloom")
+    build([b"goo62!"], path, 1)
+    monkeypatch.setattr(fastapi_app, "_password_filter", PasswordFilter(path))
+    client = TestClient(fastapi_app.app)
+    assert client.post("/password", json={"website": "https://www.google.com"}).status_code == 409
+    assert client.post("/password", json={"website": "example.com"}).json() == {"password": "exa70!"}
+    assert client.post("/password", json={"website": ""}).status_code == 400
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from profiling import SamplingProfiler, install
+
+HEADERS = {"X-Debug-Token": "secret"}
+
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def _work():
+    return sum(i * i for i in range(300_000))
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/alloc")
+    def alloc():
+        data = [bytes(1000) for _ in range(5000)]
+        return {"n": len(data)}
+
+    return app, install(app, "secret")
+
+
+def test_disabled_by_default():
+    app = FastAPI()
+    routes = len(app.routes)
+    assert install(app, None) is None
+    assert len(app.routes) == routes and not app.user_middleware
+
+
+def test_cpu_profile_collapsed_stacks():
+    client = TestClient(_app()[0])
+    assert client.get("/debug/profile/cpu", params={"seconds": 0.1}).status_code == 403
+    worker = threading.Thread(target=_spin, args=(0.5,))
+    worker.start()
+    r = client.get("/debug/profile/cpu", params={"seconds": 0.3}, headers=HEADERS)
+    worker.join()
+    assert r.status_code == 200 and int(r.headers["x-samples"]) > 10
+    lines = r.text.splitlines()
+    assert any("test_profiling.py:_spin" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_memory_profile_per_route_peaks():
+    app, tracker = _app()
+    client = TestClient(app)
+    result = {}
+    profiler = threading.Thread(target=lambda: result.update(client.get(
+        "/debug/profile/memory", params={"seconds": 0.5}, headers=HEADERS).json()))
+    profiler.start()
+    time.sleep(0.2)
+    client.get("/alloc")
+    profiler.join()
+    assert result["routes"]["GET /alloc"] > 4_000_000
+    assert result["top"] and {"site", "size", "count"} <= set(result["top"][0])
+    assert not tracker.enabled
+
+
+def test_sampling_overhead_is_bounded():
+    def best(runs=5):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            _work()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    baseline = best()
+    with SamplingProfiler() as profiler:
+        profiled = best()
+    assert profiler.samples > 0
+    assert profiled < baseline * 1.25
@@ -1,4 +1,20 @@
-from py_utils import generate_lotto, generate_password, count_word
+import numpy as np
+import pytest
+
+from py_utils import (
+    check_password_policy,
+    count_word,
+    count_word_batch,
+    count_word_modes,
+    generate_lotto,
+    generate_lotto_batch,
+    generate_password,
+    generate_password_batch,
+    generate_random_passwords,
+    grade_scores,
+    replace_words,
+    replace_words_stream,
+)
 
 
 def test_lotto():
@@ -15,3 +31,64 @@ def test_password():
 def test_count():
     text = "robot robot robot"
     assert count_word(text, "robot") == 3
+
+
+def test_count_modes():
+    text = "Robot robot robotics ROBOT. Cafe\u0301 café"
+    assert count_word(text, "robot", "ignorecase") == 4
+    assert count_word(text, "robot", "word") == 1
+    assert count_word(text, "CAFÉ", "normalized") == 2
+    assert count_word("Straße", "STRASSE", "normalized") == 1
+    assert count_word("aaaa", "aa", "overlapping") == 3
+    assert count_word_modes(text, "Robot", ["exact", "ignorecase", "word"]) == {
+        "exact": 1, "ignorecase": 4, "word": 1}
+    with pytest.raises(ValueError):
+        count_word(text, "robot", "fuzzy")
+
+
+def test_batches():
+    draws = generate_lotto_batch(3, 6)
+    assert len(draws) == 3 and all(len(set(d)) == 6 for d in draws)
+    assert generate_password_batch(["http://www.google.com.test"]) == ["goo62!"]
+    assert count_word_batch(["robot", "robot robot", ""], "robot") == [1, 2, 0]
+
+
+def test_replace_words():
+    mapping = {"robot": "AI", "rob": "X", "AI": "robot"}
+    text = "A robot robs. AI!"
+    assert replace_words(text, mapping) == "A AI Xs. robot!"
+    assert replace_words(text, {}) == text
+
+
+def test_replace_words_stream_matches_one_shot():
+    mapping = {"robot": "AI", "bots": "B"}
+    text = "robots robot bots " * 20
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert "".join(replace_words_stream(chunks, mapping)) == replace_words(text, mapping)
+
+
+def test_random_passwords_meet_policy():
+    passwords = generate_random_passwords(2000, 8)
+    assert len(passwords) == 2000 and len(set(passwords)) == 2000
+    assert all(len(p) == 8 and not check_password_policy(p) for p in passwords)
+    assert set("".join(generate_random_passwords(50, 12, ["digits"]))) <= set("0123456789")
+    assert check_password_policy("abc", ["lower", "digits"], min_length=4) == ["missing digits", "shorter than 4"]
+
+
+def test_grade_scores():
+    scores = [100, 96, 95, 91, 86, 81, 76, 71, 70, 0, -1]
+    expected = ["A+", "A+", "A", "A", "B+", "B", "C+", "C", "D", "D", None]
+    assert grade_scores(scores) == expected
+    assert grade_scores(np.array(scores)).tolist() == [g or "" for g in expected]
+    # fractional scores follow the reference chain (score > 95, > 90, ...)
+    fractional = [95.5, 95.0, 90.5, 70.01, 0.5, 0.0, -0.5]
+    expected = ["A+", "A", "A", "C", "D", "D", None]
+    assert grade_scores(fractional) == expected
+    assert grade_scores(np.array(fractional)).tolist() == [g or "" for g in expected]
+    assert grade_scores(fractional * 100)[:7] == expected
+    assert grade_scores([50, 50.5, 0, -1], [(50, "pass"), (0, "fail")]) == ["fail", "pass", "fail", None]
+    assert grade_scores([1], []) == [None]
+    odd = [float("nan"), float("inf"), 97]
+    assert grade_scores(odd) == [None, None, "A+"]
+    assert grade_scores(np.array(odd)).tolist() == ["", "", "A+"]
+    assert grade_scores(odd * 100)[:3] == [None, None, "A+"]
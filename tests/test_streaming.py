@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from fastapi_app import app
+from streaming import _encode_sse, stream_events
+
+
+async def _collect(source, **kwargs):
+    return [item async for item in stream_events(source, **kwargs)]
+
+
+def test_slow_producer_gets_heartbeats():
+    async def slow():
+        yield 1
+        await asyncio.sleep(0.25)
+        yield 2
+
+    items = asyncio.run(_collect(slow(), heartbeat=0.05))
+    assert items[0] == 1 and items[-1] == 2
+    assert items.count(None) >= 2
+    assert _encode_sse(None).startswith(":")
+
+
+def test_sync_producer_and_errors():
+    def gen():
+        yield "a"
+        raise ValueError("boom")
+
+    items = asyncio.run(_collect(gen(), heartbeat=1))
+    assert items[0] == "a"
+    assert isinstance(items[1], ValueError)
+    assert _encode_sse(items[1]).startswith("event: error")
+
+
+def test_disconnect_stops_producer():
+    stopped = []
+
+    async def endless():
+        try:
+            while True:
+                yield "x"
+                await asyncio.sleep(0.01)
+        finally:
+            stopped.append(True)
+
+    async def run():
+        calls = 0
+
+        async def is_disconnected():
+            nonlocal calls
+            calls += 1
+            return calls > 3
+
+        items = [i async for i in stream_events(endless(), 1, is_disconnected)]
+        await asyncio.sleep(0.05)
+        return items
+
+    assert len(asyncio.run(run())) == 3
+    assert stopped == [True]
+
+
+def test_stream_endpoints():
+    client = TestClient(app)
+    resp = client.get("/lotto/stream?n=2500&format=sse")
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = [json.loads(line[6:]) for line in resp.text.splitlines() if line.startswith("data: ")]
+    assert sum(len(e["numbers"]) for e in events) == 2500
+
+    resp = client.post("/count/stream", json={"texts": ["robot"] * 3, "word": "robot"})
+    lines = [json.loads(line) for line in resp.text.splitlines() if line]
+    assert lines == [{"offset": 0, "counts": [1, 1, 1]}]
+
+
+def test_heartbeat_must_be_positive():
+    with pytest.raises(ValueError):
+        asyncio.run(_collect([1], heartbeat=0))
+    client = TestClient(app)
+    assert client.get("/lotto/stream?n=1&heartbeat=0").status_code == 400
+    assert client.post("/topk?heartbeat=-1", content="a").status_code == 400
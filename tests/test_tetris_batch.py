@@ -0,0 +1,46 @@
+import numpy as np
+
+from tetris_batch import BatchTetris, bag_pieces
+from tetris_engine import PIECES, ROWS
+
+
+def test_bag_is_seven_bag_per_board():
+    seeds = np.arange(8, dtype=np.uint64)
+    for start in (0, 7, 70):
+        dealt = np.stack([bag_pieces(seeds, np.full(8, start + i)) for i in range(7)], axis=1)
+        assert all(sorted(row) == list(range(7)) for row in dealt.tolist())
+
+
+def test_seeded_games_repeat():
+    a, b = BatchTetris(4, seed=1), BatchTetris(4, seed=1)
+    for _ in range(20):
+        rot = np.zeros(4, int)
+        col = np.full(4, 3)
+        a.step(rot, col)
+        b.step(rot, col)
+    assert np.array_equal(a.boards, b.boards)
+
+
+def test_line_clear():
+    sim = BatchTetris(1, seed=0)
+    sim.boards[0, ROWS - 1, :] = True
+    sim.boards[0, ROWS - 1, 0] = False
+    sim.boards[0, ROWS - 2, 5] = True
+    # force an I piece standing upright in the hole (rotation 1 puts cells at x=2)
+    i_seed = next(s for s in range(1000)
+                  if bag_pieces(np.array([s], np.uint64), np.array([0]))[0] == PIECES.index("I"))
+    sim.seeds[:] = i_seed
+    cleared, valid = sim.step(np.array([1]), np.array([-2]))
+    assert valid.tolist() == [True]
+    assert cleared.tolist() == [1]
+    assert sim.boards[0, ROWS - 1].sum() == 1 + 1  # leftover I cell and the shifted block
+    assert sim.boards[0, ROWS - 1, 5]
+
+
+def test_out_of_bounds_action_is_ignored():
+    sim = BatchTetris(2, seed=0)
+    before = sim.current.copy()
+    cleared, valid = sim.step(np.array([0, 0]), np.array([-5, 3]))
+    assert valid.tolist() == [False, True]
+    assert sim.current[0] == before[0]
+    assert not sim.boards[0].any()
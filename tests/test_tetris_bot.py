@@ -0,0 +1,49 @@
+import tetris_bot
+from tetris_bot import Bot, _corners, board_rows, final_placements, search
+from tetris_engine import PIECES, Game
+
+
+def test_placements_on_empty_board():
+    rows = (0,) * 40
+    counts = {p: len(final_placements(rows, PIECES.index(p))) for p in PIECES}
+    assert counts == {"I": 17, "O": 9, "T": 34, "L": 34, "J": 34, "S": 17, "Z": 17}
+
+
+def test_tspin_slot_is_found():
+    game = Game(seed=0)
+    m = game.field.matrix
+    # T-spin double slot under an overhang at (3, 37)
+    m[38:, :] = 1
+    m[38, 3:6] = 0
+    m[39, 4] = 0
+    m[37, 3] = 1
+    finals, _, _ = search(board_rows(m), PIECES.index("T"))
+    assert finals[(2, 3, 37)]
+
+
+def test_bot_paths_replay_on_engine():
+    game = Game(seed=5)
+    bot = Bot(time_budget=0.02)
+    for _ in range(15):
+        move = bot.choose(game)
+        for action in move.path:
+            assert game.apply(action)
+    assert not game.over
+
+
+def test_root_level_respects_the_deadline(monkeypatch):
+    game = Game(seed=1)
+    scored = []
+    evaluate = tetris_bot.evaluate
+    monkeypatch.setattr(tetris_bot, "evaluate", lambda *args: scored.append(1) or evaluate(*args))
+    move = Bot(time_budget=0).choose(game)
+    # past the deadline: one placement scored, no hold or deeper levels
+    assert move is not None and not move.hold and len(scored) == 1
+    for action in move.path:
+        assert game.apply(action)
+
+
+def test_corners_outside_the_board():
+    empty = (0,) * 40
+    assert _corners(empty, 4, -1) == 2
+    assert _corners(empty, -1, 38) == 3
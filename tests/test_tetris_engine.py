@@ -0,0 +1,31 @@
+import random
+
+from tetris_engine import ACTIONS, Game
+
+
+def _slow_ghost(game):
+    y = game.y
+    while game.field.is_free(game.cells, game.x, y + 1):
+        y += 1
+    return y
+
+
+def test_height_map_ghost_matches_stepping():
+    rng = random.Random(0)
+    game = Game(seed=0)
+    for _ in range(3000):
+        if game.over:
+            game = Game(seed=rng.randrange(1000))
+        game.apply(rng.choice(ACTIONS))
+        assert game.ghost_y() == _slow_ghost(game)
+
+
+def test_heights_follow_lock_and_clear():
+    game = Game(seed=0)
+    for _ in range(60):
+        if game.over:
+            break
+        game.apply("hard_drop")
+        expected = list(game.field.heights)
+        game.field.update_heights()
+        assert game.field.heights == expected
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from tetris_bot import lock_rows, search
+from tetris_engine import COLS, MINO_DATA, PIECES, ROTATIONS, ROWS, SRS
+from tetris_perft import (BOARDS, _options, _queue, engine_placements, perft, perft_levels, reference,
+                          reference_lock, reference_options, reference_placements, search_cells)
+
+# (nodes, positions, T-spins, lines) per ply for the queue TIOLJSZ, pinned
+# from the current engine: a change here means move generation changed
+REFERENCE = {
+    "empty": [(34, 34, 0, 0), (600, 600, 0, 0)],
+    "tsd": [(37, 37, 4, 5), (647, 647, 0, 30)],
+    "well": [(34, 34, 1, 1), (599, 599, 0, 120)],
+    "garbage": [(34, 34, 0, 0), (590, 590, 0, 0)],
+}
+
+
+def test_depth_one_on_empty_board():
+    counts = {p: perft(BOARDS["empty"], p, 1) for p in PIECES}
+    assert counts == {"I": 17, "O": 9, "T": 34, "L": 34, "J": 34, "S": 17, "Z": 17}
+
+
+@pytest.mark.parametrize("board", sorted(REFERENCE))
+def test_reference_counts(board):
+    levels = perft_levels(BOARDS[board], "TIOLJSZ", 2)
+    assert [tuple(level) for level in levels] == REFERENCE[board]
+    assert perft(BOARDS[board], "TIOLJSZ", 2) == REFERENCE[board][-1][0]
+
+
+def test_hold_and_transpositions():
+    rows = BOARDS["tsd"]
+    levels = perft_levels(rows, "TIO", 3, hold=True)
+    assert [tuple(level) for level in levels] == [
+        (54, 54, 4, 6), (1748, 1748, 46, 83), (5986, 5984, 0, 13)]
+    assert perft(rows, "TIO", 3, hold=True, cached=True) == 5986
+    # same piece twice: different orders reach the same boards
+    levels = perft_levels(BOARDS["empty"], "TT", 2)
+    assert levels[1].nodes == perft(BOARDS["empty"], "TT", 2) == 1182
+    assert levels[1].positions == 816
+    with pytest.raises(ValueError):
+        perft(rows, "T", 2)
+
+
+@pytest.mark.parametrize("board", sorted(BOARDS))
+def test_search_matches_engine(board):
+    for piece in range(len(PIECES)):
+        assert search_cells(BOARDS[board], piece) == engine_placements(BOARDS[board], piece)
+
+
+# the port against the pygame original in docs/Tetris.py
+
+def test_tables_match_reference():
+    mino = reference()["mino"]
+    np.testing.assert_array_equal(mino.SRS, SRS)
+    for ours, theirs in zip(MINO_DATA, mino.minoData):
+        np.testing.assert_array_equal(ours, theirs)
+
+
+@pytest.mark.parametrize("board", sorted(BOARDS))
+def test_placements_match_reference(board):
+    for piece in range(len(PIECES)):
+        assert search_cells(BOARDS[board], piece) == reference_placements(BOARDS[board], piece)
+
+
+def test_line_clears_match_reference():
+    cleared = 0
+    for rows in BOARDS.values():
+        for piece, shapes in enumerate(ROTATIONS):
+            for r, x, y in search(rows, piece)[0]:
+                cells = frozenset((x + cx, y + cy) for cx, cy in shapes[r])
+                expected = lock_rows(rows, shapes[r], x, y)
+                assert reference_lock(rows, cells) == expected
+                cleared += expected[1]
+    assert cleared == 17
+    # the original only scans the visible rows 20-39; the engine clears any full row
+    full = (1 << COLS) - 1
+    rows = (0,) * 10 + (full,) + (0,) * (ROWS - 11)
+    cells = frozenset({(0, 39), (1, 39), (2, 39), (3, 39)})
+    assert reference_lock(rows, cells)[1] == 0
+    assert lock_rows(rows, tuple((x, 0) for x in range(4)), 0, 39)[1] == 1
+
+
+def test_hold_matches_reference():
+    queue = _queue("TIOTT")
+    for idx in range(len(queue)):
+        for hold in [None] + list(range(len(PIECES))):
+            assert reference_options(queue, idx, hold) == set(_options(queue, idx, hold, True))
@@ -0,0 +1,34 @@
+import pytest
+
+from tetris_replay import Recorder, board_hash, loads, play, record_bot, verify
+
+
+def test_roundtrip_reproduces_board():
+    data = record_bot(seed=7, pieces=20)
+    replay = loads(data)
+    assert replay.seed == 7
+    assert board_hash(play(replay)) == replay.board_hash
+    assert verify(data)
+
+
+def test_compact_encoding():
+    rec = Recorder(seed=1)
+    for i, action in enumerate(["left", "rotate_cw", "right", "hard_drop"] * 50):
+        rec.apply(action, i * 16)
+    data = rec.dumps()
+    # header + count varint + first input in one byte, the rest in two + hash
+    assert len(data) == 12 + 2 + 1 + 199 * 2 + 8
+    assert loads(data).events[-1] == (199 * 16, 7)
+
+
+def test_tampered_replay_fails():
+    data = bytearray(record_bot(seed=3, pieces=10))
+    data[-1] ^= 0xFF
+    assert not verify(bytes(data))
+
+
+def test_timestamps_must_increase():
+    rec = Recorder(seed=0)
+    rec.apply("left", 10)
+    with pytest.raises(ValueError):
+        rec.apply("left", 5)
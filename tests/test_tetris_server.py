@@ -0,0 +1,35 @@
+import numpy as np
+from fastapi.testclient import TestClient
+
+from fastapi_app import app
+from tetris_engine import ACTIONS, COLS, ROWS, Game
+from tetris_server import decode_frame, render
+
+
+def test_session_streams_board_diffs():
+    client = TestClient(app)
+    board = np.zeros(ROWS * COLS, np.uint8)
+    with client.websocket_connect("/tetris/ws?seed=4") as ws:
+        decode_frame(ws.receive_bytes(), board)
+        expected = Game(seed=4)
+        assert np.array_equal(board, render(expected))
+
+        inputs = ["left", "rotate_cw", "hard_drop"]
+        ws.send_bytes(bytes(ACTIONS.index(a) for a in inputs))
+        for action in inputs:
+            expected.apply(action)
+        decode_frame(ws.receive_bytes(), board)
+        assert np.array_equal(board, render(expected))
+
+
+def test_text_frames_are_ignored():
+    client = TestClient(app)
+    board = np.zeros(ROWS * COLS, np.uint8)
+    with client.websocket_connect("/tetris/ws?seed=4") as ws:
+        decode_frame(ws.receive_bytes(), board)
+        expected = Game(seed=4)
+        ws.send_text("hard_drop")
+        ws.send_bytes(bytes([ACTIONS.index("hard_drop")]))
+        expected.apply("hard_drop")
+        decode_frame(ws.receive_bytes(), board)
+        assert np.array_equal(board, render(expected))
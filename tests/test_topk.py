@@ -0,0 +1,53 @@
+from collections import Counter
+
+import numpy as np
+
+from topk import CountMinSketch, SpaceSaving, TopK, terms
+
+
+def _stream(n, seed=0):
+    ids = np.random.default_rng(seed).zipf(1.3, n)
+    return [f"w{i}" for i in ids]
+
+
+def test_terms_and_exact():
+    assert list(terms("The cat, the HAT", ngram=2)) == ["the cat", "cat the", "the hat"]
+    top = TopK(k=2)
+    top.update("a b a c a b")
+    assert top.top() == [("a", 3, 0), ("b", 2, 0)]
+
+
+def test_sketches_bound_true_counts():
+    words = _stream(200_000)
+    exact = Counter(words)
+    top = TopK(k=10, epsilon=1e-3, max_exact=1000)
+    for i in range(0, len(words), 10_000):
+        top.update(" ".join(words[i:i + 10_000]))
+    assert top.result()["method"] == "sketch"
+    assert [t for t, _, _ in top.top()] == [t for t, _ in exact.most_common(10)]
+    assert all(c - e <= exact[t] <= c for t, c, e in top.top())
+
+    cms = CountMinSketch.from_error(1e-3, 1e-3)
+    cms.add(exact)
+    est = cms.estimate(list(exact))
+    true = np.fromiter(exact.values(), np.int64)
+    assert (est >= true).all()
+    # the epsilon * N bound holds per key with probability 1 - delta
+    assert (est - true > 1e-3 * len(words)).mean() <= 2 * 1e-3
+
+
+def test_shards_merge():
+    a_words, b_words = _stream(50_000, 1), _stream(50_000, 2)
+    exact = Counter(a_words + b_words)
+    a, b = SpaceSaving(200), SpaceSaving(500)
+    a.add(Counter(a_words))
+    b.add(Counter(b_words))
+    a.merge(b)
+    assert a.total == 100_000 and len(a.counts) == 200
+    assert all(c - e <= exact[t] <= c for t, c, e in a.top(50))
+    assert [t for t, _, _ in a.top(5)] == [t for t, _ in exact.most_common(5)]
+
+    x, y = TopK(k=5), TopK(k=5, method="sketch")
+    x.update(" ".join(a_words))
+    y.update(" ".join(b_words))
+    assert [t for t, _, _ in x.merge(y).top()] == [t for t, _ in exact.most_common(5)]
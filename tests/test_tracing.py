@@ -0,0 +1,130 @@
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+import tracing
+from tracing import (
+    JsonlExporter,
+    RingBufferExporter,
+    TracedJSONResponse,
+    TracedRoute,
+    Tracer,
+    install,
+    parse_traceparent,
+    span,
+)
+
+PARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+class Item(BaseModel):
+    text: str
+
+
+def _app(rate=1.0, exporter=None):
+    app = FastAPI(default_response_class=TracedJSONResponse)
+    app.router.route_class = TracedRoute
+
+    @app.post("/items")
+    def create(item: Item):
+        with span("work", length=len(item.text)):
+            return {"length": len(item.text)}
+
+    @app.post("/raw")
+    async def raw(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+
+    tracer = install(app, Tracer(rate, exporter))
+    return app, tracer
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(PARENT) == ("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7", True)
+    assert parse_traceparent(PARENT[:-2] + "00")[2] is False
+    for bad in (None, "", "00-abc-def-01", "ff" + PARENT[2:], "00-" + "0" * 32 + PARENT[35:]):
+        assert parse_traceparent(bad) is None
+
+
+def test_request_spans_nest():
+    app, tracer = _app()
+    r = TestClient(app).post("/items", json={"text": "hello"})
+    assert r.json() == {"length": 5}
+    spans = {s["name"]: s for s in tracer.exporter.recent()}
+    assert set(spans) == {"POST /items", "http.body", "validation", "handler create", "work", "serialize"}
+    root = spans["POST /items"]
+    assert root["parent_id"] is None and root["attributes"]["http.status_code"] == 200
+    assert {s["trace_id"] for s in spans.values()} == {root["trace_id"]}
+    for name in ("http.body", "validation", "handler create"):
+        assert spans[name]["parent_id"] == root["span_id"]
+    assert spans["work"]["parent_id"] == spans["handler create"]["span_id"]
+    assert spans["validation"]["end_ns"] <= spans["handler create"]["start_ns"]
+    assert r.headers["traceparent"] == f"00-{root['trace_id']}-{root['span_id']}-01"
+
+
+def test_incoming_traceparent_is_continued():
+    app, tracer = _app(rate=0.0)
+    client = TestClient(app)
+    client.post("/items", json={"text": "x"}, headers={"traceparent": PARENT})
+    root = tracer.exporter.recent()[-1]
+    assert root["trace_id"] == PARENT[3:35] and root["parent_id"] == PARENT[36:52]
+    # an unsampled parent is honoured even at rate 1
+    app, tracer = _app(rate=1.0)
+    r = TestClient(app).post("/items", json={"text": "x"}, headers={"traceparent": PARENT[:-2] + "00"})
+    assert not tracer.exporter.recent() and r.headers["traceparent"].endswith("-00")
+
+
+def test_head_sampling_rate():
+    app, tracer = _app(rate=0.0)
+    client = TestClient(app)
+    for _ in range(20):
+        client.post("/items", json={"text": "x"})
+    assert not tracer.exporter.recent()
+    tracer = Tracer(0.25)
+    sampled = sum(tracer.start_root("r").sampled for _ in range(20_000))
+    assert 0.22 < sampled / 20_000 < 0.28
+    with pytest.raises(ValueError):
+        Tracer(1.5)
+
+
+def test_streaming_body_untouched():
+    app, tracer = _app()
+    r = TestClient(app).post("/raw", content=iter([b"a" * 1000, b"b" * 1000]))
+    assert r.json() == {"size": 2000}
+    names = {s["name"] for s in tracer.exporter.recent()}
+    assert "http.body" not in names and "handler raw" in names
+
+
+def test_ring_buffer_bounded():
+    exporter = RingBufferExporter(size=4)
+    app, _ = _app(exporter=exporter)
+    client = TestClient(app)
+    for _ in range(3):
+        client.post("/items", json={"text": "x"})
+    assert len(exporter.recent()) == 4
+
+
+def test_jsonl_exporter(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonlExporter(str(path), batch_size=2, interval=0.01)
+    app, _ = _app(exporter=exporter)
+    TestClient(app).post("/items", json={"text": "x"})
+    exporter.close()
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(spans) == 6 and len({s["trace_id"] for s in spans}) == 1
+    assert all(s["duration_us"] >= 0 for s in spans)
+
+
+def test_helpers_are_pass_through_without_tracer(monkeypatch):
+    app, tracer = _app()
+    monkeypatch.setattr(tracing, "_enabled", False)
+    assert span("x") is tracing._NOOP
+    r = TestClient(app).post("/items", json={"text": "hello"})
+    # the middleware still runs, but no route, handler or response spans
+    assert r.json() == {"length": 5}
+    assert [s["name"] for s in tracer.exporter.recent()] == ["POST /items"]
@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import wire_formats
+from fastapi_app import app
+from wire_formats import ARROW, JSON, MSGPACK, decode, encode, negotiate
+
+client = TestClient(app)
+
+
+def test_negotiate_falls_back_to_json():
+    assert negotiate("*/*") == JSON
+    assert negotiate("text/html, application/json;q=0.9") == JSON
+    assert negotiate("application/unknown") == JSON
+
+
+def test_json_encodes_arrays():
+    data = {"a": np.arange(3, dtype=np.uint8), "b": np.int64(4), "c": [1, 2]}
+    assert decode(encode(data, JSON), JSON) == {"a": [0, 1, 2], "b": 4, "c": [1, 2]}
+
+
+def test_lotto_and_count_batch_json():
+    r = client.get("/lotto/batch", params={"n": 500, "count": 6, "seed": 1})
+    numbers = np.array(r.json()["numbers"])
+    assert r.headers["content-type"] == JSON and "Accept" in r.headers["vary"].split(", ")
+    assert numbers.shape == (500, 6) and numbers.min() >= 1 and numbers.max() <= 45
+    assert all(len(set(row)) == 6 for row in numbers.tolist())
+    assert r.json() == client.get("/lotto/batch", params={"n": 500, "count": 6, "seed": 1}).json()
+    assert client.get("/lotto/batch", params={"n": -1}).status_code == 400
+
+    r = client.post("/count/batch", json={"texts": ["a b a", "b", ""], "word": "a"})
+    assert r.json() == {"counts": [2, 0, 0]}
+    assert client.post("/count/batch", json={"texts": [], "word": "a", "mode": "x"}).status_code == 400
+
+
+def test_unavailable_format_rejected(monkeypatch):
+    monkeypatch.setattr(wire_formats, "msgpack", None)
+    r = client.post("/count/batch", content=b"\x80", headers={"content-type": MSGPACK})
+    assert r.status_code == 415
+    r = client.get("/lotto/batch", params={"n": 2}, headers={"accept": MSGPACK})
+    assert r.headers["content-type"] == JSON
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    r = client.get("/lotto/batch", params={"n": 1000, "seed": 2}, headers={"accept": MSGPACK})
+    assert r.headers["content-type"] == MSGPACK
+    body = decode(r.content, MSGPACK)
+    expected = client.get("/lotto/batch", params={"n": 1000, "seed": 2}).json()
+    assert body["numbers"].dtype == np.uint8 and body["numbers"].tolist() == expected["numbers"]
+    r = client.post("/count/batch", content=msgpack.packb({"texts": ["x x", "y"], "word": "x"}),
+                    headers={"content-type": MSGPACK, "accept": MSGPACK})
+    assert decode(r.content, MSGPACK)["counts"].tolist() == [2, 0]
+    r = client.post("/count", content=msgpack.packb({"text": "x x", "word": "x"}),
+                    headers={"content-type": MSGPACK, "accept": MSGPACK})
+    assert msgpack.unpackb(r.content) == {"count": 2}
+    # malformed bodies are a 400, not an unsupported type
+    bad_array = {"texts": {"nd": True, "type": "<u1", "shape": [3], "data": b"ab"}, "word": "x"}
+    for body in (msgpack.packb({"texts": ["x"], "word": "x"}) + b"\x01", msgpack.packb(bad_array), b"\xc1"):
+        r = client.post("/count/batch", content=body, headers={"content-type": MSGPACK})
+        assert r.status_code == 400
+
+
+def test_arrow_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    r = client.get("/lotto/batch", params={"n": 1000, "seed": 3}, headers={"accept": ARROW})
+    assert r.headers["content-type"] == ARROW
+    body = decode(r.content, ARROW)
+    expected = client.get("/lotto/batch", params={"n": 1000, "seed": 3}).json()
+    assert body["count"] == 6 and body["numbers"].tolist() == expected["numbers"]
+    batch = pa.RecordBatch.from_arrays([pa.array(["x x", "y"])], names=["texts"])
+    batch = batch.replace_schema_metadata({"fields": '{"word": "x"}'})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    r = client.post("/count/batch", content=sink.getvalue().to_pybytes(),
+                    headers={"content-type": ARROW, "accept": ARROW})
+    assert decode(r.content, ARROW)["counts"].tolist() == [2, 0]
+    # not tabular: answered in JSON
+    r = client.get("/health", headers={"accept": ARROW})
+    assert r.headers["content-type"] == JSON and r.json() == {"status": "ok"}
@@ -0,0 +1,131 @@
+"""Vectorized simulator that plays many Tetris games at once.
+
+All boards live in one ``(B, ROWS, COLS)`` boolean array and every step
+places one piece per board with whole-array operations, so the cost of a
+step is dominated by NumPy rather than by a Python loop over games.
+
+Actions are final placements: a rotation state and the x position of the
+piece's bounding box, followed by a hard drop.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from tetris_engine import COLS, PIECES, ROTATIONS, ROWS, SPAWN_Y
+
+N_PIECES = len(PIECES)
+
+# OFFSETS[p, r] -> (4, 2) cells of piece p in rotation state r
+OFFSETS = np.array([[list(state) for state in states] for states in ROTATIONS], dtype=np.int64)
+_MIN_X = OFFSETS[..., 0].min(axis=2)
+_MAX_X = OFFSETS[..., 0].max(axis=2)
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    z = x + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * _MIX1
+    z = (z ^ (z >> np.uint64(27))) * _MIX2
+    return z ^ (z >> np.uint64(31))
+
+
+def bag_pieces(seeds: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """Return the piece dealt at position ``index`` for each board.
+
+    Each board runs an independent 7-bag (the rule used by
+    ``bag.generateBag``): bag ``index // 7`` is a permutation of all seven
+    pieces derived from the board's seed, so any position can be looked up
+    without keeping a queue per board.
+    """
+    index = np.asarray(index, dtype=np.uint64)
+    bag_no = index // np.uint64(N_PIECES)
+    slots = np.arange(N_PIECES, dtype=np.uint64)
+    keys = _splitmix64(seeds[:, None] ^ _splitmix64(bag_no[:, None] * np.uint64(8) + slots))
+    perm = np.argsort(keys, axis=1)
+    pos = (index % np.uint64(N_PIECES)).astype(np.int64)
+    return perm[np.arange(len(seeds)), pos]
+
+
+class BatchTetris:
+    """``batch_size`` independent games advanced together."""
+
+    def __init__(self, batch_size: int, seed: Optional[int] = None):
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        self.batch_size = batch_size
+        self.seeds = np.random.SeedSequence(seed).generate_state(batch_size, dtype=np.uint64)
+        self.boards = np.zeros((batch_size, ROWS, COLS), dtype=bool)
+        self.piece_index = np.zeros(batch_size, dtype=np.int64)
+        self.lines = np.zeros(batch_size, dtype=np.int64)
+        self.game_over = np.zeros(batch_size, dtype=bool)
+        self._rows = np.arange(batch_size)
+
+    @property
+    def current(self) -> np.ndarray:
+        """Piece index (into ``PIECES``) each board has to place next."""
+        return bag_pieces(self.seeds, self.piece_index)
+
+    def preview(self, n: int = 5) -> np.ndarray:
+        """Return the next ``n`` pieces after the current one, shape (B, n)."""
+        return np.stack([bag_pieces(self.seeds, self.piece_index + i + 1) for i in range(n)], axis=1)
+
+    def column_heights(self) -> np.ndarray:
+        """Row index of the highest filled cell per column (ROWS when empty)."""
+        filled = self.boards.any(axis=1)
+        return np.where(filled, self.boards.argmax(axis=1), ROWS)
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        """Start new games on the boards selected by ``mask`` (default: all)."""
+        if mask is None:
+            mask = np.ones(self.batch_size, dtype=bool)
+        self.boards[mask] = False
+        self.lines[mask] = 0
+        self.game_over[mask] = False
+
+    def step(self, rotations: np.ndarray, columns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Hard drop the current piece of every board.
+
+        Returns ``(cleared, valid)``: lines cleared by this step and which
+        boards accepted their action. Placements that leave the board and
+        boards whose game is over are ignored and keep their piece.
+        """
+        rotations = np.asarray(rotations, dtype=np.int64) % 4
+        columns = np.asarray(columns, dtype=np.int64)
+        pieces = self.current
+
+        valid = (~self.game_over
+                 & (columns + _MIN_X[pieces, rotations] >= 0)
+                 & (columns + _MAX_X[pieces, rotations] < COLS))
+        cells = OFFSETS[pieces, rotations]
+        xs = np.clip(columns[:, None] + cells[:, :, 0], 0, COLS - 1)
+        ys = cells[:, :, 1]
+
+        # the piece rests one row above the first cell it would hit
+        tops = self.column_heights()[self._rows[:, None], xs]
+        drop_y = (tops - ys).min(axis=1) - 1
+        topped = valid & (drop_y < SPAWN_Y)
+        self.game_over |= topped
+        place = valid & ~topped
+
+        b = np.repeat(self._rows[place], 4)
+        self.boards[b, (drop_y[place, None] + ys[place]).ravel(), xs[place].ravel()] = True
+        self.piece_index[valid] += 1
+
+        cleared = self._clear_lines()
+        self.lines += cleared
+        return cleared, valid
+
+    def _clear_lines(self) -> np.ndarray:
+        full = self.boards.all(axis=2)
+        cleared = full.sum(axis=1)
+        hit = np.nonzero(cleared)[0]
+        if len(hit):
+            # stable sort pulls full rows to the top, keeping the order of the rest
+            order = np.argsort(~full[hit], axis=1, kind="stable")
+            kept = np.take_along_axis(self.boards[hit], order[:, :, None], axis=1)
+            kept[np.arange(ROWS)[None, :] < cleared[hit, None]] = False
+            self.boards[hit] = kept
+        return cleared
@@ -0,0 +1,305 @@
+"""Placement-search bot for the headless Tetris engine.
+
+Every reachable final placement of the current piece (and of the hold
+piece) is found with a breadth-first search over left/right/soft drop and
+the SRS rotations from ``tetris_engine``. Placements are scored with a
+weighted heuristic and a beam search looks ahead through the preview
+queue until the per-move time budget runs out.
+"""
+import heapq
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tetris_engine import COLS, KICKS, PIECES, ROTATIONS, ROWS, SPAWNS, Game
+
+FULL_ROW = (1 << COLS) - 1
+T_PIECE = PIECES.index("T")
+# aggregate height, holes, bumpiness and lines follow the well known
+# hand-tuned weights; a T-spin is rewarded on top of its lines
+DEFAULT_WEIGHTS = {"height": -0.51, "holes": -0.36, "bumpiness": -0.18, "lines": 0.76, "tspin": 1.5}
+
+Rows = Tuple[int, ...]
+State = Tuple[int, int, int]
+# (name, rotation, dx, dy)
+MOVES = (
+    ("left", 0, -1, 0),
+    ("right", 0, 1, 0),
+    ("soft_drop", 0, 0, 1),
+    ("rotate_cw", 1, 0, 0),
+    ("rotate_ccw", -1, 0, 0),
+    ("rotate_180", 2, 0, 0),
+)
+
+
+class Placement(NamedTuple):
+    hold: bool
+    piece: int
+    rotation: int
+    x: int
+    y: int
+    tspin: bool
+    score: float
+    path: Tuple[str, ...]
+
+
+def board_rows(matrix: np.ndarray) -> Rows:
+    """Pack a field matrix into one bitmask per row (bit i = column i)."""
+    weights = 1 << np.arange(COLS)
+    return tuple(int(v) for v in (matrix != 0).astype(np.int64) @ weights)
+
+
+def _fits(rows: Rows, cells, x: int, y: int) -> bool:
+    for cx, cy in cells:
+        px, py = x + cx, y + cy
+        if px < 0 or px >= COLS or py < 0 or py >= ROWS or rows[py] >> px & 1:
+            return False
+    return True
+
+
+def lock_rows(rows: Rows, cells, x: int, y: int) -> Tuple[Rows, int]:
+    """Board after locking ``cells`` at ``(x, y)``, and the number of lines cleared."""
+    board = list(rows)
+    for cx, cy in cells:
+        board[y + cy] |= 1 << (x + cx)
+    kept = [row for row in board if row != FULL_ROW]
+    cleared = ROWS - len(kept)
+    return (0,) * cleared + tuple(kept), cleared
+
+
+def _corners(rows: Rows, x: int, y: int) -> int:
+    filled = 0
+    for px, py in ((x, y), (x + 2, y), (x, y + 2), (x + 2, y + 2)):
+        if px < 0 or px >= COLS or py < 0 or py >= ROWS or rows[py] >> px & 1:
+            filled += 1
+    return filled
+
+
+def search(rows: Rows, piece: int, start: Optional[State] = None):
+    """Breadth-first search of every state the piece can reach.
+
+    Returns ``(finals, parents, spun)``: ``finals`` maps each distinct
+    resting placement ``(rotation, x, y)`` to whether it is a T-spin,
+    ``parents`` and ``spun`` hold the moves used to reach each state
+    (``spun`` only those entered by a rotation) for path reconstruction.
+    """
+    if start is None:
+        start = (0,) + SPAWNS[piece]
+    shapes = ROTATIONS[piece]
+    if not _fits(rows, shapes[start[0]], start[1], start[2]):
+        return {}, {}, {}
+    parents: Dict[State, Optional[Tuple[State, str]]] = {start: None}
+    spun: Dict[State, Tuple[State, str]] = {}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        r, x, y = state
+        for action, d, dx, dy in MOVES:
+            if d:
+                nr = (r + d) % 4
+                for kx, ky in KICKS[piece][r][nr]:
+                    if _fits(rows, shapes[nr], x + kx, y + ky):
+                        nxt = (nr, x + kx, y + ky)
+                        break
+                else:
+                    continue
+                spun.setdefault(nxt, (state, action))
+            else:
+                nxt = (r, x + dx, y + dy)
+                if not _fits(rows, shapes[r], nxt[1], nxt[2]):
+                    continue
+            if nxt not in parents:
+                parents[nxt] = (state, action)
+                queue.append(nxt)
+
+    finals: Dict[State, bool] = {}
+    seen_cells = {}
+    for state in parents:
+        r, x, y = state
+        if _fits(rows, shapes[r], x, y + 1):
+            continue
+        tspin = piece == T_PIECE and state in spun and _corners(rows, x, y) >= 3
+        # rotations that cover the same cells (O, S, Z, I) are one placement
+        cells = frozenset((x + cx, y + cy) for cx, cy in shapes[r])
+        other = seen_cells.get(cells)
+        if other is None:
+            seen_cells[cells] = state
+            finals[state] = tspin
+        elif tspin and not finals[other]:
+            del finals[other]
+            seen_cells[cells] = state
+            finals[state] = True
+    return finals, parents, spun
+
+
+def path_to(parents, spun, state: State, tspin: bool = False) -> Tuple[str, ...]:
+    """Inputs that move the piece from its start to ``state`` and lock it."""
+    path = ["hard_drop"]
+    step = spun[state] if tspin else parents[state]
+    while step is not None:
+        state, action = step
+        path.append(action)
+        step = parents[state]
+    return tuple(reversed(path))
+
+
+@lru_cache(maxsize=65536)
+def final_placements(rows: Rows, piece: int) -> Tuple[Tuple[int, int, int, bool], ...]:
+    """Cached resting placements from spawn, keyed on the board and piece."""
+    finals = search(rows, piece)[0]
+    return tuple(state + (tspin,) for state, tspin in finals.items())
+
+
+@lru_cache(maxsize=65536)
+def board_features(rows: Rows) -> Tuple[int, int, int]:
+    """Aggregate height, holes and bumpiness of a board."""
+    heights = [0] * COLS
+    seen = holes = 0
+    for i, row in enumerate(rows):
+        new = row & ~seen
+        while new:
+            low = new & -new
+            heights[low.bit_length() - 1] = ROWS - i
+            new ^= low
+        holes += (seen & ~row).bit_count()
+        seen |= row
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    return sum(heights), holes, bumpiness
+
+
+def evaluate(rows: Rows, cleared: int, tspin: bool, weights: Dict[str, float]) -> float:
+    height, holes, bumpiness = board_features(rows)
+    score = (weights["height"] * height + weights["holes"] * holes
+             + weights["bumpiness"] * bumpiness + weights["lines"] * cleared)
+    if tspin:
+        score += weights["tspin"] * (1 + cleared)
+    return score
+
+
+def expand(rows: Rows, hold: Optional[int], idx: int, seq: Sequence[int],
+           weights: Tuple[Tuple[str, float], ...]) -> list:
+    """Children of one beam node: ``(score, rows, hold, idx, move)`` tuples.
+
+    ``move`` is ``(used_hold, piece, rotation, x, y, tspin)``. Runs in pool
+    workers, so the arguments are plain picklable values.
+    """
+    weights = dict(weights)
+    options = [(seq[idx], hold, idx + 1, False)]
+    if hold is None:
+        if idx + 1 < len(seq):
+            options.append((seq[idx + 1], seq[idx], idx + 2, True))
+    elif hold != seq[idx]:
+        options.append((hold, seq[idx], idx + 1, True))
+    children = []
+    for piece, new_hold, new_idx, used_hold in options:
+        shapes = ROTATIONS[piece]
+        for r, x, y, tspin in final_placements(rows, piece):
+            new_rows, cleared = lock_rows(rows, shapes[r], x, y)
+            score = evaluate(new_rows, cleared, tspin, weights)
+            children.append((score, new_rows, new_hold, new_idx, (used_hold, piece, r, x, y, tspin)))
+    return children
+
+
+class Bot:
+    """Beam search over the preview queue within a fixed time budget per move.
+
+    With ``workers`` > 1 the beam nodes of each level are expanded in a
+    process pool; placement lists and board features are cached per process
+    on the board bitmasks, so transpositions are only searched once.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, beam_width: int = 8,
+                 preview: int = 5, time_budget: float = 0.2, workers: int = 0):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.beam_width = beam_width
+        self.preview = preview
+        self.time_budget = time_budget
+        self.pool = ProcessPoolExecutor(workers) if workers > 1 else None
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _level(self, beam, seq, deadline: float):
+        """Expand every node of ``beam``; None when the deadline passed first."""
+        weights = tuple(self.weights.items())
+        if self.pool is None:
+            results = []
+            for _, rows, hold, idx, _ in beam:
+                if time.perf_counter() > deadline:
+                    return None
+                results.append(expand(rows, hold, idx, seq, weights))
+        else:
+            futures = [self.pool.submit(expand, rows, hold, idx, seq, weights)
+                       for _, rows, hold, idx, _ in beam]
+            _, pending = wait(futures, timeout=max(0.0, deadline - time.perf_counter()))
+            if pending:
+                for fut in pending:
+                    fut.cancel()
+                return None
+            results = [fut.result() for fut in futures]
+        return self._select(beam, results)
+
+    def _select(self, beam, results):
+        best: Dict[tuple, tuple] = {}
+        for (total, _, _, _, first), children in zip(beam, results):
+            for score, rows, hold, idx, move in children:
+                node = (total + score, rows, hold, idx, first or move)
+                key = (rows, hold, idx)
+                if key not in best or best[key][0] < node[0]:
+                    best[key] = node
+        return heapq.nlargest(self.beam_width, best.values(), key=lambda n: n[0])
+
+    def choose(self, game: Game) -> Optional[Placement]:
+        """Pick the placement for the current piece, or None when topped out.
+
+        The current piece's placements are always found, but evaluating them
+        (and the hold alternatives) stops at the deadline once one has been
+        scored; deeper levels are added while the time budget lasts.
+        """
+        deadline = time.perf_counter() + self.time_budget
+        seq = [game.piece] + game.bag.now_queue[:self.preview]
+        rows = board_rows(game.field.matrix)
+
+        # the current piece starts from where it is now, a held one from spawn
+        finals, parents, spun = search(rows, game.piece, (game.rotation, game.x, game.y))
+        root = []
+        for (r, x, y), tspin in finals.items():
+            if root and time.perf_counter() > deadline:
+                break
+            new_rows, cleared = lock_rows(rows, ROTATIONS[game.piece][r], x, y)
+            score = evaluate(new_rows, cleared, tspin, self.weights)
+            root.append((score, new_rows, game.hold, 1, (False, game.piece, r, x, y, tspin)))
+        if not game.hold_used and time.perf_counter() <= deadline:
+            held = expand(rows, game.hold, 0, seq, tuple(self.weights.items()))
+            root += [child for child in held if child[4][0]]
+        best = self._select([(0.0, rows, game.hold, 0, None)], [root])
+        if not best:
+            return None
+
+        while True:
+            beam = [node for node in best if node[3] < len(seq)]
+            level = self._level(beam, seq, deadline) if beam else None
+            if not level:
+                break
+            best = level
+
+        total = best[0][0]
+        used_hold, piece, r, x, y, tspin = best[0][4]
+        if used_hold:
+            _, parents, spun = search(rows, piece)
+            path = ("hold",) + path_to(parents, spun, (r, x, y), tspin)
+        else:
+            path = path_to(parents, spun, (r, x, y), tspin)
+        return Placement(used_hold, piece, r, x, y, tspin, total, path)
@@ -0,0 +1,289 @@
+"""Headless Tetris engine shared by the simulators and tools.
+
+Piece tables, rotation states and SRS kick data are ported from
+``docs/Tetris.py`` so that every tool here agrees with the pygame version.
+Pieces are referred to by their index into ``PIECES`` (0..6).
+"""
+import random
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+ROWS = 40
+COLS = 10
+# rows 0..19 are the hidden buffer above the visible playfield
+VISIBLE_TOP = 20
+SPAWN_Y = 19
+PIECES = "IOTLJSZ"
+
+# Same layout as mino.minoData: rows 0-3 are (x, y) cells, row 4 is
+# (colour, rotation state) and row 5 is the spawn position.
+MINO_DATA = [
+    np.array([[0, 1], [1, 1], [2, 1], [3, 1], [1, 0], [3, 19]]),
+    np.array([[0, 0], [0, 1], [1, 0], [1, 1], [2, 0], [4, 19]]),
+    np.array([[0, 1], [1, 0], [1, 1], [2, 1], [3, 0], [3, 19]]),
+    np.array([[0, 1], [1, 1], [2, 0], [2, 1], [4, 0], [3, 19]]),
+    np.array([[0, 0], [0, 1], [1, 1], [2, 1], [5, 0], [3, 19]]),
+    np.array([[0, 1], [1, 0], [1, 1], [2, 0], [6, 0], [3, 19]]),
+    np.array([[0, 0], [1, 0], [1, 1], [2, 1], [7, 0], [3, 19]]),
+]
+ROT_MAT = np.array([[[1, 0], [0, 1]], [[0, -1], [1, 0]], [[-1, 0], [0, -1]], [[0, 1], [-1, 0]]])
+SRS2 = np.zeros((4, 5, 2), int)
+SRS3 = np.array([[[0, 0], [0, 0], [0, 0], [0, 0], [0, 0]],
+                 [[0, 0], [1, 0], [1, 1], [0, -2], [1, -2]],
+                 [[0, 0], [0, 0], [0, 0], [0, 0], [0, 0]],
+                 [[0, 0], [-1, 0], [-1, 1], [0, -2], [-1, -2]]])
+SRS4 = np.array([[[0, 0], [-1, 0], [2, 0], [-1, 0], [2, 0]],
+                 [[0, 0], [1, 0], [1, 0], [1, -1], [1, 2]],
+                 [[0, 0], [2, 0], [-1, 0], [2, 1], [-1, 1]],
+                 [[0, 0], [0, 0], [0, 0], [0, 2], [0, -1]]])
+SRS = np.array([SRS2, SRS3, SRS4])
+
+Cells = Tuple[Tuple[int, int], ...]
+
+
+def _rotate(cells: Cells, size: int, d: int) -> Cells:
+    """Rotate cells inside their bounding box exactly like mino.rotateMino."""
+    m = ROT_MAT[d]
+    ox = size * min(m[1])
+    oy = size * min(m[0])
+    return tuple(
+        (int(m[0, 0] * (x + ox) + m[0, 1] * (y + oy)), int(m[1, 0] * (x + ox) + m[1, 1] * (y + oy)))
+        for x, y in cells
+    )
+
+
+def _build_tables():
+    sizes, spawns, rotations, kicks = [], [], [], []
+    for data in MINO_DATA:
+        size = int(np.max(data[:4]))
+        cells = tuple((int(x), int(y)) for x, y in data[:4])
+        states = []
+        for _ in range(4):
+            states.append(tuple(sorted(cells)))
+            cells = _rotate(cells, size, 1)
+        table = SRS[size - 1]
+        kick = [[[(int(table[a, i, 0] - table[b, i, 0]), int(table[a, i, 1] - table[b, i, 1]))
+                  for i in range(5)] for b in range(4)] for a in range(4)]
+        sizes.append(size)
+        spawns.append((int(data[5, 0]), int(data[5, 1])))
+        rotations.append(tuple(states))
+        kicks.append(kick)
+    return tuple(sizes), tuple(spawns), tuple(rotations), kicks
+
+
+# SIZES[p]: bounding box size used by rotateMino, SPAWNS[p]: (x, y) spawn,
+# ROTATIONS[p][r]: cells in rotation state r, KICKS[p][from][to]: SRS offsets
+SIZES, SPAWNS, ROTATIONS, KICKS = _build_tables()
+
+
+class Bag:
+    """7-bag randomizer; passing ``seed`` makes the sequence reproducible.
+
+    Mirrors ``bag`` in ``docs/Tetris.py``: two bags are dealt up front and
+    another is appended whenever fewer than 10 pieces remain queued.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.now_queue: List[int] = self._deal() + self._deal()
+
+    def _deal(self) -> List[int]:
+        return self.rng.sample(range(len(PIECES)), len(PIECES))
+
+    def generate_bag(self) -> None:
+        if len(self.now_queue) < 10:
+            self.now_queue += self._deal()
+
+    def pop(self) -> int:
+        return self.now_queue.pop(0)
+
+
+# Inputs understood by Game.apply, in the order the replay format encodes them
+ACTIONS = ("left", "right", "soft_drop", "rotate_cw", "rotate_ccw", "rotate_180", "hold", "hard_drop")
+
+
+class Field:
+    """Locked cells of the playfield; 0 is empty, otherwise the piece colour.
+
+    ``heights`` holds the row of the highest filled cell in each column
+    (``ROWS`` when empty) and is kept up to date on lock and line clear.
+    """
+
+    def __init__(self):
+        self.matrix = np.zeros((ROWS, COLS), np.int8)
+        self.heights = [ROWS] * COLS
+        self.clear_cnt = 0
+        self.tspin = False
+
+    def is_free(self, cells: Cells, x: int, y: int) -> bool:
+        matrix = self.matrix
+        for cx, cy in cells:
+            px, py = x + cx, y + cy
+            if not (0 <= px < COLS and 0 <= py < ROWS) or matrix[py, px]:
+                return False
+        return True
+
+    def lock(self, cells: Cells, x: int, y: int, colour: int) -> int:
+        heights = self.heights
+        for cx, cy in cells:
+            self.matrix[y + cy, x + cx] = colour
+            if y + cy < heights[x + cx]:
+                heights[x + cx] = y + cy
+        return self.clear_lines()
+
+    def clear_lines(self) -> int:
+        full = self.matrix.all(axis=1)
+        cleared = int(full.sum())
+        if cleared:
+            kept = self.matrix[~full]
+            self.matrix[:cleared] = 0
+            self.matrix[cleared:] = kept
+            self.clear_cnt += cleared
+            self.update_heights()
+        return cleared
+
+    def update_heights(self) -> None:
+        """Rebuild ``heights`` after the matrix was changed wholesale."""
+        filled = self.matrix != 0
+        self.heights = np.where(filled.any(axis=0), filled.argmax(axis=0), ROWS).tolist()
+
+    def drop_y(self, cells: Cells, x: int, y: int) -> int:
+        """Lowest y the piece can fall to from ``(x, y)``.
+
+        When every cell is above its column's surface the answer comes
+        straight from ``heights``; a piece tucked under an overhang falls
+        back to stepping down one row at a time.
+        """
+        heights = self.heights
+        land = ROWS
+        for cx, cy in cells:
+            top = heights[x + cx]
+            if y + cy >= top:
+                while self.is_free(cells, x, y + 1):
+                    y += 1
+                return y
+            land = min(land, top - cy)
+        return land - 1
+
+    def key(self) -> bytes:
+        """Occupancy of the board packed into bytes, usable as a hash key."""
+        return np.packbits(self.matrix != 0).tobytes()
+
+
+class Game:
+    """One headless game driven by discrete inputs (no gravity, like the original)."""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.field = Field()
+        self.bag = Bag(seed)
+        self.hold: Optional[int] = None
+        self.hold_used = False
+        self.over = False
+        self.lines = 0
+        self.last_rotated = False
+        self._spawn(self.bag.pop())
+
+    def _spawn(self, piece: int) -> None:
+        self._ghost = None
+        self.piece = piece
+        self.rotation = 0
+        self.x, self.y = SPAWNS[piece]
+        self.last_rotated = False
+        if not self.field.is_free(self.cells, self.x, self.y):
+            self.over = True
+
+    @property
+    def cells(self) -> Cells:
+        return ROTATIONS[self.piece][self.rotation]
+
+    def move(self, dx: int, dy: int) -> bool:
+        if not self.field.is_free(self.cells, self.x + dx, self.y + dy):
+            return False
+        self.x += dx
+        self.y += dy
+        self.last_rotated = False
+        self._ghost = None
+        return True
+
+    def rotate(self, d: int) -> bool:
+        """Rotate by ``d`` quarter turns, trying the SRS kicks like mino.isSRS."""
+        before = self.rotation
+        after = (before + d) % 4
+        cells = ROTATIONS[self.piece][after]
+        for dx, dy in KICKS[self.piece][before][after]:
+            if self.field.is_free(cells, self.x + dx, self.y + dy):
+                self.x += dx
+                self.y += dy
+                self.rotation = after
+                self.last_rotated = True
+                self._ghost = None
+                return True
+        return False
+
+    def hold_piece(self) -> bool:
+        if self.hold_used:
+            return False
+        if self.hold is None:
+            self.hold = self.piece
+            self._spawn(self.bag.pop())
+        else:
+            self.hold, piece = self.piece, self.hold
+            self._spawn(piece)
+        self.hold_used = True
+        return True
+
+    def ghost_y(self) -> int:
+        """Landing row of the current piece, recomputed only after it moved."""
+        if self._ghost is None:
+            self._ghost = self.field.drop_y(self.cells, self.x, self.y)
+        return self._ghost
+
+    def is_tspin(self) -> bool:
+        """T piece whose last move was a rotation with 3 of 4 box corners filled."""
+        if PIECES[self.piece] != "T" or not self.last_rotated:
+            return False
+        filled = 0
+        for cx, cy in ((0, 0), (2, 0), (0, 2), (2, 2)):
+            px, py = self.x + cx, self.y + cy
+            if not (0 <= px < COLS and 0 <= py < ROWS) or self.field.matrix[py, px]:
+                filled += 1
+        return filled >= 3
+
+    def hard_drop(self) -> int:
+        """Lock the piece at its ghost position and deal the next one."""
+        ghost = self.ghost_y()
+        if ghost != self.y:
+            # falling after the last rotation cancels a T-spin
+            self.last_rotated = False
+            self.y = ghost
+        self.field.tspin = self.is_tspin()
+        cleared = self.field.lock(self.cells, self.x, self.y, int(MINO_DATA[self.piece][4, 0]))
+        self.lines += cleared
+        self.hold_used = False
+        self._spawn(self.bag.pop())
+        self.bag.generate_bag()
+        return cleared
+
+    def apply(self, action: str) -> bool:
+        """Apply one of ``ACTIONS``; returns False when the input had no effect."""
+        if self.over:
+            return False
+        if action == "left":
+            return self.move(-1, 0)
+        if action == "right":
+            return self.move(1, 0)
+        if action == "soft_drop":
+            return self.move(0, 1)
+        if action == "rotate_cw":
+            return self.rotate(1)
+        if action == "rotate_ccw":
+            return self.rotate(-1)
+        if action == "rotate_180":
+            return self.rotate(2)
+        if action == "hold":
+            return self.hold_piece()
+        if action == "hard_drop":
+            self.hard_drop()
+            return True
+        raise ValueError(f"unknown action: {action}")
@@ -0,0 +1,287 @@
+"""Perft-style move generation counts for the Tetris engine.
+
+As in chess engines, ``perft`` walks the game tree to a fixed depth and
+counts the nodes: each node is a distinct resting placement of the next
+piece from ``tetris_bot.search`` (left/right/soft drop and SRS rotations
+with kicks, placements covering the same cells counted once), followed by
+line clears. Any change to the rotation tables, the kick offsets, the
+collision test or the clearing logic moves these numbers, so pinned
+reference counts on a few canonical boards catch regressions that play
+tests miss, and nodes per second measure engine speed objectively.
+
+``perft_levels`` merges transpositions (same board, hold and queue
+position reached by different paths) level by level; it must agree with
+``perft`` on the totals and also counts distinct positions and T-spins.
+``engine_placements`` finds the placements a second way, by driving
+``tetris_engine.Game`` itself, to cross-check ``search``.
+
+``tetris_engine`` is a port of the pygame game in ``docs/Tetris.py``,
+which cannot be imported (it opens a window at import time). ``reference``
+extracts its ``field`` and ``mino`` classes with ``ast`` and runs them
+headless, so ``reference_placements`` (``isSRS``/``rotateMino``),
+``reference_lock`` (``clearLines``) and ``reference_options``
+(``holdMino``) check the port against the original rather than against
+itself. The original's ``clearLines`` only scans the visible rows
+20-39, the engine clears any full row; the canonical boards never fill
+the hidden buffer, so the two agree there::
+
+    python -m tetris_perft --board tsd --pieces TIOLJSZ --depth 3
+"""
+import argparse
+import ast
+import time
+from collections import Counter, deque
+from functools import lru_cache
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from tetris_bot import Rows, final_placements, lock_rows, search
+from tetris_engine import COLS, PIECES, ROTATIONS, ROWS, SPAWNS, Game
+
+
+def _board(*lines: str) -> Rows:
+    """Rows from text pictures of the bottom of the field (``#`` filled)."""
+    rows = [0] * ROWS
+    for i, line in enumerate(reversed(lines)):
+        rows[ROWS - 1 - i] = sum(1 << x for x, c in enumerate(line) if c == "#")
+    return tuple(rows)
+
+
+# canonical positions: open field, a T-spin double slot, a tetris well and
+# ragged garbage with holes
+BOARDS: Dict[str, Rows] = {
+    "empty": (0,) * ROWS,
+    "tsd": _board("###.......",
+                  "##...#####",
+                  "###.######"),
+    "well": _board("#########.",
+                   "#########.",
+                   "#########.",
+                   "#########."),
+    "garbage": _board("#.##.#..##",
+                      "##.####.##",
+                      "#.######.#",
+                      "####.#####"),
+}
+
+
+class PerftLevel(NamedTuple):
+    nodes: int
+    positions: int
+    tspins: int
+    lines: int
+
+
+def _queue(pieces: Sequence) -> Tuple[int, ...]:
+    return tuple(PIECES.index(p) if isinstance(p, str) else int(p) for p in pieces)
+
+
+def _options(queue: Tuple[int, ...], idx: int, hold: Optional[int], use_hold: bool):
+    """``(piece, new hold, new idx)`` choices, the way ``tetris_bot.expand`` plays hold."""
+    options = [(queue[idx], hold, idx + 1)]
+    if use_hold:
+        if hold is None:
+            if idx + 1 < len(queue):
+                options.append((queue[idx + 1], queue[idx], idx + 2))
+        elif hold != queue[idx]:
+            options.append((hold, queue[idx], idx + 1))
+    return options
+
+
+def _placements(rows: Rows, piece: int, cached: bool):
+    if cached:
+        return final_placements(rows, piece)
+    return tuple(state + (tspin,) for state, tspin in search(rows, piece)[0].items())
+
+
+def perft(rows: Rows, pieces: Sequence, depth: int, hold: bool = False, cached: bool = False) -> int:
+    """Number of placement sequences of length ``depth`` (leaf nodes)."""
+    queue = _queue(pieces)
+    if depth > len(queue):
+        raise ValueError("need at least one piece per ply")
+
+    def walk(rows: Rows, idx: int, held: Optional[int], left: int) -> int:
+        if idx >= len(queue):
+            return 0
+        total = 0
+        for piece, new_hold, new_idx in _options(queue, idx, held, hold):
+            found = _placements(rows, piece, cached)
+            if left == 1:
+                total += len(found)
+                continue
+            shapes = ROTATIONS[piece]
+            for r, x, y, _ in found:
+                total += walk(lock_rows(rows, shapes[r], x, y)[0], new_idx, new_hold, left - 1)
+        return total
+
+    return walk(rows, 0, None, depth) if depth else 1
+
+
+def perft_levels(rows: Rows, pieces: Sequence, depth: int, hold: bool = False,
+                 cached: bool = True) -> List[PerftLevel]:
+    """Per ply: nodes (as ``perft``), distinct positions, T-spins and lines cleared."""
+    queue = _queue(pieces)
+    if depth > len(queue):
+        raise ValueError("need at least one piece per ply")
+    frontier: Counter = Counter({(rows, None, 0): 1})
+    levels = []
+    for _ in range(depth):
+        nxt: Counter = Counter()
+        nodes = tspins = lines = 0
+        for (board, held, idx), paths in frontier.items():
+            if idx >= len(queue):
+                continue
+            for piece, new_hold, new_idx in _options(queue, idx, held, hold):
+                shapes = ROTATIONS[piece]
+                for r, x, y, tspin in _placements(board, piece, cached):
+                    child, cleared = lock_rows(board, shapes[r], x, y)
+                    nodes += paths
+                    tspins += paths * tspin
+                    lines += paths * cleared
+                    nxt[(child, new_hold, new_idx)] += paths
+        levels.append(PerftLevel(nodes, len(nxt), tspins, lines))
+        frontier = nxt
+    return levels
+
+
+def engine_placements(rows: Rows, piece: int) -> Set[frozenset]:
+    """Resting cell sets reachable by driving ``Game`` from spawn with every input."""
+    game = Game(seed=0)
+    for y, row in enumerate(rows):
+        game.field.matrix[y] = [(row >> x) & 1 for x in range(COLS)]
+    game.field.update_heights()
+    start = (0,) + SPAWNS[piece]
+    if not game.field.is_free(ROTATIONS[piece][0], start[1], start[2]):
+        return set()
+    seen = {start}
+    queue = deque([start])
+    finals = set()
+    moves = ((game.move, (-1, 0)), (game.move, (1, 0)), (game.move, (0, 1)),
+             (game.rotate, (1,)), (game.rotate, (-1,)), (game.rotate, (2,)))
+    while queue:
+        state = queue.popleft()
+        for action, args in moves:
+            game.piece, (game.rotation, game.x, game.y) = piece, state
+            if action(*args):
+                nxt = (game.rotation, game.x, game.y)
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        game.piece, (game.rotation, game.x, game.y) = piece, state
+        if not game.field.is_free(game.cells, game.x, game.y + 1):
+            finals.add(frozenset((game.x + cx, game.y + cy) for cx, cy in game.cells))
+    return finals
+
+
+def search_cells(rows: Rows, piece: int) -> Set[frozenset]:
+    """Cell sets of ``search``'s placements, comparable with ``engine_placements``."""
+    shapes = ROTATIONS[piece]
+    return {frozenset((x + cx, y + cy) for cx, cy in shapes[r])
+            for r, x, y, _ in _placements(rows, piece, cached=False)}
+
+
+REFERENCE = Path(__file__).resolve().parent / "docs" / "Tetris.py"
+
+
+@lru_cache(maxsize=1)
+def reference() -> Dict[str, object]:
+    """Namespace with the ``field`` and ``mino`` classes of ``docs/Tetris.py``."""
+    tree = ast.parse(REFERENCE.read_text(encoding="utf-8"))
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef) and node.name in ("field", "mino")]
+    namespace = {"np": np, "hold": np.zeros((6, 2), int)}
+    exec(compile(ast.Module(body=classes, type_ignores=[]), str(REFERENCE), "exec"), namespace)
+    return namespace
+
+
+def _reference_board(rows: Rows) -> None:
+    field = reference()["field"]
+    field.testMatrix = np.array([[(row >> x) & 1 for x in range(COLS)] for row in rows])
+    field.matrix = field.testMatrix.copy()
+
+
+def reference_placements(rows: Rows, piece: int) -> Set[frozenset]:
+    """Resting cell sets reachable with the original's moves and ``isSRS`` rotations."""
+    mino = reference()["mino"]
+    _reference_board(rows)
+    current = mino(mino.minoData[piece])
+    if not current.isBlockedByMovement(0, 0):  # True means free in the original
+        return set()
+    seen = {current.data.tobytes()}
+    queue = deque([current.data.copy()])
+    finals = set()
+    while queue:
+        state = queue.popleft()
+        for dx, dy, d in ((-1, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1), (0, 0, -1), (0, 0, -2)):
+            current.data = state.copy()
+            if d:
+                if not current.isSRS(d):
+                    continue
+                current.rotateMino(d)
+            elif current.isBlockedByMovement(dx, dy):
+                current.moveMino(dx, dy)
+            else:
+                continue
+            if current.data.tobytes() not in seen:
+                seen.add(current.data.tobytes())
+                queue.append(current.data.copy())
+        current.data = state
+        if not current.isBlockedByMovement(0, 1):
+            finals.add(frozenset((int(x), int(y)) for x, y in state[:4] + state[5]))
+    current.data = mino.minoData[piece].copy()  # __del__ rotates its data back
+    return finals
+
+
+def reference_lock(rows: Rows, cells: frozenset) -> Tuple[Rows, int]:
+    """Board and lines cleared after the original locks ``cells`` and runs ``clearLines``."""
+    namespace = reference()
+    _reference_board(rows)
+    field = namespace["field"]
+    for x, y in cells:
+        field.testMatrix[y, x] = 1
+    field.matrix = field.testMatrix.copy()
+    namespace["nowMino"] = SimpleNamespace(drawMino=lambda: None)
+    board = field()
+    board.clearLines()
+    return tuple(sum(1 << x for x in range(COLS) if row[x]) for row in field.testMatrix), board.clearCnt
+
+
+def reference_options(queue: Tuple[int, ...], idx: int, hold: Optional[int]):
+    """``_options`` with hold, computed by calling the original's ``holdMino``."""
+    namespace = reference()
+    mino = namespace["mino"]
+    options = {(queue[idx], hold, idx + 1)}
+    rest = [mino.minoData[p].copy() for p in queue[idx + 1:]]
+    if hold is None and not rest:
+        return options
+    namespace["hold"] = mino.X.copy() if hold is None else mino.minoData[hold].copy()
+    namespace["nowBag"] = SimpleNamespace(nowQueue=rest)
+    current = mino(mino.minoData[queue[idx]])
+    current.holdMino()
+    played = int(current.data[4, 0]) - 1
+    options.add((played, int(namespace["hold"][4, 0]) - 1, len(queue) - len(rest)))
+    return options
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="tetris_perft", description="Count placements to a fixed depth.")
+    parser.add_argument("--board", choices=sorted(BOARDS), default="empty")
+    parser.add_argument("--pieces", default="IOTLJSZ", help="piece queue, e.g. TIOLJSZ")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--hold", action="store_true")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    nodes = perft(BOARDS[args.board], args.pieces, args.depth, args.hold)
+    elapsed = time.perf_counter() - start
+    print(f"perft({args.board}, {args.pieces}, {args.depth}) = {nodes:,}  "
+          f"{elapsed:.2f} s  {nodes / elapsed:,.0f} nodes/s")
+    for ply, level in enumerate(perft_levels(BOARDS[args.board], args.pieces, args.depth, args.hold), 1):
+        print(f"  ply {ply}: {level.nodes:,} nodes  {level.positions:,} positions  "
+              f"{level.tspins:,} T-spins  {level.lines:,} lines")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
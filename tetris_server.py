@@ -0,0 +1,110 @@
+"""Headless Tetris games served over a WebSocket, one game per connection.
+
+Client -> server: binary messages where every byte is an input, the index
+of an action in ``tetris_engine.ACTIONS``. Unknown codes and text
+messages are ignored.
+
+Server -> client: at most one binary frame per tick holding only the cells
+that changed since the previous frame::
+
+    tick: u32 | lines: u16 | flags: u8 | n: u16 | n x cell: u16 | n x value: u8
+
+``cell`` is ``row * COLS + col`` on the full 40x10 board (locked cells plus
+the falling piece), ``value`` its colour, and bit 0 of ``flags`` marks the
+game as over. Inputs that arrive during a tick are applied together and
+produce a single frame, so a burst of key presses costs one send.
+"""
+import asyncio
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+
+from tetris_engine import ACTIONS, COLS, MINO_DATA, ROWS, Game
+
+TICK_RATE = 60
+FRAME_HEADER = struct.Struct("<IHBH")
+FLAG_GAME_OVER = 1
+
+
+def render(game: Game) -> np.ndarray:
+    """Flat uint8 board with the falling piece drawn in."""
+    board = game.field.matrix.astype(np.uint8).ravel()
+    if not game.over:
+        colour = MINO_DATA[game.piece][4, 0]
+        for cx, cy in game.cells:
+            board[(game.y + cy) * COLS + game.x + cx] = colour
+    return board
+
+
+def encode_frame(tick: int, game: Game, prev: np.ndarray, cur: np.ndarray) -> bytes:
+    changed = np.flatnonzero(prev != cur)
+    flags = FLAG_GAME_OVER if game.over else 0
+    header = FRAME_HEADER.pack(tick, game.lines & 0xFFFF, flags, len(changed))
+    return header + changed.astype("<u2").tobytes() + cur[changed].tobytes()
+
+
+def decode_frame(data: bytes, board: np.ndarray) -> Tuple[int, int, bool]:
+    """Apply a frame to a client-side flat board; returns (tick, lines, over)."""
+    tick, lines, flags, n = FRAME_HEADER.unpack_from(data)
+    offset = FRAME_HEADER.size
+    cells = np.frombuffer(data, "<u2", n, offset)
+    board[cells] = np.frombuffer(data, np.uint8, n, offset + 2 * n)
+    return tick, lines, bool(flags & FLAG_GAME_OVER)
+
+
+async def run_session(websocket: WebSocket, seed: Optional[int] = None,
+                      tick_rate: int = TICK_RATE) -> None:
+    """Play one game for a connected client until it leaves or tops out."""
+    await websocket.accept()
+    game = Game(seed)
+    pending = bytearray()
+    closed = asyncio.Event()
+
+    async def receive():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                # text frames carry no inputs; skip them like unknown codes
+                if message.get("bytes"):
+                    pending.extend(message["bytes"])
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        closed.set()
+
+    reader = asyncio.create_task(receive())
+    prev = np.zeros(ROWS * COLS, np.uint8)
+    period = 1.0 / tick_rate
+    loop = asyncio.get_running_loop()
+    next_tick = loop.time()
+    tick = 0
+    try:
+        while not closed.is_set():
+            if pending:
+                inputs = bytes(pending)
+                pending.clear()
+                for code in inputs:
+                    if code < len(ACTIONS):
+                        game.apply(ACTIONS[code])
+            cur = render(game)
+            if tick == 0 or game.over or not np.array_equal(cur, prev):
+                await websocket.send_bytes(encode_frame(tick, game, prev, cur))
+                prev = cur
+            if game.over:
+                await websocket.close()
+                break
+            tick += 1
+            next_tick += period
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # running behind: skip the missed ticks instead of bursting
+                next_tick = loop.time()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        reader.cancel()
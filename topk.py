@@ -0,0 +1,258 @@
+"""Top-k frequent terms over text streams of any size.
+
+``count_word`` answers "how often does this word occur"; this module
+answers "which terms occur most" without knowing them in advance:
+
+* ``Counter``-based exact counting for inputs with few distinct terms;
+* ``SpaceSaving`` keeps ``capacity`` candidate counters. Any term with
+  frequency above ``N / capacity`` is kept, and each count overestimates
+  the true one by at most its ``error`` (itself at most ``N / capacity``);
+* ``CountMinSketch`` is a ``depth x width`` table of counters whose
+  estimates exceed the true count by at most ``epsilon * N`` with
+  probability ``1 - delta``.
+
+``TopK`` starts exact and switches to Space-Saving (with a Count-Min
+Sketch tightening its estimates) once ``max_exact`` distinct terms have
+been seen, so memory stays fixed no matter how long the stream runs. All
+three summaries are mergeable, so shards can be counted in parallel and
+combined::
+
+    top = TopK(k=100, ngram=2)
+    for line in open("app.log"):
+        top.update(line)
+    top.top()  # [(term, count, error), ...]
+"""
+import math
+import re
+from collections import Counter
+from hashlib import blake2b
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+EPSILON = 1e-4
+DELTA = 1e-3
+MAX_EXACT = 100_000
+
+
+def terms(text: str, ngram: int = 1, lower: bool = True) -> Iterator[str]:
+    """Words of ``text`` (``\\w+`` runs), or space-joined n-grams of them."""
+    words = _TOKEN.findall(text.lower() if lower else text)
+    if ngram == 1:
+        return iter(words)
+    return (" ".join(words[i:i + ngram]) for i in range(len(words) - ngram + 1))
+
+
+def _hashes(keys: Iterable[str]) -> np.ndarray:
+    # stable across processes (unlike hash()), so sketches from shards line up
+    return np.fromiter((int.from_bytes(blake2b(k.encode(), digest_size=8).digest(), "little")
+                        for k in keys), np.uint64)
+
+
+class CountMinSketch:
+    """Count-Min Sketch with ``depth`` rows of ``width`` counters."""
+
+    def __init__(self, width: int, depth: int):
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be >= 1")
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), np.int64)
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, epsilon: float = EPSILON, delta: float = DELTA) -> "CountMinSketch":
+        """Sketch whose estimates are within ``epsilon * total`` with probability ``1 - delta``."""
+        if not 0 < epsilon < 1 or not 0 < delta < 1:
+            raise ValueError("epsilon and delta must be in (0, 1)")
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)))
+
+    def _columns(self, keys: List[str]) -> np.ndarray:
+        # double hashing: row i uses h1 + i * h2
+        h = _hashes(keys)
+        h1, h2 = h & np.uint64(0xFFFFFFFF), (h >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, counts: Dict[str, int]) -> None:
+        if not counts:
+            return
+        keys = list(counts)
+        weights = np.fromiter(counts.values(), np.int64, len(keys))
+        cols = self._columns(keys)
+        for row in range(self.depth):
+            np.add.at(self.table[row], cols[row], weights)
+        self.total += int(weights.sum())
+
+    def estimate(self, keys: List[str]) -> np.ndarray:
+        if not keys:
+            return np.zeros(0, np.int64)
+        cols = self._columns(keys)
+        return self.table[np.arange(self.depth)[:, None], cols].min(axis=0)
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("sketches must have the same width and depth")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters with at most ``capacity`` counters."""
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.total = 0
+
+    @classmethod
+    def from_error(cls, epsilon: float = EPSILON) -> "SpaceSaving":
+        """Summary whose counts overestimate by at most ``epsilon * total``."""
+        if not 0 < epsilon < 1:
+            raise ValueError("epsilon must be in (0, 1)")
+        return cls(math.ceil(1 / epsilon))
+
+    def _floor(self) -> int:
+        """Upper bound on the count of any term not in the summary."""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def add(self, counts: Dict[str, int]) -> None:
+        """Add a batch of weighted terms.
+
+        New terms evicting the smallest counters all inherit the floor as
+        it stood before the batch, which keeps the Space-Saving bounds and
+        costs one sort per batch instead of a heap operation per term.
+        """
+        self.total += sum(counts.values())
+        mine = self.counts
+        new = {}
+        for term, n in counts.items():
+            if term in mine:
+                mine[term] += n
+            else:
+                new[term] = n
+        if not new:
+            return
+        free = self.capacity - len(mine)
+        if len(new) <= free:
+            mine.update(new)
+            self.errors.update(dict.fromkeys(new, 0))
+            return
+        floor = self._floor() if free <= 0 else 0
+        for term, n in new.items():
+            mine[term] = n + floor
+            self.errors[term] = floor
+        self._truncate()
+
+    def _truncate(self) -> None:
+        if len(self.counts) <= self.capacity:
+            return
+        keep = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:self.capacity]
+        self.counts = dict(keep)
+        self.errors = {t: self.errors[t] for t in self.counts}
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """Combine with a summary of another shard (any capacity)."""
+        mine_floor, other_floor = self._floor(), other._floor()
+        counts, errors = {}, {}
+        for term in self.counts.keys() | other.counts.keys():
+            counts[term] = self.counts.get(term, mine_floor) + other.counts.get(term, other_floor)
+            errors[term] = self.errors.get(term, mine_floor) + other.errors.get(term, other_floor)
+        self.counts, self.errors = counts, errors
+        self.total += other.total
+        self._truncate()
+        return self
+
+    def top(self, k: int) -> List[Tuple[str, int, int]]:
+        ranked = sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+        return [(t, c, self.errors[t]) for t, c in ranked]
+
+
+class TopK:
+    """Top-``k`` terms of a text stream, exact while it fits in ``max_exact`` terms."""
+
+    def __init__(self, k: int = 10, ngram: int = 1, lower: bool = True, epsilon: float = EPSILON,
+                 delta: float = DELTA, max_exact: int = MAX_EXACT, method: str = "auto"):
+        if k < 1 or ngram < 1:
+            raise ValueError("k and ngram must be >= 1")
+        if method not in ("auto", "exact", "sketch"):
+            raise ValueError("method must be auto, exact or sketch")
+        self.k = k
+        self.ngram = ngram
+        self.lower = lower
+        self.epsilon = epsilon
+        self.delta = delta
+        self.max_exact = max_exact
+        self.method = method
+        self.exact: Optional[Counter] = Counter()
+        self.heavy: Optional[SpaceSaving] = None
+        self.sketch: Optional[CountMinSketch] = None
+        if method == "sketch":
+            self._to_sketch()
+
+    @property
+    def total(self) -> int:
+        return sum(self.exact.values()) if self.exact is not None else self.heavy.total
+
+    def _to_sketch(self) -> None:
+        self.heavy = SpaceSaving(max(self.k, SpaceSaving.from_error(self.epsilon).capacity))
+        self.sketch = CountMinSketch.from_error(self.epsilon, self.delta)
+        if self.exact:
+            self.heavy.add(self.exact)
+            self.sketch.add(self.exact)
+        self.exact = None
+
+    def add_counts(self, counts: Dict[str, int]) -> None:
+        if self.exact is not None:
+            self.exact.update(counts)
+            if self.method == "auto" and len(self.exact) > self.max_exact:
+                self._to_sketch()
+        else:
+            self.heavy.add(counts)
+            self.sketch.add(counts)
+
+    def update(self, text: str) -> None:
+        """Count the terms of ``text`` (n-grams do not cross calls)."""
+        self.add_counts(Counter(terms(text, self.ngram, self.lower)))
+
+    def update_many(self, texts: Iterable[str]) -> None:
+        """Like ``update`` for each text, with one summary update for all of them."""
+        batch: Counter = Counter()
+        for text in texts:
+            batch.update(terms(text, self.ngram, self.lower))
+        self.add_counts(batch)
+
+    def merge(self, other: "TopK") -> "TopK":
+        if other.exact is not None:
+            self.add_counts(other.exact)
+            return self
+        if self.exact is not None:
+            self._to_sketch()
+        self.heavy.merge(other.heavy)
+        self.sketch.merge(other.sketch)
+        return self
+
+    def top(self, k: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """``(term, count, error)`` for the top terms; true count is in ``[count - error, count]``."""
+        k = k or self.k
+        if self.exact is not None:
+            return [(t, c, 0) for t, c in sorted(self.exact.items(), key=lambda kv: (-kv[1], kv[0]))[:k]]
+        # rank a few extra candidates; the sketch can lower their counts
+        candidates = self.heavy.top(2 * k)
+        estimates = self.sketch.estimate([t for t, _, _ in candidates])
+        out = []
+        for (term, count, error), est in zip(candidates, estimates):
+            bound = min(count, int(est))
+            out.append((term, bound, error - (count - bound) if error > count - bound else 0))
+        out.sort(key=lambda r: (-r[1], r[0]))
+        return out[:k]
+
+    def result(self, k: Optional[int] = None) -> Dict[str, object]:
+        return {"method": "exact" if self.exact is not None else "sketch", "total": self.total,
+                "top": [{"term": t, "count": c, "error": e} for t, c, e in self.top(k)]}
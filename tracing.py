@@ -0,0 +1,400 @@
+"""Request tracing with W3C ``traceparent`` propagation.
+
+Spans carry OpenTelemetry-style ids (16-byte trace id, 8-byte span id)
+and follow the current ``contextvars`` context, so they nest across
+``await`` and the threadpool that runs sync endpoints. A request is
+traced when its ``traceparent`` says it is sampled, or, for new traces,
+with probability ``rate`` decided from the trace id (the same rule as
+OpenTelemetry's ``TraceIdRatioBased``). Unsampled requests only pay for
+a context variable lookup per span, and until ``install`` has run the
+helpers below are no-ops that skip even that.
+
+Finished spans go to an exporter without blocking: ``RingBufferExporter``
+keeps the last N in memory, ``JsonlExporter`` appends batches to a JSON
+lines file from a background thread.
+
+``TracedRoute`` and ``TracedJSONResponse`` split each request into
+``http.body`` (reading the body), ``validation`` (pydantic and
+dependencies), ``handler`` and ``serialize`` spans under the server span
+opened by ``TracingMiddleware``::
+
+    app = FastAPI(default_response_class=TracedJSONResponse)
+    app.router.route_class = TracedRoute
+    install(app, Tracer(rate=0.01, exporter=JsonlExporter("traces.jsonl")))
+"""
+import functools
+import inspect
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_ids = random.Random()
+# set by ``install``; without a tracer every helper is a pass-through
+_enabled = False
+_NOOP = nullcontext()
+
+
+def _new_trace_id() -> str:
+    return f"{_ids.getrandbits(128) or 1:032x}"
+
+
+def _new_span_id() -> str:
+    return f"{_ids.getrandbits(64) or 1:016x}"
+
+
+def parse_traceparent(header: Optional[str]):
+    """``(trace_id, parent_span_id, sampled)`` or None when missing or invalid."""
+    if not header:
+        return None
+    m = _TRACEPARENT.match(header.strip().lower())
+    if m is None or m.group(1) == "ff" or m.group(2) == "0" * 32 or m.group(3) == "0" * 16:
+        return None
+    return m.group(2), m.group(3), bool(int(m.group(4), 16) & 1)
+
+
+class Span:
+    """One timed operation; ``end()`` hands it to the tracer's exporter."""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "sampled",
+                 "start_ns", "end_ns", "attributes", "status")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 sampled: bool, attributes: Optional[Dict[str, Any]] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes or {}
+        self.status = "ok"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if self.sampled:
+                self.tracer.exporter.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "trace_id": self.trace_id, "span_id": self.span_id,
+                "parent_id": self.parent_id, "start_ns": self.start_ns, "end_ns": self.end_ns,
+                "duration_us": (self.end_ns - self.start_ns) // 1000 if self.end_ns else None,
+                "status": self.status, "attributes": self.attributes}
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# the open validation span of the current request, ended when the endpoint starts
+_validation: ContextVar[Optional[Span]] = ContextVar("validation_span", default=None)
+
+
+class RingBufferExporter:
+    """Keeps the last ``size`` finished spans in memory."""
+
+    def __init__(self, size: int = 10_000):
+        self.spans: deque = deque(maxlen=size)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        spans = list(self.spans)
+        return [s.to_dict() for s in (spans[-n:] if n else spans)]
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlExporter:
+    """Appends spans to a JSON lines file in batches from a background thread.
+
+    ``export`` only appends to a bounded deque; when the writer falls
+    behind by more than ``max_queue`` spans the oldest are dropped and
+    counted in ``dropped``.
+    """
+
+    def __init__(self, path: str, batch_size: int = 512, interval: float = 1.0,
+                 max_queue: int = 100_000):
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._queue: deque = deque()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        queue = self._queue
+        queue.append(span)
+        if len(queue) > self.max_queue:
+            queue.popleft()
+            self.dropped += 1
+        if len(queue) >= self.batch_size:
+            self._wake.set()
+
+    def _drain(self, out) -> None:
+        queue = self._queue
+        lines = []
+        while queue:
+            lines.append(json.dumps(queue.popleft().to_dict(), separators=(",", ":")))
+            if len(lines) >= self.batch_size:
+                out.write("\n".join(lines) + "\n")
+                lines = []
+        if lines:
+            out.write("\n".join(lines) + "\n")
+        out.flush()
+
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as out:
+            while not self._closed:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                self._drain(out)
+            self._drain(out)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until everything exported so far is written."""
+        deadline = time.monotonic() + timeout
+        self._wake.set()
+        while self._queue and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def close(self) -> None:
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+
+class Tracer:
+    """Creates spans; ``rate`` is the head-sampling probability for new traces."""
+
+    def __init__(self, rate: float = 1.0, exporter=None):
+        if not 0 <= rate <= 1:
+            raise ValueError("rate must be in [0, 1]")
+        self.rate = rate
+        self.exporter = exporter if exporter is not None else RingBufferExporter()
+        self._bound = int(rate * 2**64)
+
+    def _sampled(self, trace_id: str) -> bool:
+        return int(trace_id[16:], 16) < self._bound
+
+    def start_root(self, name: str, traceparent: Optional[str] = None,
+                   attributes: Optional[Dict[str, Any]] = None) -> Span:
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = _new_trace_id(), None
+            sampled = self._sampled(trace_id)
+        return Span(self, name, trace_id, parent_id, sampled, attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Span]:
+    """A child of the current span (not made current), or None when not sampled."""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return None
+    return Span(parent.tracer, name, parent.trace_id, parent.span_id, True, attributes)
+
+
+def span(name: str, **attributes: Any):
+    """Time a block as a child of the current span; a no-op when not sampled."""
+    if not _enabled:
+        return _NOOP
+    return _span(name, attributes)
+
+
+@contextmanager
+def _span(name: str, attributes: Dict[str, Any]) -> Iterator[Optional[Span]]:
+    child = start_span(name, **attributes)
+    if child is None:
+        yield None
+        return
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        _current.reset(token)
+        child.end()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator running a function (sync or async) inside ``span(name)``."""
+    def decorate(func: Callable) -> Callable:
+        label = name or f"{func.__module__}.{func.__qualname__}"
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(label):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class TracingMiddleware:
+    """Opens the server span of each HTTP request and returns its ``traceparent``."""
+
+    def __init__(self, app: ASGIApp, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                header = value.decode("latin-1")
+                break
+        root = self.tracer.start_root(f"{scope['method']} {scope['path']}", header)
+        token = _current.set(root)
+        status = 500
+
+        async def send_traced(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"traceparent", root.traceparent.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_traced)
+        finally:
+            _current.reset(token)
+            if root.sampled:
+                route = scope.get("route")
+                if route is not None:
+                    root.name = f"{scope['method']} {route.path}"
+                root.attributes.update({"http.method": scope["method"], "http.target": scope["path"],
+                                        "http.status_code": status})
+                if status >= 500:
+                    root.status = "error"
+            root.end()
+
+
+def _traced_endpoint(func: Callable) -> Callable:
+    label = f"handler {func.__name__}"
+
+    def begin():
+        validation = _validation.get()
+        if validation is not None:
+            validation.end()
+        return start_span(label)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_endpoint(*args, **kwargs):
+            if not _enabled:
+                return await func(*args, **kwargs)
+            child = begin()
+            if child is None:
+                return await func(*args, **kwargs)
+            token = _current.set(child)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _current.reset(token)
+                child.end()
+        return async_endpoint
+
+    @functools.wraps(func)
+    def endpoint(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        child = begin()
+        if child is None:
+            return func(*args, **kwargs)
+        token = _current.set(child)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+            child.end()
+    return endpoint
+
+
+class TracedRoute(APIRoute):
+    """``APIRoute`` that records body reading, validation and the handler as spans."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        if not (inspect.isasyncgenfunction(endpoint) or inspect.isgeneratorfunction(endpoint)):
+            endpoint = _traced_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        reads_body = self.body_field is not None
+
+        async def traced_handler(request: Request):
+            if not _enabled or _current.get() is None or not _current.get().sampled:
+                return await handler(request)
+            if reads_body:
+                # cached on the request, so FastAPI's own read is free
+                with span("http.body") as body_span:
+                    body_span.set("http.request_content_length", len(await request.body()))
+            validation = start_span("validation")
+            token = _validation.set(validation)
+            try:
+                return await handler(request)
+            finally:
+                _validation.reset(token)
+                validation.end()
+
+        return traced_handler
+
+
+class TracedJSONResponse(JSONResponse):
+    """``JSONResponse`` whose encoding is recorded as a ``serialize`` span."""
+
+    def render(self, content: Any) -> bytes:
+        if not _enabled:
+            return super().render(content)
+        with span("serialize"):
+            return super().render(content)
+
+
+def install(app: FastAPI, tracer: Tracer) -> Tracer:
+    """Add the server-span middleware and switch the span helpers on."""
+    global _enabled
+    _enabled = True
+    app.add_middleware(TracingMiddleware, tracer=tracer)
+    return tracer
@@ -0,0 +1,248 @@
+"""MessagePack and Arrow IPC bodies next to JSON.
+
+Clients pick the response format with ``Accept`` and send request bodies
+in any of them with ``Content-Type``:
+
+* ``application/json`` (default);
+* ``application/msgpack`` (needs ``msgpack``). NumPy arrays travel as
+  ``{"nd": true, "type": dtype, "shape": [...], "data": <bytes>}``, the
+  layout ``msgpack-numpy`` uses, so they are copied as one buffer;
+* ``application/vnd.apache.arrow.stream`` (needs ``pyarrow``). The body is
+  one record batch: every array or list field is a column (2-D arrays
+  become fixed-size lists over the same buffer), every other field goes
+  JSON-encoded into the ``fields`` schema metadata.
+
+Formats whose package is missing are not offered; asking for them gets
+JSON (for ``Accept``) or 415 (for ``Content-Type``). Responses that have
+no tabular form also fall back to JSON.
+
+``WireFormatMiddleware`` records the ``Accept`` choice for the request,
+``WireResponse`` (a ``JSONResponse``) renders in it, and ``WireRoute``
+decodes non-JSON bodies before FastAPI validates them::
+
+    app = FastAPI(default_response_class=WireResponse)
+    app.router.route_class = WireRoute
+    app.add_middleware(WireFormatMiddleware)
+"""
+import json
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import msgpack
+except ImportError:  # optional
+    msgpack = None
+try:
+    import pyarrow as pa
+except ImportError:  # optional
+    pa = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+_ALIASES = {"application/x-msgpack": MSGPACK, "application/vnd.msgpack": MSGPACK,
+            "application/x-apache-arrow-stream": ARROW}
+
+
+def available() -> List[str]:
+    """Media types this process can encode and decode, JSON first."""
+    return [JSON] + ([MSGPACK] if msgpack is not None else []) + ([ARROW] if pa is not None else [])
+
+
+def _media_type(value: str) -> str:
+    value = value.split(";", 1)[0].strip().lower()
+    return _ALIASES.get(value, value)
+
+
+def negotiate(accept: str) -> str:
+    """The available format with the highest ``Accept`` q-value; JSON wins ties."""
+    best, best_q = JSON, 0.0
+    formats = available()
+    for part in accept.split(","):
+        media, *params = part.split(";")
+        media = _media_type(media)
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media in formats and (q > best_q or (q == best_q and media == JSON)):
+            best, best_q = media, q
+    return best
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def _msgpack_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        arr = np.ascontiguousarray(obj)
+        return {"nd": True, "type": arr.dtype.str, "shape": list(arr.shape), "data": arr.data}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"{type(obj).__name__} is not MessagePack serializable")
+
+
+def _msgpack_hook(obj: Dict[str, Any]) -> Any:
+    if obj.get("nd") is True and "data" in obj:
+        return np.frombuffer(obj["data"], np.dtype(obj["type"])).reshape(obj["shape"])
+    return obj
+
+
+def _arrow_column(value: Any):
+    if isinstance(value, np.ndarray):
+        if value.ndim == 1:
+            return pa.array(value)
+        if value.ndim == 2:
+            flat = np.ascontiguousarray(value).reshape(-1)
+            return pa.FixedSizeListArray.from_arrays(pa.array(flat), value.shape[1])
+        raise ValueError("arrays with more than 2 dimensions have no Arrow form")
+    return pa.array(value)
+
+
+def _encode_arrow(content: Dict[str, Any]) -> bytes:
+    columns = {k: v for k, v in content.items() if isinstance(v, (list, np.ndarray))}
+    if not columns or len({len(v) for v in columns.values()}) != 1:
+        raise ValueError("no Arrow form: needs list fields of one length")
+    fields = {k: v for k, v in content.items() if k not in columns}
+    batch = pa.RecordBatch.from_arrays([_arrow_column(v) for v in columns.values()], names=list(columns))
+    batch = batch.replace_schema_metadata({"fields": json.dumps(fields, default=_json_default)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def _decode_arrow(body: bytes) -> Dict[str, Any]:
+    table = pa.ipc.open_stream(body).read_all()
+    metadata = table.schema.metadata or {}
+    content = json.loads(metadata.get(b"fields", b"{}"))
+    for name in table.column_names:
+        column = table.column(name).combine_chunks()
+        if pa.types.is_fixed_size_list(column.type):
+            values = column.flatten().to_numpy(zero_copy_only=False)
+            content[name] = values.reshape(-1, column.type.list_size)
+        elif pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+            content[name] = column.to_numpy(zero_copy_only=False)
+        else:
+            content[name] = column.to_pylist()
+    return content
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+    if media_type == ARROW:
+        if not isinstance(content, dict):
+            raise ValueError("no Arrow form: not an object")
+        return _encode_arrow(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                      default=_json_default).encode("utf-8")
+
+
+def decode(body: bytes, media_type: str) -> Any:
+    """Parse ``body``; arrays come back as NumPy arrays (lists for JSON)."""
+    media_type = _media_type(media_type)
+    if media_type not in available():
+        raise ValueError(f"unsupported content type: {media_type}")
+    if media_type == MSGPACK:
+        return msgpack.unpackb(body, object_hook=_msgpack_hook, raw=False)
+    if media_type == ARROW:
+        return _decode_arrow(body)
+    return json.loads(body)
+
+
+_accepted: ContextVar[str] = ContextVar("accepted_format", default=JSON)
+
+
+class WireFormatMiddleware:
+    """Records the negotiated response format of each request for ``WireResponse``."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = Headers(scope=scope).get("accept")
+        token = _accepted.set(negotiate(accept) if accept else JSON)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _accepted.reset(token)
+
+
+class WireResponse(JSONResponse):
+    """JSON, MessagePack or Arrow, as negotiated; NumPy arrays are encoded in bulk."""
+
+    def __init__(self, content: Any = None, status_code: int = 200, headers: Optional[Dict[str, str]] = None,
+                 media_type: Optional[str] = None, background: Any = None):
+        super().__init__(content, status_code, headers, media_type or _accepted.get(), background)
+        self.raw_headers.append((b"vary", b"Accept"))
+
+    def render(self, content: Any) -> bytes:
+        if self.media_type != JSON:
+            try:
+                return encode(content, self.media_type)
+            except ValueError:
+                self.media_type = JSON
+        return encode(content, JSON)
+
+
+def _plain(value: Any) -> Any:
+    """``value`` with NumPy arrays turned into lists, for pydantic validation."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+class WireRoute(APIRoute):
+    """``APIRoute`` whose request bodies may also be MessagePack or Arrow."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if self.body_field is None:
+            return handler
+
+        async def wire_handler(request: Request):
+            media_type = _media_type(request.headers.get("content-type", JSON))
+            if media_type not in (MSGPACK, ARROW):
+                return await handler(request)
+            if media_type not in available():
+                raise HTTPException(status_code=415, detail=f"unsupported content type: {media_type}")
+            # anything the decoder raises (msgpack's ExtraData is a ValueError) is a bad body
+            try:
+                content = decode(await request.body(), media_type)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"invalid {media_type} body: {e}")
+            # hand FastAPI an already-parsed JSON request
+            scope = dict(request.scope)
+            scope["headers"] = [(k, v) for k, v in scope["headers"] if k != b"content-type"]
+            scope["headers"].append((b"content-type", JSON.encode()))
+            parsed = Request(scope, request.receive)
+            parsed._body = request._body
+            parsed._json = _plain(content)
+            return await handler(parsed)
+
+        return wire_handler